@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+from benchmarks.casos import CASOS, METAS
+
+"""
+Benchmarks dos caminhos críticos.
+
+Uso:
+    python -m benchmarks executar [--rapido] [--filtro TEXTO]
+    python -m benchmarks comparar BASE NOVO [--limite 0.10]
+
+Os resultados são gravados em benchmarks/resultados/<commit>.json. BASE e
+NOVO podem ser commits (com resultados já gravados) ou caminhos de arquivos.
+executar termina com código 1 se algum caso de METAS (benchmarks/casos.py)
+ficar acima da meta.
+"""
+
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+
+
+def commit_atual():
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=raiz, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        alterado = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=raiz,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+    return f'{commit}-dirty' if alterado else commit
+
+
+def cronometrar(funcao, repeticoes=5, tempo_minimo=0.2):
+    """
+    Mede o tempo por chamada: calibra o número de chamadas por amostra para
+    durar ao menos tempo_minimo e retorna os tempos de cada amostra.
+    """
+    funcao()  # aquecimento
+    chamadas = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            funcao()
+        duracao = time.perf_counter() - inicio
+        if duracao >= tempo_minimo:
+            break
+        chamadas *= 2 if duracao == 0 else max(2, int(tempo_minimo / duracao) + 1)
+
+    tempos = [duracao / chamadas]
+    for _ in range(repeticoes - 1):
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            funcao()
+        tempos.append((time.perf_counter() - inicio) / chamadas)
+    return tempos
+
+
+def executar(rapido=False, filtro=None, repeticoes=5):
+    resultados = {}
+    for nome, preparar, tamanhos, tamanhos_rapido in CASOS:
+        if filtro and filtro not in nome:
+            continue
+        for n in (tamanhos_rapido if rapido else tamanhos):
+            chave = f'{nome}[n={n}]'
+            tempos = cronometrar(preparar(n), repeticoes, 0.05 if rapido else 0.2)
+            resultados[chave] = {
+                'n': n,
+                'mediana': float(np.median(tempos)),
+                'minimo': float(np.min(tempos)),
+                'repeticoes': len(tempos),
+            }
+            meta = METAS.get(chave)
+            marca = ''
+            if meta is not None:
+                resultados[chave]['meta'] = meta
+                if resultados[chave]['mediana'] > meta:
+                    marca = f'  ACIMA DA META ({meta * 1e3:.0f} ms)'
+            print(f'{chave:50s} {resultados[chave]["mediana"] * 1e3:12.4f} ms{marca}', flush=True)
+
+    return {
+        'commit': commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'maquina': platform.platform(),
+        'resultados': resultados,
+    }
+
+
+def carregar(referencia):
+    arquivo = referencia if os.path.exists(referencia) else os.path.join(DIRETORIO_RESULTADOS, f'{referencia}.json')
+    with open(arquivo) as f:
+        return json.load(f)
+
+
+def comparar(base, novo, limite=0.10):
+    """
+    Compara as medianas de dois resultados e retorna os casos em que o novo
+    é mais lento que a base por mais que a fração limite.
+    """
+    regressoes = []
+    print(f'{"caso":50s} {"base (ms)":>12s} {"novo (ms)":>12s} {"razão":>8s}')
+    for chave, r_novo in novo['resultados'].items():
+        r_base = base['resultados'].get(chave)
+        if r_base is None:
+            print(f'{chave:50s} {"-":>12s} {r_novo["mediana"] * 1e3:12.4f} {"-":>8s}')
+            continue
+        razao = r_novo['mediana'] / r_base['mediana']
+        marca = ''
+        if razao > 1 + limite:
+            regressoes.append(chave)
+            marca = '  REGRESSÃO'
+        print(f'{chave:50s} {r_base["mediana"] * 1e3:12.4f} {r_novo["mediana"] * 1e3:12.4f} {razao:8.2f}{marca}')
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks dos caminhos críticos')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_exec = sub.add_parser('executar', help='executa os benchmarks e grava o resultado do commit atual')
+    p_exec.add_argument('--rapido', action='store_true', help='tamanhos menores e amostras mais curtas')
+    p_exec.add_argument('--filtro', help='executa só os casos cujo nome contém o texto')
+    p_exec.add_argument('--repeticoes', type=int, default=5)
+    p_exec.add_argument('--saida', help='arquivo de saída (padrão: benchmarks/resultados/<commit>.json)')
+
+    p_comp = sub.add_parser('comparar', help='compara dois resultados e aponta regressões')
+    p_comp.add_argument('base', help='commit ou arquivo JSON de referência')
+    p_comp.add_argument('novo', help='commit ou arquivo JSON a comparar')
+    p_comp.add_argument('--limite', type=float, default=0.10,
+                        help='fração de aumento da mediana considerada regressão (padrão: 0.10)')
+
+    args = parser.parse_args(argv)
+
+    if args.comando == 'executar':
+        resultado = executar(args.rapido, args.filtro, args.repeticoes)
+        arquivo = args.saida or os.path.join(DIRETORIO_RESULTADOS, f'{resultado["commit"]}.json')
+        os.makedirs(os.path.dirname(os.path.abspath(arquivo)), exist_ok=True)
+        with open(arquivo, 'w') as f:
+            json.dump(resultado, f, indent=2)
+        print(f'Resultados gravados em {arquivo}')
+        acima = [chave for chave, r in resultado['resultados'].items() if r['mediana'] > r.get('meta', float('inf'))]
+        if acima:
+            print(f'{len(acima)} caso(s) acima da meta: {", ".join(acima)}')
+            return 1
+        return 0
+
+    regressoes = comparar(carregar(args.base), carregar(args.novo), args.limite)
+    if regressoes:
+        print(f'{len(regressoes)} regressão(ões) acima de {args.limite:.0%}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import os
+import sys
+import subprocess
+import tempfile
+import numpy as np
+from src.atmosfera import us_standard_atmosphere
+from src.funcoes_auxiliares import epsilon_k_razaoP2P1, mach_razao_area, empuxo
+from src.tubeira_sino import tubeira_sino, tubeira_sino_lote, angulos_paredes, gerar_tabela_pontos
+from src.caracteristicas import tubeira_caracteristicas
+from src.termoquimica import expansao_equilibrio, empuxo_equilibrio, tabela_termoquimica
+from src.transferencia_calor import perfil_bartz
+
+"""
+Casos de benchmark dos caminhos críticos.
+
+Cada caso é uma função que recebe o tamanho do problema e devolve a função
+a ser cronometrada (sem argumentos). A preparação dos dados fica fora da
+medição.
+"""
+
+k = 1.22
+P1 = 30e6
+T1 = 3300
+R = 518
+At = 0.126
+Rt_mm = np.sqrt(At / np.pi) * 1000
+
+
+def epsilon_escalar(n):
+    epsilons = np.geomspace(2, 500, n)
+
+    def caso():
+        for e in epsilons:
+            epsilon_k_razaoP2P1(e, k)
+    return caso
+
+
+def epsilon_lote(n):
+    epsilons = np.geomspace(2, 500, n)
+    return lambda: mach_razao_area(epsilons, k)
+
+
+def epsilon_tabelado(n):
+    epsilons = np.geomspace(2, 500, n)
+    epsilon_k_razaoP2P1(30, k, tabelado=True)   # constrói/carrega a tabela fora da medição
+    return lambda: epsilon_k_razaoP2P1(epsilons, k, tabelado=True)
+
+
+def atmosfera(n):
+    h = np.linspace(0, 119e3, n)
+    return lambda: us_standard_atmosphere(h)
+
+
+def atmosfera_tabelada(n):
+    h = np.linspace(0, 119e3, n)
+    us_standard_atmosphere(h[:1], tabelado=True)
+    return lambda: us_standard_atmosphere(h, tabelado=True)
+
+
+def tubeira(n):
+    epsilons = np.linspace(5, 150, n)
+
+    def caso():
+        for e in epsilons:
+            tubeira_sino(k, e, Rt_mm, 80)
+    return caso
+
+
+def caracteristicas(n):
+    return lambda: tubeira_caracteristicas(k, 60, Rt_mm, n)
+
+
+def angulos(n):
+    epsilons = np.linspace(5, 150, n)
+
+    def caso():
+        for e in epsilons:
+            angulos_paredes(e, Rt_mm, 80)
+    return caso
+
+
+def empuxo_altitude(n):
+    h = np.linspace(0, 119e3, n)
+    P3 = us_standard_atmosphere(h)["P"]
+    P2 = P1 * epsilon_k_razaoP2P1(60, k)
+    return lambda: empuxo(P1, At, k, P2, P3, 60)
+
+
+def empuxo_epsilons(n):
+    # Referência do equilíbrio: k congelado, n razões de expansão
+    epsilons = np.geomspace(2, 500, n)
+    return lambda: empuxo(P1, At, k, P1 * mach_razao_area(epsilons, k)[1], 101325.0, epsilons)
+
+
+def empuxo_equilibrio_epsilons(n):
+    epsilons = np.geomspace(2, 500, n)
+    empuxo_equilibrio(P1, T1, At, 30, 101325.0)     # tabela e trajetória fora da medição
+    return lambda: empuxo_equilibrio(P1, T1, At, epsilons, 101325.0)
+
+
+def expansao(n):
+    # n câmaras (P1 diferentes) integradas juntas
+    tabela_termoquimica()
+    P1s = np.linspace(5e6, 30e6, n)
+    return lambda: expansao_equilibrio(P1s, T1)
+
+
+def bartz(n):
+    # n projetos com 3000 estações cada, resolvidos juntos
+    epsilons = np.linspace(10, 150, n)
+    ks = np.full(n, k)
+    _, contornos = tubeira_sino_lote(ks, epsilons, np.full(n, Rt_mm), np.full(n, 80.0), 1000)
+    perfil_bartz(contornos[:1, :, 1], Rt_mm, k, P1, T1, R)     # constrói/carrega a tabela fora da medição
+    return lambda: perfil_bartz(contornos[..., 1], Rt_mm, ks, P1, T1, R)
+
+
+def importacao(n):
+    # Início de um processo que importa só o núcleo numérico (como os workers da varredura)
+    comando = [sys.executable, '-c', 'import src.funcoes_auxiliares, src.atmosfera, src.tubeira_sino']
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def caso():
+        for _ in range(n):
+            subprocess.run(comando, cwd=raiz, check=True)
+    return caso
+
+
+def exportacao_csv(n):
+    projeto = tubeira_sino(k, 60, Rt_mm, 80)
+    diretorio = tempfile.mkdtemp()
+    arquivo = os.path.join(diretorio, 'tubeira.csv')
+
+    def caso():
+        for _ in range(n):
+            gerar_tabela_pontos(projeto, arquivo)
+    return caso
+
+
+# (nome, função de preparação, tamanhos, tamanhos no modo rápido)
+CASOS = [
+    ('epsilon_k_razaoP2P1/escalar', epsilon_escalar, [100], [100]),
+    ('epsilon_k_razaoP2P1/lote', epsilon_lote, [10**3, 10**5], [10**3]),
+    ('epsilon_k_razaoP2P1/tabelado', epsilon_tabelado, [10**3, 10**5], [10**3]),
+    ('us_standard_atmosphere', atmosfera, [10**3, 10**4, 10**5, 10**6, 10**7], [10**3, 10**5]),
+    ('us_standard_atmosphere/tabelado', atmosfera_tabelada, [10**3, 10**4, 10**5, 10**6, 10**7], [10**3, 10**5]),
+    ('tubeira_sino', tubeira, [20], [5]),
+    ('tubeira_caracteristicas', caracteristicas, [100, 1000], [100]),
+    ('angulos_paredes', angulos, [100], [20]),
+    ('empuxo', empuxo_altitude, [10**3, 10**5, 10**6], [10**3]),
+    ('empuxo/epsilons', empuxo_epsilons, [10**3, 10**5], [10**3]),
+    ('empuxo_equilibrio/epsilons', empuxo_equilibrio_epsilons, [10**3, 10**5], [10**3]),
+    ('expansao_equilibrio', expansao, [1, 10], [1]),
+    ('perfil_bartz', bartz, [10, 100], [10]),
+    ('gerar_tabela_pontos', exportacao_csv, [5], [1]),
+    ('importacao_nucleo', importacao, [5], [1]),
+]
+
+# Metas de tempo (mediana por chamada, em segundos): executar falha se
+# algum desses casos ficar acima da meta
+METAS = {
+    'tubeira_caracteristicas[n=1000]': 1.0,
+}
@@ -1,189 +1,465 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
+from src import cache, instrumentacao
+from src.instrumentacao import etapa
 from src.funcoes_auxiliares import epsilon_k_razaoP2P1, empuxo
 from src.atmosfera import us_standard_atmosphere
 from src.tubeira_sino import gerar_tabela_pontos, plotar_completo, tubeira_sino
+from src.malha import exportar_malha
+from src.separacao import analisar_separacao
+from src.expansao_variavel import comparar_envelope
+from src.termoquimica import pressao_saida_equilibrio, empuxo_equilibrio, vazao_massica_equilibrio
+from src.pipeline import Grafo
 
 # Dados do motor X1
-k = 1.22                    # Razão de calores específicos
-R = 518                     # Constante específica do gás [J/kg*K]
-F = 2.3 * 10**6             # Empuxo máximo (nível do mar) [N]
-mdot = 1200                 # Vazão mássica [kg/s]
-T1 = 3300                   # Temperatura na câmara de combustão [K]
-P1 = 30 * 10**6             # Pressão na câmara de combustão [Pa]
-Isp = 330                   # Impulso específico (nível do mar) [s]
-At = 0.126                  # Área da garganta [m^2]]
-Rt = np.sqrt(At/np.pi)      # Cálculo do raio da garganta
-g = 9.80665                 # Aceleração da gravidade [m/s^2]
-
-# Altitudes de operação
-Ha = 0
-Hb = 30e3
-Hc = 80e3
-Hd = 120e3
-
-# Razões de expansão para cada estágio de voo
-Ea = 30                     # Razão baixa para compensar alta pressão atmosférica
-Eb = 60                    # Razão intermediária
-Ec = 150                    # Razão alta justificada pela presença no vácuo
-
-# Divisão em estágios
-h1 = np.linspace(Ha, Hb)                # Fase 1
-h2 = np.linspace(Hb, Hc)                # Fase 2
-h3 = np.linspace(Hc, Hd, 100)      # Re-entrada
-
-# Pressões de saída de acordo com a razão de pressões
-P2a = P1 * epsilon_k_razaoP2P1(Ea, k)
-P2b = P1 * epsilon_k_razaoP2P1(Eb, k)
-P2c = P1 * epsilon_k_razaoP2P1(Ec, k)
-
-# Pressões atmosféricas para as altitudes de cada estágio de voo
-atm1 = us_standard_atmosphere(h1)
-atm2 = us_standard_atmosphere(h2)
-atm3 = us_standard_atmosphere(h3)
-
-P3_1 = atm1["P"]
-P3_2 = atm2["P"]
-P3_3 = atm3["P"]
-
-# Cálculo do empuxo para cada estágio de voo
-F1 = empuxo(P1, At, k, P2a, P3_1, Ea)
-F2 = empuxo(P1, At, k, P2b, P3_2, Eb)
-F3 = empuxo(P1, At, k, P2c, P3_3, Ec)
-
-# Concatenando as arrays para plot
-h = np.concatenate((h1, h2, h3))
-F = np.concatenate((F1, F2, F3))
-
-# Concatenação dos dados para plots combinados
-h_total = np.concatenate((h1, h2, h3))
-F_total = np.concatenate((F1, F2, F3))
-P_atm_total = np.concatenate((P3_1, P3_2, P3_3))
-
-# Plot das tubeiras
-# Comprimento da tubeira (percentual)
-l_camara_perc = 80
-
-# Estágio 01
-Rt_mm = Rt * 1000
-angulos_a, contorno_a = tubeira_sino(k, Ea, Rt_mm, l_camara_perc)
-plotar_completo(f'Tubeira estágio 1 (Razão de expansão = {Ea})', Rt, angulos_a, contorno_a, Ea)
-gerar_tabela_pontos(contorno_a, 'tubeira_estagio_1.csv')
-
-# Estágio 02
-angulos_b, contorno_b = tubeira_sino(k, Eb, Rt_mm, l_camara_perc)
-plotar_completo(f'Tubeira estágio 2 (Razão de expansão = {Eb})', Rt, angulos_b, contorno_b, Eb)
-gerar_tabela_pontos(contorno_b, 'tubeira_estagio_2.csv')
-
-# Estágio 03
-angulos_c, contorno_c = tubeira_sino(k, Ec, Rt_mm, l_camara_perc)
-plotar_completo(f'Tubeira estágio 3 (Razão de expansão = {Ec})', Rt, angulos_c, contorno_c, Ec)
-gerar_tabela_pontos(contorno_c, 'tubeira_estagio_3.csv')
-
-# Impulso específico para cada estágio
-Isp1 = F1 / (mdot * g)
-Isp2 = F2 / (mdot * g)
-Isp3 = F3 / (mdot * g)
-Isp_total = F_total / (mdot * g)
-
-# Plot dos resultados
-# Empuxo vs Altitude
-plt.figure(figsize=(10, 6))
-plt.plot(h / 1e3, F / 1e6, label='Empuxo')
-plt.plot(h1 / 1e3, F1 / 1e6, label=f'Estágio 1 (E={Ea})')
-plt.plot(h2 / 1e3, F2 / 1e6, label=f'Estágio 2 (E={Eb})')
-plt.plot(h3 / 1e3, F3 / 1e6, label=f'Estágio 3 (E={Ec})')
-plt.xlabel('Altitude (km)')
-plt.ylabel('Empuxo (MN)')
-plt.title('Empuxo do motor vs. Altitude')
-plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-plt.legend()
-plt.show()
-
-# Pressão de saída da tubeira vs Pressão ambiente
-plt.figure(figsize=(12, 7))
-plt.plot(h_total / 1e3, P_atm_total, label='Pressão atmosférica (ambiente)', color='k', linestyle='--')
-plt.plot(h1 / 1e3, np.full_like(h1, P2a), label=f'Pressão de saída estágio 1 (P_exit = {P2a / 1e3:.1f} kPa)')
-plt.plot(h2 / 1e3, np.full_like(h2, P2b), label=f'Pressão de saída estágio 2 (P_exit = {P2b / 1e3:.1f} kPa)')
-plt.plot(h3 / 1e3, np.full_like(h3, P2c), label=f'Pressão de saída estágio 3 (P_exit = {P2c / 1e3:.1f} kPa)')
-plt.yscale('log')
-plt.xlabel('Altitude (km)', fontsize=12)
-plt.ylabel('Pressão (Pa)', fontsize=12)
-plt.title('Comparação entre pressão de saída da tubeira vs. Pressão ambiente', fontsize=14)
-plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-plt.legend()
-plt.show()
-
-# Impulso específico vs Altitude
-plt.figure(figsize=(10, 6))
-plt.plot(h_total / 1e3, Isp_total, color='k', linewidth=2.5, label='Curva de desempenho')
-plt.plot(h1 / 1e3, Isp1, label=f'Estágio 1 (E={Ea})')
-plt.plot(h2 / 1e3, Isp2, label=f'Estágio 2 (E={Eb})')
-plt.plot(h3 / 1e3, Isp3, label=f'Estágio 3 (E={Ec})')
-plt.xlabel('Altitude (km)')
-plt.ylabel('Impulso específico (s)')
-plt.title('Impulso específico vs. Altitude')
-plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-plt.legend()
-plt.show()
-
-# Análise de pressão para o primeiro estágio
-plt.figure(figsize=(12, 7))
-plt.title(f'Análise de pressão para ε = {Ea}')
-p_exit_1 = np.full_like(h1, P2a)
-plt.plot(h1 / 1e3, P3_1, label='Pressão ambiente (Pa)', color='k', linestyle='--')
-plt.plot(h1 / 1e3, p_exit_1, label=f'Pressão saída (ε={Ea})')
-plt.fill_between(h1 / 1e3, p_exit_1, P3_1, where=p_exit_1 > P3_1, color='skyblue', alpha=0.6, label='Sub-expandido')
-plt.fill_between(h1 / 1e3, p_exit_1, P3_1, where=p_exit_1 < P3_1, color='salmon', alpha=0.6, label='Super-expandido')
-plt.ylabel('Pressão (Pa)')
-plt.xlabel('Altitude (km)')
-plt.yscale('log')
-plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-plt.legend()
-plt.show()
-
-# Análise de pressão para o segundo estágio
-plt.figure(figsize=(12, 7))
-plt.title(f'Análise de pressão para ε = {Eb}')
-p_exit_2 = np.full_like(h2, P2b)
-plt.plot(h2 / 1e3, P3_2, label='Pressão ambiente (Pa)', color='k', linestyle='--')
-plt.plot(h2 / 1e3, p_exit_2, label=f'Pressão saída (ε={Eb})', color='darkorange')
-plt.fill_between(h2 / 1e3, p_exit_2, P3_2, where=p_exit_2 > P3_2, color='skyblue', alpha=0.6)
-plt.fill_between(h2 / 1e3, p_exit_2, P3_2, where=p_exit_2 < P3_2, color='salmon', alpha=0.6)
-plt.ylabel('Pressão (Pa)')
-plt.xlabel('Altitude (km)')
-plt.yscale('log')
-plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-plt.legend()
-plt.show()
-
-# Análise de pressão para o terceiro estágio
-plt.figure(figsize=(12, 7))
-plt.title(f'Análise de pressão para ε = {Ec}')
-p_exit_3 = np.full_like(h3, P2c)
-plt.plot(h3 / 1e3, P3_3, label='Pressão ambiente (Pa)', color='k', linestyle='--')
-plt.plot(h3 / 1e3, p_exit_3, label=f'Pressão saída (ε={Ec})', color='green')
-plt.fill_between(h3 / 1e3, p_exit_3, P3_3, where=p_exit_3 > P3_3, color='skyblue', alpha=0.6)
-plt.fill_between(h3 / 1e3, p_exit_3, P3_3, where=p_exit_3 < P3_3, color='salmon', alpha=0.6)
-plt.ylabel('Pressão (Pa)')
-plt.xlabel('Altitude (km)')
-plt.yscale('log')
-plt.grid(True, which='both', linestyle='--', linewidth=0.5)
-plt.legend()
-plt.show()
-
-# Encontra a curva de empuxo "ótima" (o máximo de cada ponto)
-F_tubeira_A_em_h_total = empuxo(P1, At, k, P2a, P_atm_total, Ea)
-F_tubeira_B_em_h_total = empuxo(P1, At, k, P2b, P_atm_total, Eb)
-F_tubeira_C_em_h_total = empuxo(P1, At, k, P2c, P_atm_total, Ec)
-plt.plot(h_total / 1e3, F_tubeira_A_em_h_total / 1e6, linestyle='--', label=f'Desempenho da tubeira 1 (ε={Ea})')
-plt.plot(h_total / 1e3, F_tubeira_B_em_h_total / 1e6, linestyle='--', label=f'Desempenho da tubeira 2 (ε={Eb})')
-plt.plot(h_total / 1e3, F_tubeira_C_em_h_total / 1e6, linestyle='--', label=f'Desempenho da tubeira 3 (ε={Ec})')
-F_otimo = np.maximum.reduce([F_tubeira_A_em_h_total, F_tubeira_B_em_h_total, F_tubeira_C_em_h_total])
-plt.plot(h_total / 1e3, F_otimo / 1e6, color='k', linewidth=2.5, label='Curva de empuxo ótima envelopada')
-plt.title('Análise de desempenho para otimização das trocas', fontsize=16)
-plt.xlabel('Altitude (km)')
-plt.ylabel('Empuxo (MN)')
-plt.grid(True, which='both')
-plt.legend()
-plt.show()
\ No newline at end of file
+PARAMETROS_X1 = {
+    "k": 1.22,                  # Razão de calores específicos
+    "R": 518,                   # Constante específica do gás [J/kg*K]
+    "F": 2.3 * 10**6,           # Empuxo máximo (nível do mar) [N]
+    "mdot": 1200,               # Vazão mássica [kg/s] (com razao_mistura, Isp usa a vazão em equilíbrio)
+    "T1": 3300,                 # Temperatura na câmara de combustão [K]
+    "P1": 30 * 10**6,           # Pressão na câmara de combustão [Pa]
+    "Isp": 330,                 # Impulso específico (nível do mar) [s]
+    "At": 0.126,                # Área da garganta [m^2]]
+
+    # Altitudes de operação
+    "Ha": 0,
+    "Hb": 30e3,
+    "Hc": 80e3,
+    "Hd": 120e3,
+
+    # Razões de expansão para cada estágio de voo
+    "Ea": 30,                   # Razão baixa para compensar alta pressão atmosférica
+    "Eb": 60,                   # Razão intermediária
+    "Ec": 150,                  # Razão alta justificada pela presença no vácuo
+
+    # Comprimento da tubeira (percentual)
+    "l_camara_perc": 80,
+
+    # Desvio máximo de corda nos pontos do contorno [mm] (None: 100 pontos por seção)
+    "tolerancia_contorno": None,
+
+    # Cronograma epsilon(h) da tubeira de expansão variável comparada às fixas:
+    # [[altitudes], [razões de expansão]] (None: epsilon_vs_altitude)
+    "cronograma_epsilon": None,
+
+    # Razão de mistura O/F (LOX/LH2) para pressão de saída e empuxo com equilíbrio
+    # químico deslocado na expansão (None: k e R congelados)
+    "razao_mistura": None,
+}
+g = 9.80665                     # Aceleração da gravidade [m/s^2]
+
+
+def carregar_parametros(arquivo=None):
+    """
+    Parâmetros do motor: os valores do X1, atualizados pelo arquivo JSON
+    informado (somente as chaves presentes no arquivo são alteradas).
+    """
+    parametros = dict(PARAMETROS_X1)
+    if arquivo:
+        with open(arquivo) as f:
+            config = json.load(f)
+        desconhecidas = set(config) - set(parametros)
+        if desconhecidas:
+            raise ValueError(f"Parâmetros desconhecidos no arquivo de configuração: {sorted(desconhecidas)}")
+        parametros.update(config)
+    return parametros
+
+
+# Estágios de voo: (razão de expansão, altitude inicial, altitude final, pontos)
+ESTAGIOS = (("Ea", "Ha", "Hb", 50), ("Eb", "Hb", "Hc", 50), ("Ec", "Hc", "Hd", 100))
+
+# Nós que juntam os três estágios (tuplas com os valores de cada um)
+AGREGADOS = ("h", "P2", "P3", "F", "Isp", "F_em_h_total", "separacao")
+
+# Resultados de calcular(): chave do dicionário -> nó do grafo
+RESULTADOS = {
+    "Rt": "Rt", "E": "E",
+    **{nome: f"{nome}_estagios" for nome in AGREGADOS},
+    "h_total": "h_total", "F_total": "F_total", "Isp_total": "Isp_total", "P_atm_total": "P_atm_total",
+    "tubeiras": "tubeiras", "expansao_variavel": "expansao_variavel",
+}
+
+
+def _concatenar(*arrays):
+    return np.concatenate(arrays)
+
+
+def construir_grafo(p):
+    """
+    Grafo de dependências (src.pipeline) dos cálculos do motor, das
+    exportações e das figuras. Cada estágio i tem os nós h_i, P2_i (pressão
+    de saída), P3_i (atmosfera), F_i, Isp_i, tubeira_i, F_em_h_total_i,
+    separacao_i, tabela_i e malha_i; os nós <nome>_estagios (AGREGADOS) juntam
+    os estágios e figura_<nome> salva cada figura de FIGURAS.
+
+    Além dos parâmetros do motor, o grafo tem diretorio, formatos e malha,
+    usados pelas exportações e figuras. Para recalcular só o que mudou,
+    altere os parâmetros com grafo.atualizar(...) e peça os nós de novo.
+    """
+    grafo = Grafo()
+    grafo.atualizar(p)
+    grafo.atualizar({"diretorio": ".", "formatos": ("png",), "malha": None})
+
+    grafo.no("Rt", lambda At: np.sqrt(At/np.pi), ["At"])       # Raio da garganta
+    # Vazão mássica usada no Isp (a mesma do cálculo do empuxo)
+    grafo.no("vazao", _vazao_massica, ["P1", "T1", "At", "mdot", "razao_mistura"])
+    grafo.no("E", lambda *E: E, [E for E, *_ in ESTAGIOS])
+
+    for i, (E, inicio, fim, n) in enumerate(ESTAGIOS, start=1):
+        # Altitudes do estágio
+        grafo.no(f"h_{i}", lambda a, b, n=n: np.linspace(a, b, n), [inicio, fim])
+        # Pressão de saída de acordo com a razão de pressões
+        grafo.no(f"P2_{i}", _pressao_saida, ["P1", "T1", "k", E, "razao_mistura"], etapa='razao_pressoes')
+        # Pressão atmosférica nas altitudes do estágio
+        grafo.no(f"P3_{i}", lambda h: us_standard_atmosphere(h)["P"], [f"h_{i}"], etapa='atmosfera')
+        grafo.no(f"F_{i}", _empuxo, ["P1", "T1", "At", "k", f"P2_{i}", f"P3_{i}", E, "razao_mistura"],
+                 etapa='empuxo')
+        grafo.no(f"Isp_{i}", lambda F, mdot: F / (mdot * g), [f"F_{i}", "vazao"], etapa='empuxo')
+        # Contorno da tubeira
+        grafo.no(f"tubeira_{i}", lambda k, E, Rt, l, tol: tubeira_sino(k, E, Rt * 1000, l, tol),
+                 ["k", E, "Rt", "l_camara_perc", "tolerancia_contorno"], etapa='contorno')
+        # Desempenho da tubeira em todo o perfil de altitudes
+        grafo.no(f"F_em_h_total_{i}", _empuxo,
+                 ["P1", "T1", "At", "k", f"P2_{i}", "P_atm_total", E, "razao_mistura"], etapa='empuxo')
+        # Separação do escoamento (critério de Schmucker)
+        grafo.no(f"separacao_{i}", analisar_separacao, ["P1", "At", "k", E, f"P3_{i}"], etapa='separacao')
+        # Tabela de pontos e superfície para o CAD
+        grafo.no(f"tabela_{i}", partial(_exportar_tabela, i), [f"tubeira_{i}", "diretorio"], etapa='exportacao')
+        grafo.no(f"malha_{i}", partial(_exportar_malha, i), [f"tubeira_{i}", "diretorio", "malha"], etapa='malha')
+
+    for nome in AGREGADOS:
+        grafo.no(f"{nome}_estagios", lambda *estagios: estagios, [f"{nome}_{i}" for i in (1, 2, 3)])
+    grafo.no("tubeiras", lambda *tubeiras: list(tubeiras), [f"tubeira_{i}" for i in (1, 2, 3)])
+
+    # Concatenação dos dados para plots combinados
+    grafo.no("h_total", _concatenar, ["h_1", "h_2", "h_3"])
+    grafo.no("F_total", _concatenar, ["F_1", "F_2", "F_3"])
+    grafo.no("P_atm_total", _concatenar, ["P3_1", "P3_2", "P3_3"])
+    grafo.no("Isp_total", _concatenar, ["Isp_1", "Isp_2", "Isp_3"])
+
+    # Tubeira de expansão variável vs. envelope das tubeiras fixas
+    grafo.no("expansao_variavel", _expansao_variavel,
+             ["h_total", "P_atm_total", "P1", "T1", "At", "k", "vazao", "E", "cronograma_epsilon", "razao_mistura"],
+             etapa='expansao_variavel')
+
+    for nome, funcao, args, entradas in FIGURAS:
+        grafo.no(f"figura_{nome}", partial(_renderizar, nome, funcao, args, tuple(entradas)),
+                 ["diretorio", "formatos", *entradas.values()], etapa='graficos')
+    return grafo
+
+
+def _pressao_saida(P1, T1, k, E, razao_mistura):
+    # Pressão de saída de acordo com a razão de pressões (k congelado ou equilíbrio deslocado)
+    if razao_mistura is None:
+        return P1 * epsilon_k_razaoP2P1(E, k)
+    return pressao_saida_equilibrio(P1, T1, E, razao_mistura)
+
+
+def _vazao_massica(P1, T1, At, mdot, razao_mistura):
+    # Com equilíbrio deslocado o empuxo usa a vazão da garganta em equilíbrio (G_t * At)
+    if razao_mistura is None:
+        return mdot
+    return vazao_massica_equilibrio(P1, T1, At, razao_mistura)
+
+
+def _empuxo(P1, T1, At, k, P2, P_ambiente, E, razao_mistura):
+    if razao_mistura is None:
+        return empuxo(P1, At, k, P2, P_ambiente, E)
+    return empuxo_equilibrio(P1, T1, At, E, P_ambiente, razao_mistura)
+
+
+def _expansao_variavel(h, P_ambiente, P1, T1, At, k, mdot, E, cronograma, razao_mistura):
+    # Mesmo modelo (k congelado ou equilíbrio deslocado) e vazão dos estágios
+    if cronograma is None:
+        return comparar_envelope(h, P1, At, k, mdot, E, P_ambiente=P_ambiente, T1=T1, razao_mistura=razao_mistura)
+    return comparar_envelope(h, P1, At, k, mdot, E, cronograma, P_ambiente, T1=T1, razao_mistura=razao_mistura)
+
+
+def calcular(p, grafo=None):
+    """
+    Executa todos os cálculos do motor e das tubeiras, sem gerar figuras.
+    Retorna um dicionário com os resultados usados nos gráficos.
+
+    Com um grafo de construir_grafo, os parâmetros são atualizados nele e só
+    os nós afetados pelas alterações são recalculados.
+    """
+    if grafo is None:
+        grafo = construir_grafo(p)
+    else:
+        grafo.atualizar(p)
+    resultados = dict(zip(RESULTADOS, grafo.valores(RESULTADOS.values())))
+    resultados["parametros"] = p
+    return resultados
+
+
+def _exportar_tabela(estagio, tubeira, diretorio):
+    arquivo = os.path.join(diretorio, f'tubeira_estagio_{estagio}.csv')
+    gerar_tabela_pontos(tubeira, arquivo, dataframe=False)
+    return arquivo
+
+
+def _exportar_malha(estagio, tubeira, diretorio, formato, **kwargs):
+    if not formato:
+        return None
+    arquivo = os.path.join(diretorio, f'tubeira_estagio_{estagio}.{formato}')
+    exportar_malha(tubeira, arquivo, **kwargs)
+    return arquivo
+
+
+def figura_tubeira(r, estagio):
+    E = r["E"]
+    return plotar_completo(f'Tubeira estágio {estagio + 1} (Razão de expansão = {E})', r["tubeira"], mostrar=False)
+
+
+def figura_empuxo(r):
+    # Empuxo vs Altitude
+    Ea, Eb, Ec = r["E"]
+    h1, h2, h3 = r["h"]
+    F1, F2, F3 = r["F"]
+    fig = plt.figure(figsize=(10, 6))
+    plt.plot(r["h_total"] / 1e3, r["F_total"] / 1e6, label='Empuxo')
+    plt.plot(h1 / 1e3, F1 / 1e6, label=f'Estágio 1 (E={Ea})')
+    plt.plot(h2 / 1e3, F2 / 1e6, label=f'Estágio 2 (E={Eb})')
+    plt.plot(h3 / 1e3, F3 / 1e6, label=f'Estágio 3 (E={Ec})')
+    plt.xlabel('Altitude (km)')
+    plt.ylabel('Empuxo (MN)')
+    plt.title('Empuxo do motor vs. Altitude')
+    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+    plt.legend()
+    return fig
+
+
+def figura_pressao_saida(r):
+    # Pressão de saída da tubeira vs Pressão ambiente
+    h1, h2, h3 = r["h"]
+    P2a, P2b, P2c = r["P2"]
+    fig = plt.figure(figsize=(12, 7))
+    plt.plot(r["h_total"] / 1e3, r["P_atm_total"], label='Pressão atmosférica (ambiente)', color='k', linestyle='--')
+    plt.plot(h1 / 1e3, np.full_like(h1, P2a), label=f'Pressão de saída estágio 1 (P_exit = {P2a / 1e3:.1f} kPa)')
+    plt.plot(h2 / 1e3, np.full_like(h2, P2b), label=f'Pressão de saída estágio 2 (P_exit = {P2b / 1e3:.1f} kPa)')
+    plt.plot(h3 / 1e3, np.full_like(h3, P2c), label=f'Pressão de saída estágio 3 (P_exit = {P2c / 1e3:.1f} kPa)')
+    plt.yscale('log')
+    plt.xlabel('Altitude (km)', fontsize=12)
+    plt.ylabel('Pressão (Pa)', fontsize=12)
+    plt.title('Comparação entre pressão de saída da tubeira vs. Pressão ambiente', fontsize=14)
+    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+    plt.legend()
+    return fig
+
+
+def figura_isp(r):
+    # Impulso específico vs Altitude
+    Ea, Eb, Ec = r["E"]
+    h1, h2, h3 = r["h"]
+    Isp1, Isp2, Isp3 = r["Isp"]
+    fig = plt.figure(figsize=(10, 6))
+    plt.plot(r["h_total"] / 1e3, r["Isp_total"], color='k', linewidth=2.5, label='Curva de desempenho')
+    plt.plot(h1 / 1e3, Isp1, label=f'Estágio 1 (E={Ea})')
+    plt.plot(h2 / 1e3, Isp2, label=f'Estágio 2 (E={Eb})')
+    plt.plot(h3 / 1e3, Isp3, label=f'Estágio 3 (E={Ec})')
+    plt.xlabel('Altitude (km)')
+    plt.ylabel('Impulso específico (s)')
+    plt.title('Impulso específico vs. Altitude')
+    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+    plt.legend()
+    return fig
+
+
+def figura_analise_pressao(r, estagio):
+    # Análise de pressão para um estágio (sub e super-expansão)
+    E = r["E"]
+    h = r["h"]
+    P3 = r["P3"]
+    cor = (None, 'darkorange', 'green')[estagio]
+    fig = plt.figure(figsize=(12, 7))
+    plt.title(f'Análise de pressão para ε = {E}')
+    p_exit = np.full_like(h, r["P2"])
+    plt.plot(h / 1e3, P3, label='Pressão ambiente (Pa)', color='k', linestyle='--')
+    plt.plot(h / 1e3, p_exit, label=f'Pressão saída (ε={E})', color=cor)
+    if estagio == 0:
+        plt.fill_between(h / 1e3, p_exit, P3, where=p_exit > P3, color='skyblue', alpha=0.6, label='Sub-expandido')
+        plt.fill_between(h / 1e3, p_exit, P3, where=p_exit < P3, color='salmon', alpha=0.6, label='Super-expandido')
+    else:
+        plt.fill_between(h / 1e3, p_exit, P3, where=p_exit > P3, color='skyblue', alpha=0.6)
+        plt.fill_between(h / 1e3, p_exit, P3, where=p_exit < P3, color='salmon', alpha=0.6)
+    separado = r["separacao"]["separado"]
+    if np.any(separado):
+        plt.fill_between(h / 1e3, p_exit, P3, where=separado, facecolor='none', edgecolor='red', hatch='//',
+                         label='Separação na tubeira (Schmucker)')
+    plt.ylabel('Pressão (Pa)')
+    plt.xlabel('Altitude (km)')
+    plt.yscale('log')
+    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+    plt.legend()
+    return fig
+
+
+def figura_envelope(r):
+    # Encontra a curva de empuxo "ótima" (o máximo de cada ponto)
+    h_total = r["h_total"]
+    fig = plt.figure()
+    for i, (F_tubeira, E) in enumerate(zip(r["F_em_h_total"], r["E"]), 1):
+        plt.plot(h_total / 1e3, F_tubeira / 1e6, linestyle='--', label=f'Desempenho da tubeira {i} (ε={E})')
+    F_otimo = np.maximum.reduce(r["F_em_h_total"])
+    plt.plot(h_total / 1e3, F_otimo / 1e6, color='k', linewidth=2.5, label='Curva de empuxo ótima envelopada')
+    plt.title('Análise de desempenho para otimização das trocas', fontsize=16)
+    plt.xlabel('Altitude (km)')
+    plt.ylabel('Empuxo (MN)')
+    plt.grid(True, which='both')
+    plt.legend()
+    return fig
+
+
+def figura_expansao_variavel(r):
+    # Empuxo da tubeira de expansão variável vs. envelope das tubeiras fixas
+    v = r["expansao_variavel"]
+    h = r["h_total"] / 1e3
+    fig, (ax_F, ax_eps) = plt.subplots(2, 1, figsize=(10, 8), sharex=True, gridspec_kw={'height_ratios': [2, 1]})
+    ax_F.plot(h, v["F_envelope"] / 1e6, color='k', linewidth=2.5, label='Envelope das tubeiras fixas')
+    ax_F.plot(h, v["F"] / 1e6, color='tab:purple', linewidth=2, label='Expansão variável ε(h)')
+    ax_F.set_ylabel('Empuxo (MN)')
+    ax_F.set_title('Tubeira de expansão variável vs. tubeiras fixas')
+    ax_F.grid(True, which='both', linestyle='--', linewidth=0.5)
+    ax_F.legend()
+    ax_eps.plot(h, v["epsilon"], color='tab:purple', label='ε(h)')
+    ax_eps.plot(h, np.asarray(r["E"], dtype=float)[v["indice_envelope"]], color='k', linestyle='--',
+                label='ε da tubeira fixa do envelope')
+    ax_eps.set_xlabel('Altitude (km)')
+    ax_eps.set_ylabel('Razão de expansão')
+    ax_eps.grid(True, which='both', linestyle='--', linewidth=0.5)
+    ax_eps.legend()
+    return fig
+
+
+def _entradas_estagio(i, *nomes):
+    # Chaves de r das figuras de um estágio -> nós do grafo desse estágio
+    entradas = {nome: f"{nome}_{i}" for nome in nomes}
+    entradas["E"] = ESTAGIOS[i - 1][0]
+    return entradas
+
+
+def _entradas_globais(*nomes):
+    return {nome: RESULTADOS[nome] for nome in nomes}
+
+
+# Figuras na ordem de exibição: (nome do arquivo, função, argumentos extras,
+# entradas). As entradas associam as chaves do dicionário r recebido pela
+# função aos nós do grafo de que a figura depende.
+FIGURAS = [
+    *((f'tubeira_estagio_{i}', figura_tubeira, (i - 1,), _entradas_estagio(i, "tubeira"))
+      for i in (1, 2, 3)),
+    ('empuxo_altitude', figura_empuxo, (), _entradas_globais("E", "h", "F", "h_total", "F_total")),
+    ('pressao_saida_ambiente', figura_pressao_saida, (), _entradas_globais("h", "P2", "h_total", "P_atm_total")),
+    ('isp_altitude', figura_isp, (), _entradas_globais("E", "h", "Isp", "h_total", "Isp_total")),
+    *((f'analise_pressao_estagio_{i}', figura_analise_pressao, (i - 1,),
+       _entradas_estagio(i, "h", "P2", "P3", "separacao"))
+      for i in (1, 2, 3)),
+    ('envelope_empuxo', figura_envelope, (), _entradas_globais("E", "h_total", "F_em_h_total")),
+    ('expansao_variavel', figura_expansao_variavel, (), _entradas_globais("E", "h_total", "expansao_variavel")),
+]
+
+
+def _iniciar_processo():
+    # Processos de renderização usam sempre o backend não interativo
+    matplotlib.use('Agg')
+
+
+def _renderizar(nome, funcao, args, chaves, diretorio, formatos, *valores):
+    # Função dos nós figura_<nome>: monta r com as entradas da figura e salva
+    fig = funcao(dict(zip(chaves, valores)), *args)
+    arquivos = []
+    for formato in formatos:
+        arquivo = os.path.join(diretorio, f'{nome}.{formato}')
+        fig.savefig(arquivo)
+        arquivos.append(arquivo)
+    plt.close(fig)
+    return arquivos
+
+
+def executar_interativo(p, grafo=None):
+    if grafo is None:
+        grafo = construir_grafo(p)
+    else:
+        grafo.atualizar(p)
+    grafo.valores([f"tabela_{i}" for i in (1, 2, 3)])
+    for _, funcao, args, entradas in FIGURAS:
+        r = {chave: grafo.valor(no) for chave, no in entradas.items()}
+        with etapa('graficos'):
+            funcao(r, *args)
+        plt.show()
+
+
+def executar_lote(p, diretorio, formatos=('png',), processos=None, malha=None, grafo=None):
+    """
+    Modo sem interface: calcula tudo, exporta as tabelas (e as malhas, se
+    malha for 'stl' ou 'obj') e salva as figuras em arquivos, renderizando-as
+    em paralelo com o backend Agg.
+
+    Com um grafo de construir_grafo reaproveitado entre chamadas, só são
+    recalculados os nós, tabelas e figuras que dependem de parâmetros
+    alterados desde a chamada anterior.
+    """
+    plt.switch_backend('Agg')
+    os.makedirs(diretorio, exist_ok=True)
+
+    if grafo is None:
+        grafo = construir_grafo(p)
+    else:
+        grafo.atualizar(p)
+    grafo.atualizar({"diretorio": diretorio, "formatos": tuple(formatos), "malha": malha})
+
+    grafo.valores([f"tabela_{i}" for i in (1, 2, 3)])
+    if malha:
+        grafo.valores([f"malha_{i}" for i in (1, 2, 3)])
+
+    figuras = [f"figura_{nome}" for nome, *_ in FIGURAS]
+    # Só as figuras desatualizadas vão para os processos (pendentes() já
+    # calcula as entradas delas aqui)
+    if processos == 1 or len(grafo.pendentes(figuras)) <= 1:
+        arquivos = grafo.valores(figuras)
+    else:
+        with etapa('graficos'), ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo) as executor:
+            arquivos = grafo.valores(figuras, executor.map)
+    return [a for lista in arquivos for a in lista]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Projeto das tubeiras do motor X1')
+    parser.add_argument('--config', help='arquivo JSON com parâmetros do motor (padrão: dados do X1)')
+    parser.add_argument('--saida', help='modo em lote: diretório onde salvar tabelas e figuras, sem abrir janelas')
+    parser.add_argument('--formatos', nargs='+', default=['png'], choices=['png', 'svg', 'pdf'],
+                        help='formatos das figuras no modo em lote')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='processos para renderizar as figuras (padrão: todos os núcleos)')
+    parser.add_argument('--malha', choices=['stl', 'obj'],
+                        help='no modo em lote, exporta também a superfície de cada tubeira nesse formato')
+    parser.add_argument('--cache', nargs='?', const='', metavar='DIRETORIO',
+                        help='reaproveita contornos, razões de pressão e perfis atmosféricos já calculados '
+                             '(guardados em DIRETORIO, padrão .cache/resultados)')
+    parser.add_argument('--instrumentar', nargs='?', const='', metavar='ARQUIVO_JSON',
+                        help='mostra contadores dos solvers e tempos das etapas (e salva em JSON, se informado)')
+    args = parser.parse_args()
+
+    if args.instrumentar is not None:
+        instrumentacao.ativar()
+    if args.cache is not None:
+        cache.ativar(args.cache or None)
+
+    parametros = carregar_parametros(args.config)
+    if args.saida:
+        for arquivo in executar_lote(parametros, args.saida, tuple(args.formatos), args.processos, args.malha):
+            print(arquivo)
+    else:
+        executar_interativo(parametros)
+
+    if args.instrumentar is not None:
+        print(instrumentacao.tabela_resumo())
+        if args.instrumentar:
+            instrumentacao.salvar_json(args.instrumentar)
@@ -1,57 +1,140 @@
+from functools import lru_cache
 import numpy as np
-def us_standard_atmosphere(h):
+from src.cache import em_cache
+
+# Definição das camadas: (h_base [m], T_base [K], gradiente L [K/m])
+camadas = [
+    (0, 288.15, -0.0065),  # Troposfera
+    (11000, 216.65, 0.0),  # Tropopausa
+    (20000, 216.65, 0.001),  # Estratosfera baixa
+    (32000, 228.65, 0.0028),  # Estratosfera alta
+    (47000, 270.65, 0.0),  # Estratopausa
+    (51000, 270.65, -0.0028),  # Mesosfera baixa
+    (71000, 214.65, -0.002),  # Mesosfera alta
+    (84852, 186.95, 0.0)  # até ~86 km (acima disso extrapola exponencialmente)
+]
+H_TOPO = 120000.0
+
+# Constantes
+R = 287.05
+g0 = 9.80665
+P0 = 101325.0  # pressão ao nível do mar
+
+H_BASE = np.array([c[0] for c in camadas], dtype=float)
+T_BASE = np.array([c[1] for c in camadas])
+L_CAMADA = np.array([c[2] for c in camadas])
+
+
+def _pressoes_base():
+    # Pressão na base de cada camada, calculada uma única vez na importação
+    P_base = [P0]
+    for i, (h_b, T_b, L) in enumerate(camadas[:-1]):
+        h_next, T_next, _ = camadas[i + 1]
+        if L == 0.0:
+            P_base.append(P_base[-1] * np.exp(-g0 * (h_next - h_b) / (R * T_b)))
+        else:
+            P_base.append(P_base[-1] * (T_next / T_b) ** (-g0 / (R * L)))
+    return np.array(P_base)
+
+
+P_BASE = _pressoes_base()
+
+# Para L != 0: ln(P/Pb) = -g0/(R*L) * ln(T/Tb); para L = 0: ln(P/Pb) = -g0/(R*Tb) * dh
+ISOTERMICA = L_CAMADA == 0.0
+_L_SEGURO = np.where(ISOTERMICA, 1.0, L_CAMADA)
+
+
+def _camada(h):
+    i = np.searchsorted(H_BASE, h, side='right') - 1
+    return np.clip(i, 0, len(camadas) - 1, out=i)
+
+
+def _modelo(h, i, T, P):
+    # Avalia T e P com os pontos já atribuídos às camadas i
+    T_b = T_BASE[i]
+    dh = h - H_BASE[i]
+
+    np.multiply(L_CAMADA[i], dh, out=T)
+    T += T_b
+
+    # ln(P/Pb) em uma só passada para camadas isotérmicas e com gradiente
+    expoente = np.where(ISOTERMICA[i], dh / T_b, np.log(T / T_b) / _L_SEGURO[i])
+    expoente *= -g0 / R
+    np.exp(expoente, out=P)
+    P *= P_BASE[i]
+
+
+@em_cache('us_standard_atmosphere', saida='out')
+def us_standard_atmosphere(h, out=None, tabelado=False):
     """
     Modelo simplificado da Atmosfera Padrão dos EUA (0–120 km).
     Retorna T [K], P [Pa], rho [kg/m³] para uma altitude h [m].
-    """
 
+    Parâmetros:
+    h: altitude(s) [m]
+    out: dicionário opcional com arrays "T", "P" e "rho" (float, mesmo
+         formato de h) em que o resultado é escrito, evitando alocação
+    tabelado: se True, interpola em uma tabela fina pré-calculada
+              (ver atmosfera_tabelada) em vez de avaliar o modelo
+    """
     # garantir array numpy
-    h = np.atleast_1d(h).astype(float)
-
-    # Definição das camadas: (h_base [m], T_base [K], gradiente L [K/m])
-    camadas = [
-        (0, 288.15, -0.0065),  # Troposfera
-        (11000, 216.65, 0.0),  # Tropopausa
-        (20000, 216.65, 0.001),  # Estratosfera baixa
-        (32000, 228.65, 0.0028),  # Estratosfera alta
-        (47000, 270.65, 0.0),  # Estratopausa
-        (51000, 270.65, -0.0028),  # Mesosfera baixa
-        (71000, 214.65, -0.002),  # Mesosfera alta
-        (84852, 186.95, 0.0)  # até ~86 km (acima disso extrapola exponencialmente)
-    ]
-
-    # Constantes
-    R = 287.05
-    g0 = 9.80665
-    P0 = 101325.0  # pressão ao nível do mar
-
-    # Arrays de saída
-    T = np.zeros_like(h)
-    P = np.zeros_like(h)
-
-    # valores de referência
-    T_base = camadas[0][1]
-    h_base = camadas[0][0]
-    L = camadas[0][2]
-
-    for i, (h_b, T_b, L) in enumerate(camadas):
-        h_top = camadas[i + 1][0] if i + 1 < len(camadas) else 120000.0
-        mask = (h >= h_b) & (h < h_top)
-
-        if L == 0.0:  # camada isotérmica
-            T[mask] = T_b
-            P[mask] = P0 * np.exp(-g0 * (h[mask] - h_b) / (R * T_b))
-        else:  # camada com gradiente
-            T[mask] = T_b + L * (h[mask] - h_b)
-            P[mask] = P0 * (T[mask] / T_b) ** (-g0 / (R * L))
-
-        # Atualiza condições de base para próxima camada
-        if i < len(camadas) - 1:
-            h_next, T_next, L_next = camadas[i + 1]
-            if L == 0.0:
-                P0 = P0 * np.exp(-g0 * (h_next - h_b) / (R * T_b))
-            else:
-                P0 = P0 * (T_next / T_b) ** (-g0 / (R * L))
-
-    rho = P / (R * T)
-    return {"T": T, "P": P, "rho": rho}
+    h = np.atleast_1d(h).astype(float, copy=False)
+
+    if out is None:
+        out = {"T": np.empty_like(h), "P": np.empty_like(h), "rho": np.empty_like(h)}
+    T, P, rho = out["T"], out["P"], out["rho"]
+
+    if tabelado:
+        # Malha uniforme: o intervalo de cada ponto sai direto da divisão
+        resolucao, T_tab, dT_tab, lnP_tab, dlnP_tab = atmosfera_tabelada()
+        x = h / resolucao
+        j = x.astype(np.intp)
+        np.clip(j, 0, len(T_tab) - 1, out=j)
+        x -= j
+        np.multiply(dT_tab[j], x, out=T)
+        T += T_tab[j]
+        np.multiply(dlnP_tab[j], x, out=P)
+        P += lnP_tab[j]
+        np.exp(P, out=P)
+    else:
+        # Camada de cada ponto em uma única busca
+        _modelo(h, _camada(h), T, P)
+
+    # Fora do intervalo do modelo os valores são nulos
+    fora = (h < 0) | (h >= H_TOPO)
+    if np.any(fora):
+        T[fora] = 0.0
+        P[fora] = 0.0
+
+    np.divide(P, R * T, out=rho)
+    return out
+
+
+@lru_cache(maxsize=4)
+def atmosfera_tabelada(resolucao=1.0):
+    """
+    Tabela fina do modelo em malha uniforme, construída uma vez por processo.
+
+    Parâmetros:
+    resolucao: espaçamento da malha de altitudes [m]
+
+    Retorna (resolucao, T, dT, lnP, dlnP), com os valores em cada nó e os
+    incrementos até o nó seguinte. T é linear por partes com quebras em
+    altitudes inteiras, então a interpolação é exata em T com a resolução
+    padrão; em P o erro relativo fica abaixo de 1e-9.
+    """
+    n = int(round(H_TOPO / resolucao))
+    h_tab = np.arange(n + 1) * resolucao
+
+    # Os dois extremos de cada intervalo são avaliados na camada do nó
+    # inicial, para que descontinuidades entre camadas não sejam suavizadas
+    i = _camada(h_tab[:-1])
+    T0, P0, T1, P1 = (np.empty(n) for _ in range(4))
+    _modelo(h_tab[:-1], i, T0, P0)
+    _modelo(h_tab[1:], i, T1, P1)
+    lnP0 = np.log(P0)
+
+    tabela = (T0, T1 - T0, lnP0, np.log(P1) - lnP0)
+    for arr in tabela:
+        arr.setflags(write=False)
+    return (resolucao,) + tabela
@@ -0,0 +1,175 @@
+import os
+import json
+import numpy as np
+from src.tubeira_sino import escrever_csv_pontos
+
+"""
+Armazenamento binário de contornos de tubeiras.
+
+Um banco é um diretório com três arquivos:
+- pontos.bin: pontos (x, y) de todos os projetos, em sequência, como floats
+  binários (float64 ou float32);
+- indice.bin: um registro por projeto (posição e número de pontos no
+  arquivo de pontos, tamanho das seções e parâmetros do projeto);
+- banco.json: versão e tipo de dado dos pontos.
+
+Os projetos são acrescentados ao fim dos arquivos, e a leitura usa
+np.memmap: contorno(i) é uma vista dos dados em disco, sem cópia. Os pontos
+são gravados antes do registro no índice, então um projeto só passa a
+existir quando está completo; ao acrescentar, os dois arquivos são cortados
+de volta ao último projeto completo.
+"""
+
+VERSAO = 1
+PARAMETROS = ('epsilon', 'Rt', 'l_camara', 'k', 'Ln', 'theta_n', 'theta_e')
+DTYPE_INDICE = np.dtype([('inicio', '<i8'), ('n_pontos', '<i8'), ('secoes', '<i4', (3,))]
+                        + [(nome, '<f8') for nome in PARAMETROS])
+
+
+class BancoContornos:
+    """
+    Banco de contornos em disco.
+
+    Parâmetros:
+    diretorio: diretório do banco (criado se não existir)
+    dtype: tipo dos pontos ('float64' ou 'float32'), usado só na criação
+    """
+
+    def __init__(self, diretorio, dtype='float64'):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+        arquivo_info = os.path.join(diretorio, 'banco.json')
+        if os.path.exists(arquivo_info):
+            with open(arquivo_info) as f:
+                info = json.load(f)
+            if info['versao'] != VERSAO:
+                raise ValueError(f"Versão do banco não suportada: {info['versao']}")
+        else:
+            info = {'versao': VERSAO, 'dtype': np.dtype(dtype).name}
+            with open(arquivo_info, 'w') as f:
+                json.dump(info, f)
+
+        self.dtype = np.dtype(info['dtype']).newbyteorder('<')
+        self._arquivo_pontos = os.path.join(diretorio, 'pontos.bin')
+        self._arquivo_indice = os.path.join(diretorio, 'indice.bin')
+        self._pontos = None
+        self._indice = None
+
+    def __len__(self):
+        return len(self.indice)
+
+    @property
+    def indice(self):
+        """
+        Registros de todos os projetos (array estruturado em memmap).
+        """
+        if self._indice is None:
+            n = os.path.getsize(self._arquivo_indice) // DTYPE_INDICE.itemsize \
+                if os.path.exists(self._arquivo_indice) else 0
+            self._indice = np.memmap(self._arquivo_indice, DTYPE_INDICE, 'r', shape=(n,)) if n \
+                else np.empty(0, DTYPE_INDICE)
+        return self._indice
+
+    def _recuperar(self):
+        """
+        Registros válidos do índice: descarta um registro gravado pela metade
+        e os registros cujos pontos não estão completos em pontos.bin.
+        """
+        indice = self.indice
+        n_pontos = os.path.getsize(self._arquivo_pontos) // (2 * self.dtype.itemsize) \
+            if os.path.exists(self._arquivo_pontos) else 0
+        completos = indice['inicio'] + indice['n_pontos'] <= n_pontos
+        n = len(indice) if np.all(completos) else int(np.argmin(completos))
+        return indice[:n]
+
+    def _todos_pontos(self):
+        if self._pontos is None:
+            n = os.path.getsize(self._arquivo_pontos) // (2 * self.dtype.itemsize)
+            self._pontos = np.memmap(self._arquivo_pontos, self.dtype, 'r', shape=(n, 2))
+        return self._pontos
+
+    def adicionar(self, contornos, secoes, **parametros):
+        """
+        Acrescenta projetos ao banco.
+
+        Parâmetros:
+        contornos: pontos (x, y) da metade superior, formato (n_projetos, n_pontos, 2)
+        secoes: número de pontos em cada uma das três seções (entrada da
+                garganta, saída da garganta e sino), somando n_pontos
+        parametros: arrays (n_projetos,) ou escalares com epsilon, Rt,
+                    l_camara, k, Ln, theta_n e theta_e (os ausentes ficam NaN)
+
+        Retorna os índices dos projetos acrescentados.
+        """
+        contornos = np.asarray(contornos)
+        if contornos.ndim == 2:
+            contornos = contornos[None]
+        n_projetos, n_pontos, _ = contornos.shape
+        if sum(secoes) != n_pontos:
+            raise ValueError("A soma das seções deve ser igual ao número de pontos do contorno!")
+        desconhecidos = set(parametros) - set(PARAMETROS)
+        if desconhecidos:
+            raise ValueError(f"Parâmetros desconhecidos: {sorted(desconhecidos)}")
+
+        # Posição inicial pelo que já está registrado no índice (descarta
+        # pontos e registros de uma gravação interrompida)
+        indice = self._recuperar()
+        inicio = int(indice['inicio'][-1] + indice['n_pontos'][-1]) if len(indice) else 0
+        tamanho = inicio * 2 * self.dtype.itemsize
+
+        registros = np.zeros(n_projetos, DTYPE_INDICE)
+        registros['inicio'] = inicio + n_pontos * np.arange(n_projetos)
+        registros['n_pontos'] = n_pontos
+        registros['secoes'] = secoes
+        for nome in PARAMETROS:
+            registros[nome] = parametros.get(nome, np.nan)
+
+        with open(self._arquivo_pontos, 'ab') as f:
+            f.truncate(tamanho)
+            f.write(np.ascontiguousarray(contornos, dtype=self.dtype).tobytes())
+        with open(self._arquivo_indice, 'ab') as f:
+            f.truncate(len(indice) * DTYPE_INDICE.itemsize)
+            f.write(registros.tobytes())
+
+        # Os memmaps são reabertos na próxima leitura
+        self._pontos = None
+        self._indice = None
+        return np.arange(len(indice), len(indice) + n_projetos)
+
+    def adicionar_lote(self, angulos, contornos, epsilon, Rt, l_camara, k=np.nan):
+        """
+        Acrescenta o resultado de tubeira_sino_lote (seções de mesmo tamanho).
+        """
+        n = contornos.shape[1] // 3
+        return self.adicionar(contornos, (n, n, n), epsilon=epsilon, Rt=Rt, l_camara=l_camara, k=k,
+                              Ln=angulos[:, 0], theta_n=angulos[:, 1], theta_e=angulos[:, 2])
+
+    def contorno(self, i):
+        """
+        Pontos (x, y) do projeto i, formato (n_pontos, 2), como vista do
+        arquivo em disco (somente leitura).
+        """
+        registro = self.indice[i]
+        inicio = int(registro['inicio'])
+        return self._todos_pontos()[inicio:inicio + int(registro['n_pontos'])]
+
+    def parametros(self, i):
+        registro = self.indice[i]
+        return {nome: float(registro[nome]) for nome in PARAMETROS}
+
+    def pontos_cad(self, i):
+        """
+        Contorno superior sem os pontos repetidos entre seções, como em
+        gerar_tabela_pontos.
+        """
+        pontos = self.contorno(i)
+        n1, n2, _ = (int(s) for s in self.indice[i]['secoes'])
+        return np.concatenate([pontos[:n1 - 1], pontos[n1:n1 + n2 - 1], pontos[n1 + n2:]])
+
+    def exportar_csv(self, i, nome_arquivo):
+        """
+        Exporta o projeto i em CSV para o CAD (mesmo formato de gerar_tabela_pontos).
+        """
+        pontos = self.pontos_cad(i)
+        escrever_csv_pontos(pontos[:, 0], pontos[:, 1], nome_arquivo)
@@ -0,0 +1,255 @@
+import os
+import glob
+import pickle
+import hashlib
+import inspect
+import functools
+from collections import OrderedDict
+import numpy as np
+
+"""
+Cache de resultados endereçado pelo conteúdo das entradas.
+
+A chave de cada chamada é um hash (SHA-256) do nome da função, dos
+argumentos (normalizados pela assinatura, então posição ou nome não mudam a
+chave) e da versão do código, que é o hash de todos os arquivos de src/.
+Qualquer alteração no código invalida os resultados antigos.
+
+Há dois níveis:
+- memória: LRU no processo, com até max_itens resultados;
+- disco: um arquivo .pkl por chave em DIRETORIO_CACHE, com despejo dos
+  arquivos usados há mais tempo quando o total passa de max_bytes.
+
+Desativado por padrão: nesse caso as funções decoradas com em_cache() só
+verificam um atributo antes de executar. Para ativar, use ativar() ou
+defina a variável de ambiente X1_CACHE=1. Os arrays devolvidos pelo cache
+são compartilhados entre chamadas e ficam somente leitura.
+"""
+
+DIRETORIO_CACHE = os.environ.get(
+    'X1_CACHE_RESULTADOS',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'resultados')
+)
+
+ativo = os.environ.get('X1_CACHE', '') not in ('', '0')
+
+_config = {'diretorio': DIRETORIO_CACHE, 'max_itens': 256, 'max_bytes': 256 * 2**20, 'disco': True}
+_memoria = OrderedDict()
+_estatisticas = {}
+
+
+def ativar(diretorio=None, max_itens=None, max_bytes=None, disco=True):
+    """
+    Ativa o cache.
+
+    Parâmetros:
+    diretorio: diretório do nível em disco (padrão: DIRETORIO_CACHE)
+    max_itens: número máximo de resultados na memória
+    max_bytes: tamanho máximo do nível em disco [bytes]
+    disco: False para usar só o nível em memória
+    """
+    global ativo
+    ativo = True
+    if diretorio is not None:
+        _config['diretorio'] = diretorio
+    if max_itens is not None:
+        _config['max_itens'] = max_itens
+    if max_bytes is not None:
+        _config['max_bytes'] = max_bytes
+    _config['disco'] = disco
+
+
+def desativar():
+    global ativo
+    ativo = False
+
+
+def limpar(disco=False):
+    """
+    Esvazia o nível em memória (e o diretório em disco, se disco=True).
+    """
+    _memoria.clear()
+    _estatisticas.clear()
+    if disco:
+        for arquivo in glob.glob(os.path.join(_config['diretorio'], '*.pkl')):
+            os.remove(arquivo)
+
+
+def estatisticas():
+    """
+    Acertos em memória, acertos em disco e cálculos por função.
+    """
+    return {nome: dict(e) for nome, e in _estatisticas.items()}
+
+
+@functools.lru_cache(maxsize=1)
+def versao_codigo():
+    """
+    Hash do conteúdo dos arquivos .py de src/.
+    """
+    h = hashlib.sha256()
+    for arquivo in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        h.update(os.path.basename(arquivo).encode())
+        with open(arquivo, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _serializar(valor, h):
+    # Representação canônica: números (Python ou NumPy) pelo tipo e valor
+    # (inteiros exatos, floats pelos bytes em float64), arrays pelo tipo,
+    # formato e bytes
+    if valor is None or isinstance(valor, (bool, np.bool_, str)):
+        h.update(repr((type(valor).__name__, valor)).encode())
+    elif isinstance(valor, (int, np.integer)):
+        h.update(repr((type(valor).__name__, int(valor))).encode())
+    elif isinstance(valor, (float, np.floating)):
+        h.update(repr((type(valor).__name__, np.float64(valor).tobytes())).encode())
+    elif isinstance(valor, np.ndarray):
+        h.update(repr(('a', valor.dtype.str, valor.shape)).encode())
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, (tuple, list)):
+        h.update(repr(('s', len(valor))).encode())
+        for item in valor:
+            _serializar(item, h)
+    elif isinstance(valor, dict):
+        h.update(repr(('d', len(valor))).encode())
+        for chave in sorted(valor):
+            _serializar(chave, h)
+            _serializar(valor[chave], h)
+    else:
+        raise TypeError(f"Argumento sem representação para o cache: {type(valor).__name__}")
+
+
+def chave(nome, argumentos):
+    """
+    Chave de uma chamada: hash do nome, da versão do código e dos argumentos
+    (dicionário nome -> valor).
+    """
+    h = hashlib.sha256()
+    h.update(nome.encode())
+    h.update(versao_codigo().encode())
+    _serializar(argumentos, h)
+    return h.hexdigest()
+
+
+def _somente_leitura(valor):
+    if isinstance(valor, np.ndarray):
+        valor.setflags(write=False)
+    elif isinstance(valor, (tuple, list)):
+        for item in valor:
+            _somente_leitura(item)
+    elif isinstance(valor, dict):
+        for item in valor.values():
+            _somente_leitura(item)
+    elif isinstance(getattr(valor, 'pontos', None), np.ndarray):
+        # ProjetoTubeira
+        valor.pontos.setflags(write=False)
+    return valor
+
+
+def _guardar_memoria(k, valor):
+    _memoria[k] = valor
+    _memoria.move_to_end(k)
+    while len(_memoria) > _config['max_itens']:
+        _memoria.popitem(last=False)
+
+
+def _ler_disco(k):
+    arquivo = os.path.join(_config['diretorio'], f'{k}.pkl')
+    try:
+        with open(arquivo, 'rb') as f:
+            valor = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    # Marca o uso para o despejo por ordem de acesso
+    try:
+        os.utime(arquivo)
+    except OSError:
+        pass
+    return valor
+
+
+def _gravar_disco(k, valor):
+    diretorio = _config['diretorio']
+    arquivo = os.path.join(diretorio, f'{k}.pkl')
+
+    # Grava de forma atômica para não deixar arquivos parciais entre processos;
+    # sem permissão de escrita o resultado fica só na memória
+    temporario = f'{arquivo}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        with open(temporario, 'wb') as f:
+            pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, arquivo)
+    except OSError:
+        return
+    _despejar(diretorio, _config['max_bytes'])
+
+
+def _despejar(diretorio, max_bytes):
+    # Remove os arquivos usados há mais tempo até o total caber no limite
+    arquivos = []
+    for arquivo in glob.glob(os.path.join(diretorio, '*.pkl')):
+        try:
+            info = os.stat(arquivo)
+        except OSError:
+            continue
+        arquivos.append((info.st_mtime, info.st_size, arquivo))
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, arquivo in sorted(arquivos):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(arquivo)
+        except OSError:
+            pass
+        total -= tamanho
+
+
+def em_cache(nome, saida=None):
+    """
+    Decorador que guarda os resultados da função no cache quando ativo.
+
+    Parâmetros:
+    nome: nome da função na chave (estável entre versões do módulo)
+    saida: nome de um argumento de saída (por exemplo out); chamadas que o
+           informam são executadas sem o cache
+    """
+    def decorador(funcao):
+        assinatura = inspect.signature(funcao)
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if not ativo:
+                return funcao(*args, **kwargs)
+
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            if saida is not None and argumentos.arguments.get(saida) is not None:
+                return funcao(*args, **kwargs)
+            try:
+                k = chave(nome, argumentos.arguments)
+            except TypeError:
+                return funcao(*args, **kwargs)
+
+            e = _estatisticas.setdefault(nome, {'memoria': 0, 'disco': 0, 'calculos': 0})
+            if k in _memoria:
+                _memoria.move_to_end(k)
+                e['memoria'] += 1
+                return _memoria[k]
+
+            valor = _ler_disco(k) if _config['disco'] else None
+            if valor is not None:
+                e['disco'] += 1
+            else:
+                e['calculos'] += 1
+                valor = funcao(*args, **kwargs)
+                if _config['disco']:
+                    _gravar_disco(k, valor)
+            _somente_leitura(valor)
+            _guardar_memoria(k, valor)
+            return valor
+
+        return envoltorio
+    return decorador
@@ -0,0 +1,366 @@
+from functools import lru_cache
+import numpy as np
+from src.funcoes_auxiliares import mach_razao_area
+from src.projeto import ProjetoTubeira
+
+"""
+Contorno de tubeira de comprimento mínimo (escoamento axissimétrico) pelo
+método das características.
+
+A garganta tem canto vivo em (0, Rt), com linha sônica reta. Do canto saem
+n_caracteristicas linhas C- (leque de Prandtl-Meyer com ângulos theta_i
+igualmente espaçados até theta_max); ao refletirem no eixo viram linhas C+.
+O ângulo theta_max é ajustado para que o último ponto no eixo tenha o Mach
+de saída obtido da relação área-Mach (src.funcoes_auxiliares).
+
+Depois do núcleo de expansão vem a região de transição, limitada pela
+última C- do canto e pela característica de saída (C+ reta com Mach
+uniforme). A parede é a linha de corrente que sai do canto: em cada C+, o
+ponto em que a vazão acumulada desde o eixo iguala a vazão na garganta.
+
+Cada ponto da malha depende só dos vizinhos anteriores nas duas famílias,
+então os pontos de uma mesma diagonal (i + j constante) são calculados
+juntos, como uma frente de onda vetorizada. Os pontos internos usam
+preditor-corretor nas equações de compatibilidade axissimétricas:
+d(theta + nu) = T dl na C- e d(nu - theta) = T dl na C+, com
+T = sin(mu) sin(theta) / y; no corretor, T e as inclinações das
+características são calculados com as propriedades médias de cada trecho.
+"""
+
+
+def prandtl_meyer(Mach, k):
+    """
+    Função de Prandtl-Meyer nu(M) [rad].
+    """
+    return _nu_beta(np.sqrt(np.asarray(Mach, dtype=float) ** 2 - 1), k)
+
+
+def _nu_beta(beta, k):
+    # nu em função de beta = sqrt(M^2 - 1)
+    a = np.sqrt((k + 1) / (k - 1))
+    return a * np.arctan(beta / a) - np.arctan(beta)
+
+
+@lru_cache(maxsize=8)
+def _tabela_pm(k):
+    # Tabela de beta e mu em função de nu^(1/3) (perto de M = 1, nu ~ beta^3)
+    beta = np.tan(np.linspace(0.0, np.arctan(1000.0), 20001))
+    return np.cbrt(_nu_beta(beta, k)), beta, np.arctan2(1.0, beta)
+
+
+def _beta_de_nu(nu, k):
+    # Inversa de Prandtl-Meyer: interpolação na tabela e um passo de Newton
+    c, b, _ = _tabela_pm(k)
+    beta = np.interp(np.cbrt(np.maximum(nu, 0.0)), c, b)
+    a2 = (k + 1) / (k - 1)
+    b2 = beta * beta
+    derivada = b2 * (1 - 1 / a2) / ((1 + b2 / a2) * (1 + b2))
+    passo = np.divide(_nu_beta(beta, k) - nu, derivada, out=np.zeros_like(beta), where=derivada > 0)
+    return np.maximum(beta - passo, 0.0)
+
+
+def _mu_de_nu(nu, k):
+    # Ângulo de Mach direto da tabela (usado na marcha, onde basta a interpolação)
+    c, _, mu = _tabela_pm(k)
+    return np.interp(np.cbrt(nu), c, mu)
+
+
+def mach_prandtl_meyer(nu, k):
+    """
+    Número de Mach para um ângulo de Prandtl-Meyer nu [rad].
+    """
+    beta = _beta_de_nu(np.asarray(nu, dtype=float), k)
+    return np.sqrt(1 + beta * beta)
+
+
+# Ordem das grandezas em cada ponto da malha (primeiro eixo dos arrays)
+X, Y, THETA, NU, MU, T = range(6)
+_ESPELHO = np.array([1.0, -1.0, -1.0, 1.0, 1.0, 1.0])[:, None]
+
+
+def _ponto_interno(A, B, k, iteracoes, eixo=None):
+    """
+    Interseção da C- que passa por A com a C+ que passa por B (arrays
+    (6, m) com x, y, theta, nu, mu e T). Pontos marcados em eixo estão no
+    eixo: B é o espelho de A e o resultado tem y = theta = 0.
+    """
+    xa, ya, ta, na, ma, Ta = A
+    xb, yb, tb, nb, mb, Tb = B
+    ang_a, ang_b = ta - ma, tb + mb
+    k_a, k_b = ta + na, nb - tb
+    Ta_m, Tb_m = Ta, Tb
+    dy, dx = yb - ya, xb - xa
+
+    for it in range(iteracoes + 1):
+        sa, sb = np.tan(ang_a), np.tan(ang_b)
+        # Deslocamentos de P em relação a A e a B
+        dxa = (dy - sb * dx) / (sa - sb)
+        dxb = dxa - dx
+        yp = ya + sa * dxa
+        if eixo is not None:
+            yp[eixo] = 0.0
+        # Comprimentos com sinal (positivos no sentido do escoamento)
+        k_menos = k_a + Ta_m * dxa * np.hypot(1.0, sa)
+        k_mais = k_b + Tb_m * dxb * np.hypot(1.0, sb)
+        tp = 0.5 * (k_menos - k_mais)
+        nup = 0.5 * (k_menos + k_mais)
+        if eixo is not None:
+            tp[eixo] = 0.0
+        mp = _mu_de_nu(nup, k)
+
+        if it < iteracoes:
+            # Corretor: coeficientes com as propriedades médias de cada trecho
+            # (sin(theta) / y fica limitado perto do eixo)
+            ta_m, tb_m = 0.5 * (ta + tp), 0.5 * (tb + tp)
+            ma_m, mb_m = 0.5 * (ma + mp), 0.5 * (mb + mp)
+            ang_a, ang_b = ta_m - ma_m, tb_m + mb_m
+            Ta_m = np.sin(ma_m) * np.sin(ta_m) / (0.5 * (ya + yp))
+            Tb_m = np.sin(mb_m) * np.sin(tb_m) / (0.5 * (yb + yp))
+
+    xp = xa + dxa
+    with np.errstate(invalid='ignore', divide='ignore'):
+        Tp = np.sin(mp) * np.sin(tp) / yp
+    if eixo is not None:
+        # No eixo sin(theta) / y fica indeterminado: usa o termo do trecho que chega
+        Tp[eixo] = Ta_m[eixo]
+    return np.stack([xp, yp, tp, nup, mp, Tp])
+
+
+def _nucleo(k, theta_max, n, iteracoes=1):
+    """
+    Núcleo de expansão para Rt = 1. Retorna a última C- do canto (i = n):
+    array (6, n + 1) indexado por (grandeza, j), com j a C+ (j = 0 é o canto
+    e j = n o ponto no eixo).
+
+    Só a diagonal anterior (i + j constante) é guardada durante a marcha: os
+    vizinhos A = (i, j - 1) e B = (i - 1, j) de cada ponto são fatias dela.
+    """
+    # Pontos do canto (i, 0) para i = 0..n (i = 0 não é usado)
+    theta = theta_max * np.arange(n + 1) / n
+    mu = _mu_de_nu(theta, k)
+    canto = np.stack([np.zeros(n + 1), np.ones(n + 1), theta, theta, mu, np.sin(mu) * np.sin(theta)])
+
+    ultima = np.empty((6, n + 1))
+    ultima[:, 0] = canto[:, n]
+
+    # Frente de onda: os pontos com i + j = d dependem só da diagonal d - 1,
+    # que cobre j = max(0, d - 1 - n)..(d - 1) // 2 (com o canto em j = 0)
+    anterior = canto[:, 1:2]
+    for d in range(2, 2 * n + 1):
+        inicio = max(1, d - n)
+        p0 = max(0, d - 1 - n)
+        A = anterior[:, inicio - 1 - p0:d // 2 - p0]
+        eixo = None
+        if d % 2 == 0:
+            # Último ponto da diagonal no eixo: a C+ vem do espelho de A
+            B = np.empty_like(A)
+            B[:, :-1] = anterior[:, inicio - p0:]
+            B[:, -1] = A[:, -1] * _ESPELHO[:, 0]
+            eixo = np.zeros(A.shape[1], dtype=bool)
+            eixo[-1] = True
+        else:
+            B = anterior[:, inicio - p0:]
+        novos = _ponto_interno(A, B, k, iteracoes, eixo)
+        if d <= n:
+            anterior = np.concatenate([canto[:, d:d + 1], novos], axis=1)
+        else:
+            anterior = novos
+            ultima[:, d - n] = novos[:, 0]
+
+    return ultima
+
+
+def _theta_max(k, nu_e, n, iteracoes, tol=1e-12, max_iter=100):
+    # Regula falsi (Illinois) em theta_max até o último ponto do eixo ter nu = nu_e
+    def residuo(theta_max):
+        r = _nucleo(k, theta_max, n, iteracoes)[NU, -1] - nu_e
+        # theta_max grande demais leva o núcleo além de nu máximo
+        return r if np.isfinite(r) else np.inf
+
+    a, b = 0.02 * nu_e, 0.5 * nu_e
+    ra, rb = residuo(a), residuo(b)
+    lado = 0
+    c = a
+    for _ in range(max_iter):
+        c = b - rb * (b - a) / (rb - ra) if np.isfinite(rb) else 0.5 * (a + b)
+        rc = residuo(c)
+        if abs(rc) <= tol or b - a <= tol * nu_e:
+            break
+        if rc > 0:
+            b, rb = c, rc
+            if lado == -1:
+                ra *= 0.5
+            lado = -1
+        else:
+            a, ra = c, rc
+            if lado == 1 and np.isfinite(rb):
+                rb *= 0.5
+            lado = 1
+    return c
+
+
+def _residuo_malha(k, theta_max, nu_e, n_busca, n, iteracoes):
+    """
+    Resíduo nu[n, n] - nu_e do núcleo de n características em theta_max (a
+    raiz de _theta_max na malha n_busca). Até 4 n_busca o núcleo é
+    calculado; acima disso, é extrapolado das malhas n_busca, 2 n_busca e
+    4 n_busca (erro de discretização ~ n^-p, com p estimado pelas três),
+    para não percorrer a malha final duas vezes.
+    """
+    if n <= 4 * n_busca:
+        return _nucleo(k, theta_max, n, iteracoes)[NU, -1] - nu_e
+    # theta_max é a raiz na malha n_busca: lá o núcleo já termina em nu_e
+    nu = [nu_e] + [_nucleo(k, theta_max, m, iteracoes)[NU, -1] for m in (2 * n_busca, 4 * n_busca)]
+    d1, d2 = nu[1] - nu[0], nu[2] - nu[1]
+    if not d1 * d2 > 0:
+        # Convergência não monótona: fica com a malha mais fina
+        return nu[2] - nu_e
+    razao = min(max(d1 / d2, 1.2), 4.0)
+    p = np.log2(razao)
+    return nu[2] + d2 / (razao - 1) * (1 - (4 * n_busca / n) ** p) - nu_e
+
+
+def _transicao(k, ultima, nu_e, mu_e, y_max, m, iteracoes=1):
+    """
+    Região entre a última C- do canto (i = n do núcleo) e a característica
+    de saída. Array (6, n + 1, m + 1) indexado por (grandeza, j, l): j é a C+
+    que vem do núcleo e l a C- que sai do ponto l da característica de saída.
+    """
+    n = ultima.shape[1] - 1
+    campos = np.full((6, n + 1, m + 1), np.nan)
+
+    # l = 0: última C- do canto
+    campos[:, 1:, 0] = ultima[:, 1:]
+
+    # j = n: característica de saída (reta, escoamento uniforme)
+    s = y_max * np.arange(m + 1) / m / np.sin(mu_e)
+    campos[X, n] = ultima[X, n] + s * np.cos(mu_e)
+    campos[Y, n] = s * np.sin(mu_e)
+    campos[THETA, n] = 0.0
+    campos[NU, n] = nu_e
+    campos[MU, n] = mu_e
+    campos[T, n] = 0.0
+
+    # Frente de onda nas diagonais d = n + l - j. A diagonal anterior é
+    # guardada com as bordas: (j, 0) na última C- do canto e (n, l) na
+    # característica de saída; cobre j = max(1, n - d)..min(n, n + m - d)
+    def diagonal(d, internos):
+        partes = [ultima[:, n - d:n - d + 1]] if n - d >= 1 else []
+        partes.append(internos)
+        if d <= m:
+            partes.append(campos[:, n, d:d + 1])
+        return np.concatenate(partes, axis=1)
+
+    anterior = diagonal(1, np.empty((6, 0)))
+    for d in range(2, n - 1 + m + 1):
+        inicio, fim = max(1, n + 1 - d), min(n - 1, n + m - d)
+        p0 = max(1, n - d + 1)
+        if fim < inicio:
+            internos = np.empty((6, 0))
+        else:
+            # A = (j + 1, l) e B = (j, l - 1), fatias da diagonal anterior
+            A = anterior[:, inicio + 1 - p0:fim + 2 - p0]
+            B = anterior[:, inicio - p0:fim + 1 - p0]
+            internos = _ponto_interno(A, B, k, iteracoes)
+            j = np.arange(inicio, fim + 1)
+            campos[:, j, d - n + j] = internos
+        anterior = diagonal(d, internos)
+
+    return campos
+
+
+def _vazao_relativa(mu, k):
+    # rho V / (rho V)* = At / A(M), com M = 1 / sin(mu)
+    M = 1 / np.sin(mu)
+    return M * (2 / (k + 1) * (1 + (k - 1) / 2 * M * M)) ** (-(k + 1) / (2 * (k - 1)))
+
+
+def _parede(k, transicao):
+    """
+    Pontos da parede (Rt = 1): em cada C+ (j = 1..n), o ponto em que a vazão
+    acumulada desde o eixo iguala a vazão na garganta. O primeiro ponto é o
+    canto (0, 1).
+
+    Até a última C- do canto (l = 0 da região de transição), a vazão da C+
+    j é a que atravessa essa C- entre o ponto j e o eixo (conservação da
+    massa no triângulo entre as duas e o eixo); o núcleo não precisa ser
+    percorrido.
+    """
+    # Pontos de cada C+ na região de transição (l = 0 na última C- do canto);
+    # só x, y e mu entram na vazão
+    x, y, mu = transicao[[X, Y, MU], 1:]
+
+    # Vazão através de um trecho de característica: rho V 2 pi y sin(mu) dl
+    # (normalizada pela vazão na garganta, rho* V* pi)
+    f = 2 * y * np.sin(mu) * _vazao_relativa(mu, k)
+    dl = np.hypot(np.diff(x, axis=1), np.diff(y, axis=1))
+    incremento = 0.5 * (f[:, 1:] + f[:, :-1]) * dl
+
+    # Vazão na última C- do canto, do ponto j até o eixo (j = n)
+    dl_canto = np.hypot(np.diff(x[:, 0]), np.diff(y[:, 0]))
+    incremento_canto = 0.5 * (f[1:, 0] + f[:-1, 0]) * dl_canto
+    vazao_canto = np.concatenate([np.cumsum(incremento_canto[::-1])[::-1], [0.0]])
+
+    vazao = np.concatenate([vazao_canto[:, None], vazao_canto[:, None] + np.cumsum(incremento, axis=1)], axis=1)
+
+    a = np.argmax(vazao >= 1.0, axis=1)
+    if np.any(a == 0):
+        raise ValueError("A parede não cruza a característica C+; aumente a região de transição.")
+    linhas = np.arange(len(x))
+    w = (1.0 - vazao[linhas, a - 1]) / (vazao[linhas, a] - vazao[linhas, a - 1])
+    x_parede = x[linhas, a - 1] + w * (x[linhas, a] - x[linhas, a - 1])
+    y_parede = y[linhas, a - 1] + w * (y[linhas, a] - y[linhas, a - 1])
+
+    return np.concatenate([[0.0], x_parede]), np.concatenate([[1.0], y_parede])
+
+
+def tubeira_caracteristicas(k, arazao, Rt, n_caracteristicas=100, intervalo=100, iteracoes=1):
+    """
+    Contorno de uma tubeira de comprimento mínimo pelo método das características.
+
+    Parâmetros:
+    k: razão de calores específicos
+    arazao: razão de área (Ae/At); o Mach de saída vem da relação área-Mach
+    Rt: raio da garganta
+    n_caracteristicas: número de características que saem do canto da garganta
+    intervalo: número de pontos da seção de entrada da garganta
+    iteracoes: passos de correção em cada ponto da malha
+
+    Retorna um ProjetoTubeira, como tubeira_sino, com theta_n = theta_max e
+    theta_e = 0 (em radianos). O contorno tem a mesma entrada da garganta,
+    a saída da garganta reduzida ao canto (0, Rt) e o sino com os pontos da
+    parede calculados (n_caracteristicas + 1 pontos).
+    """
+    M_e, _ = mach_razao_area(arazao, k)
+    nu_e = float(prandtl_meyer(M_e, k))
+    mu_e = float(np.arcsin(1 / M_e))
+
+    # theta_max numa malha grossa e depois um passo de secante para a malha
+    # final, com a derivada da malha grossa; o núcleo final é calculado uma vez
+    n = n_caracteristicas
+    n_busca = min(n, 40)
+    theta_max = _theta_max(k, nu_e, n_busca, iteracoes)
+    if n > n_busca:
+        r = _residuo_malha(k, theta_max, nu_e, n_busca, n, iteracoes)
+        delta = 1e-4 * theta_max
+        r_busca = _nucleo(k, theta_max + delta, n_busca, iteracoes)[NU, -1] - nu_e
+        theta_max -= r * delta / r_busca
+    ultima = _nucleo(k, theta_max, n, iteracoes)
+
+    transicao = _transicao(k, ultima, nu_e, mu_e, 1.1 * np.sqrt(arazao), max(n // 4, 20), iteracoes)
+    x_parede, y_parede = _parede(k, transicao)
+
+    # Seção de entrada da garganta: mesmo arco de tubeira_sino
+    lista_angulos = np.linspace(np.radians(-135), -np.pi/2, intervalo)
+    xe = 1.5 * Rt * np.cos(lista_angulos)
+    ye = 1.5 * Rt * np.sin(lista_angulos) + 2.5 * Rt
+
+    # Saída da garganta: canto vivo
+    xe2 = np.array([0.0])
+    ye2 = np.array([Rt])
+
+    xsino = Rt * x_parede
+    ysino = Rt * y_parede
+
+    angulos = (float(xsino[-1]), float(theta_max), 0.0)
+    return ProjetoTubeira.de_secoes([(xe, ye), (xe2, ye2), (xsino, ysino)], angulos, arazao, Rt)
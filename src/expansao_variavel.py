@@ -0,0 +1,155 @@
+import numpy as np
+from src.atmosfera import us_standard_atmosphere
+from src.funcoes_auxiliares import mach_razao_area, razao_area_mach, empuxo, epsilon_vs_altitude
+from src.termoquimica import pressao_saida_equilibrio, empuxo_equilibrio
+
+"""
+Desempenho de tubeiras de expansão variável (extensíveis ou com razão de
+expansão ajustável em voo), comparado com tubeiras fixas.
+
+A razão de expansão segue um cronograma epsilon(h) dado pelo usuário e
+avaliado de uma vez em todo o array de altitudes. Como epsilon muda a cada
+altitude, a relação área-Mach é invertida em lote para todos os pontos, por
+padrão pela tabela de src.tabela_mach (uma interpolação por ponto, erro
+relativo em Mach abaixo de 1e-7). Com razao_mistura, a pressão de saída e o
+empuxo seguem o equilíbrio químico deslocado (src.termoquimica), como em
+main.py.
+"""
+
+g0 = 9.80665
+
+
+def avaliar_cronograma(cronograma, h):
+    """
+    Razão de expansão nas altitudes h [m].
+
+    Parâmetros:
+    cronograma: função vetorizada h -> epsilon (por exemplo
+                epsilon_vs_altitude), par (altitudes, epsilons) de pontos
+                interpolados linearmente, ou número (tubeira fixa)
+    h: altitudes [m]
+    """
+    h = np.asarray(h, dtype=float)
+    if callable(cronograma):
+        epsilon = cronograma(h)
+    elif np.isscalar(cronograma):
+        epsilon = cronograma
+    else:
+        altitudes, epsilons = cronograma
+        epsilon = np.interp(h, altitudes, epsilons)
+    return np.broadcast_to(np.asarray(epsilon, dtype=float), h.shape)
+
+
+def cronograma_adaptado(P1, k, epsilon_min=1.0, epsilon_max=1000.0):
+    """
+    Cronograma da tubeira adaptada (P2 = P_amb em cada altitude), limitado a
+    [epsilon_min, epsilon_max]: o máximo de empuxo para cada altitude.
+    """
+    def cronograma(h):
+        P_ambiente = us_standard_atmosphere(np.asarray(h, dtype=float))["P"]
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            M = np.sqrt(2 / (k - 1) * ((P_ambiente / P1) ** (-(k - 1) / k) - 1))
+            epsilon = razao_area_mach(M, k)
+        return np.clip(np.nan_to_num(epsilon, nan=epsilon_max), epsilon_min, epsilon_max)
+    return cronograma
+
+
+def _razao_pressoes(epsilon, k, tabelado):
+    if tabelado:
+        from src.tabela_mach import mach_tabelado
+        _, razao = mach_tabelado(epsilon, k)
+    else:
+        _, razao = mach_razao_area(epsilon, k)
+    return razao
+
+
+def _pressao_saida(epsilon, P1, T1, k, razao_mistura, tabelado):
+    if razao_mistura is None:
+        return P1 * _razao_pressoes(epsilon, k, tabelado)
+    return pressao_saida_equilibrio(P1, T1, epsilon, razao_mistura)
+
+
+def _empuxo(P1, T1, At, k, P2, P_ambiente, epsilon, razao_mistura):
+    if razao_mistura is None:
+        return empuxo(P1, At, k, P2, P_ambiente, epsilon)
+    return empuxo_equilibrio(P1, T1, At, epsilon, P_ambiente, razao_mistura)
+
+
+def desempenho_expansao_variavel(h, P1, At, k, mdot, cronograma=epsilon_vs_altitude, P_ambiente=None,
+                                 tabelado=True, T1=None, razao_mistura=None):
+    """
+    Empuxo e impulso específico ao longo de um cronograma epsilon(h).
+
+    Parâmetros:
+    h: altitudes [m]
+    P1: pressão na câmara [Pa]
+    At: área da garganta [m^2]
+    k: razão de calores específicos
+    mdot: vazão mássica [kg/s] (Isp = F / (mdot g0), como em main.py)
+    cronograma: ver avaliar_cronograma
+    P_ambiente: pressões ambiente em h [Pa] (None: atmosfera padrão)
+    tabelado: inverte a relação área-Mach pela tabela (False: Newton em lote)
+    T1: temperatura na câmara [K] (só com razao_mistura)
+    razao_mistura: razão O/F para P2 e empuxo com equilíbrio deslocado (None:
+                   k congelado); mdot deve ser então a vazão em equilíbrio
+                   (vazao_massica_equilibrio)
+
+    Retorna um dicionário de arrays com o formato de h: epsilon, P2, P_ambiente, F e Isp.
+    """
+    if razao_mistura is not None and T1 is None:
+        raise ValueError("O equilíbrio deslocado (razao_mistura) exige a temperatura na câmara T1!")
+    h = np.asarray(h, dtype=float)
+    epsilon = avaliar_cronograma(cronograma, h)
+    if P_ambiente is None:
+        P_ambiente = np.reshape(us_standard_atmosphere(h)["P"], h.shape)
+
+    # Uma inversão por epsilon distinto (trechos constantes do cronograma se repetem)
+    epsilon_unicos, indice = np.unique(epsilon, return_inverse=True)
+    P2 = _pressao_saida(epsilon_unicos, P1, T1, k, razao_mistura, tabelado)[indice.reshape(h.shape)]
+
+    F = _empuxo(P1, T1, At, k, P2, P_ambiente, epsilon, razao_mistura)
+    return {
+        'epsilon': epsilon,
+        'P2': P2,
+        'P_ambiente': P_ambiente,
+        'F': F,
+        'Isp': F / (mdot * g0),
+    }
+
+
+def comparar_envelope(h, P1, At, k, mdot, epsilons_fixos, cronograma=epsilon_vs_altitude, P_ambiente=None,
+                      tabelado=True, T1=None, razao_mistura=None):
+    """
+    Tubeira de expansão variável vs. envelope das tubeiras fixas.
+
+    Parâmetros:
+    epsilons_fixos: razões de expansão das tubeiras fixas (por exemplo Ea,
+                    Eb e Ec de main.py); o envelope é, em cada altitude, o
+                    maior empuxo entre elas (como em figura_envelope)
+    demais: ver desempenho_expansao_variavel
+
+    Retorna o dicionário de desempenho_expansao_variavel com também F_fixas
+    (len(epsilons_fixos), len(h)), F_envelope, Isp_envelope, indice_envelope
+    (a tubeira fixa do envelope em cada altitude) e ganho_F = F - F_envelope.
+    """
+    h = np.asarray(h, dtype=float)
+    if P_ambiente is None:
+        P_ambiente = us_standard_atmosphere(h)["P"]
+    resultado = desempenho_expansao_variavel(h, P1, At, k, mdot, cronograma, P_ambiente, tabelado,
+                                             T1, razao_mistura)
+
+    epsilons_fixos = np.asarray(epsilons_fixos, dtype=float)
+    P2_fixas = _pressao_saida(epsilons_fixos, P1, T1, k, razao_mistura, tabelado)
+    F_fixas = _empuxo(P1, T1, At, k, P2_fixas[:, None], P_ambiente[None, :], epsilons_fixos[:, None],
+                      razao_mistura)
+    indice_envelope = np.argmax(F_fixas, axis=0)
+    F_envelope = F_fixas[indice_envelope, np.arange(h.size)]
+
+    resultado.update({
+        'F_fixas': F_fixas,
+        'F_envelope': F_envelope,
+        'Isp_envelope': F_envelope / (mdot * g0),
+        'indice_envelope': indice_envelope,
+        'ganho_F': resultado['F'] - F_envelope,
+    })
+    return resultado
@@ -1,26 +1,193 @@
-from scipy.optimize import fsolve, brentq
+import math
 import numpy as np
+from src import instrumentacao
+from src.cache import em_cache
 from src.atmosfera import us_standard_atmosphere
 
-def epsilon_k_razaoP2P1(epsilon, k):
-    def mach_area_razao(Me):
-        term1 = (k + 1) / 2
-        term2 = 1 + (k - 1) / 2 * Me ** 2
-        exponent = (k + 1) / (2 * (k - 1))
 
-        area_ratio = (1 / Me) * ((term2 / term1) ** exponent)
-        return epsilon - area_ratio
+def razao_area_mach(Mach, k):
+    """
+    Razão de áreas A/A* para um dado número de Mach (escoamento isentrópico).
+    """
+    term1 = (k + 1) / 2
+    term2 = 1 + (k - 1) / 2 * Mach ** 2
+    exponent = (k + 1) / (2 * (k - 1))
+    return (1 / Mach) * ((term2 / term1) ** exponent)
 
-    try:
-        # Usa bounds (do método) para mach supersônico
-        Mach_saida = brentq(mach_area_razao, 1.001, 20.0)
-    except ValueError:
-        # Fallback para fsolve se brentq falhar
-        Mach_saida = fsolve(mach_area_razao, x0=2.0)[0]
 
-    # Calcula razão de pressão
-    P_ratio = (1 + (k - 1) / 2 * Mach_saida ** 2) ** (-k / (k - 1))
+def mach_razao_area(epsilon, k, supersonico=True, tol=1e-12, max_iter=60):
+    """
+    Resolve a relação área-Mach em lote para arrays de epsilon e k.
 
+    Parâmetros:
+    epsilon: razão de áreas A/A* (escalar ou array, >= 1)
+    k: razão de calores específicos (escalar ou array, broadcast com epsilon)
+    supersonico: True para o ramo supersônico, False para o subsônico
+    tol: tolerância relativa no número de Mach
+    max_iter: número máximo de iterações
+
+    Retorna (Mach, P2/P1) com o formato do broadcast de epsilon e k.
+    As iterações de Newton são feitas em conjunto para todos os elementos;
+    quando o passo sai do intervalo [a, b] que contém a raiz, usa-se bisseção.
+    """
+    epsilon, k = np.broadcast_arrays(np.asarray(epsilon, dtype=float),
+                                     np.asarray(k, dtype=float))
+    forma = epsilon.shape
+    if not forma:
+        # Um único ponto: mesmo método com floats, sem o custo das operações em array
+        M = _mach_escalar(float(epsilon), float(k), supersonico, tol, max_iter)
+        P_ratio = (1 + (k - 1) / 2 * M ** 2) ** (-k / (k - 1))
+        return np.asarray(M), np.asarray(P_ratio)
+    epsilon = epsilon.ravel().copy()
+    k = k.ravel().copy()
+
+    invalido = ~(epsilon >= 1.0)
+    epsilon[invalido] = 1.0
+    log_eps = np.log(epsilon)
+    km1 = k - 1
+    exponent = (k + 1) / (2 * km1)
+
+    # Aproximação perto da garganta: ln(A/A*) ~ 2/(k+1) * (M - 1)^2
+    desvio = np.sqrt((k + 1) / 2 * log_eps)
+
+    if supersonico:
+        # Chute inicial pela forma assintótica A/A* ~ M^(2/(k-1)) para M grande
+        M_assintotico = (epsilon * ((k + 1) / km1) ** exponent) ** (km1 / 2)
+        M = np.where(epsilon < 2.0, 1 + desvio, M_assintotico)
+        a = np.ones_like(epsilon)
+        b = np.maximum(2 * M, 2.0)
+        # Garante que o limite superior contém a raiz
+        while True:
+            fora = np.log(razao_area_mach(b, k)) < log_eps
+            if not fora.any():
+                break
+            b[fora] *= 2
+    else:
+        # Chute inicial pela forma A/A* ~ (2/(k+1))^exp / M para M pequeno
+        M_assintotico = (2 / (k + 1)) ** exponent / epsilon
+        M = np.where(epsilon < 2.0, 1 - desvio, M_assintotico)
+        a = np.full_like(epsilon, np.finfo(float).tiny)
+        b = np.ones_like(epsilon)
+    M = np.clip(M, a, b)
+
+    # Garganta (epsilon = 1): solução exata M = 1 nos dois ramos
+    sonico = epsilon == 1.0
+    M[sonico] = a[sonico] = b[sonico] = 1.0
+
+    # Newton na variável u = ln(M), em que ln(A/A*) é quase linear
+    u, ua, ub = np.log(M), np.log(a), np.log(b)
+    instrumentar = instrumentacao.ativo
+    n_bissecoes = 0
+    for iteracao in range(1, max_iter + 1):
+        M = np.exp(u)
+        term2 = 1 + km1 / 2 * M ** 2
+        # g(u) = ln(A/A*) - ln(epsilon) e sua derivada analítica dg/du
+        g = np.log(razao_area_mach(M, k)) - log_eps
+        dg = (M ** 2 - 1) / term2
+
+        # Atualiza o intervalo: g é crescente no ramo supersônico e
+        # decrescente no subsônico
+        abaixo = (g < 0) if supersonico else (g > 0)
+        ua = np.where(abaixo, u, ua)
+        ub = np.where(abaixo, ub, u)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u_novo = u - g / dg
+        bissecao = ~((u_novo >= ua) & (u_novo <= ub))
+        u_novo = np.where(bissecao, 0.5 * (ua + ub), u_novo)
+        if instrumentar:
+            n_bissecoes += np.count_nonzero(bissecao & ~sonico)
+
+        passo = np.abs(u_novo - u)
+        u = u_novo
+        convergido = (passo <= tol) | (g == 0)
+        if np.all(convergido):
+            break
+
+    if instrumentar:
+        instrumentacao.registrar('mach_razao_area', epsilon.size, iteracao, n_bissecoes,
+                                 np.count_nonzero(~convergido), np.max(np.abs(g), initial=0.0))
+
+    M = np.exp(u)
+    M[invalido] = np.nan
+    P_ratio = (1 + km1 / 2 * M ** 2) ** (-k / km1)
+
+    return M.reshape(forma), P_ratio.reshape(forma)
+
+
+def _mach_escalar(epsilon, k, supersonico, tol, max_iter):
+    # Versão escalar de mach_razao_area (Newton em ln(M) com bisseção)
+    if not epsilon >= 1.0 or epsilon == 1.0:
+        instrumentacao.registrar('mach_razao_area/escalar')
+        return math.nan if not epsilon >= 1.0 else 1.0
+
+    log_eps = math.log(epsilon)
+    km1 = k - 1
+    exponent = (k + 1) / (2 * km1)
+    desvio = math.sqrt((k + 1) / 2 * log_eps)
+
+    if supersonico:
+        if epsilon < 2.0:
+            M = 1 + desvio
+        else:
+            M = (epsilon * ((k + 1) / km1) ** exponent) ** (km1 / 2)
+        a = 1.0
+        b = max(2 * M, 2.0)
+        while math.log(razao_area_mach(b, k)) < log_eps:
+            b *= 2
+    else:
+        if epsilon < 2.0:
+            M = 1 - desvio
+        else:
+            M = (2 / (k + 1)) ** exponent / epsilon
+        a = np.finfo(float).tiny
+        b = 1.0
+    M = min(max(M, a), b)
+
+    u, ua, ub = math.log(M), math.log(a), math.log(b)
+    n_bissecoes = 0
+    for iteracao in range(1, max_iter + 1):
+        M = math.exp(u)
+        g = math.log(razao_area_mach(M, k)) - log_eps
+        dg = (M ** 2 - 1) / (1 + km1 / 2 * M ** 2)
+
+        if (g < 0) if supersonico else (g > 0):
+            ua = u
+        else:
+            ub = u
+
+        u_novo = u - g / dg if dg != 0 else math.nan
+        if not ua <= u_novo <= ub:
+            u_novo = 0.5 * (ua + ub)
+            n_bissecoes += 1
+
+        passo = abs(u_novo - u)
+        u = u_novo
+        convergido = passo <= tol or g == 0
+        if convergido:
+            break
+
+    instrumentacao.registrar('mach_razao_area/escalar', 1, iteracao, n_bissecoes, not convergido, abs(g))
+    return math.exp(u)
+
+
+@em_cache('epsilon_k_razaoP2P1')
+def epsilon_k_razaoP2P1(epsilon, k, tabelado=False):
+    """
+    Razão de pressões P2/P1 na saída para uma razão de expansão epsilon
+    (ramo supersônico).
+
+    Com tabelado=True usa a tabela pré-calculada para o k (src.tabela_mach)
+    em vez de resolver a relação área-Mach a cada chamada.
+    """
+    if tabelado:
+        from src.tabela_mach import mach_tabelado
+        _, P_ratio = mach_tabelado(epsilon, k)
+    else:
+        _, P_ratio = mach_razao_area(epsilon, k)
+
+    if P_ratio.ndim == 0:
+        return float(P_ratio)
     return P_ratio
 
 def empuxo(P1, At, k, P_exit, P_ambient, E):
@@ -35,10 +202,11 @@ def empuxo(P1, At, k, P_exit, P_ambient, E):
 
     return empuxo_momento + empuxo_pressao
 
+def vazao_massica(P1, At, k, R, T1):
+    # Vazão mássica com a garganta bloqueada (M = 1 em At)
+    return At * P1 * np.sqrt(k / (R * T1)) * (2 / (k + 1))**((k + 1) / (2 * (k - 1)))
+
 def epsilon_vs_altitude(h):
-    if h < 30e3:
-        return np.interp(h, [0, 30e3], [50, 200])
-    elif h < 80e3:
-        return np.interp(h, [30e3, 80e3], [200, 600])
-    else:
-        return np.interp(h, [80e3, 120e3], [600, 1000])
\ No newline at end of file
+    # Cronograma de razão de expansão para tubeira de expansão variável:
+    # linear por trechos entre 0, 30, 80 e 120 km (escalar ou array de altitudes)
+    return np.interp(h, [0, 30e3, 80e3, 120e3], [50, 200, 600, 1000])
\ No newline at end of file
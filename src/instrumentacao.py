@@ -0,0 +1,153 @@
+import os
+import json
+import time
+
+"""
+Instrumentação opcional dos solvers e das etapas do cálculo.
+
+Desativada por padrão: nesse caso registrar() retorna logo no início e
+etapa() devolve um gerenciador de contexto vazio, então o custo é de uma
+verificação de atributo por chamada. Para ativar, use ativar() ou defina a
+variável de ambiente X1_INSTRUMENTACAO=1.
+
+Para cada solver são acumulados: chamadas, pontos resolvidos, iterações,
+passos de bisseção (quando o passo de Newton sai do intervalo), pontos
+desviados para um método mais lento (fallback), pontos que atingiram o
+limite de iterações e o maior resíduo final. Para cada etapa
+(atmosfera, empuxo, contorno, exportação, gráficos...) são acumulados o
+número de chamadas e os tempos total e máximo.
+"""
+
+ativo = os.environ.get('X1_INSTRUMENTACAO', '') not in ('', '0')
+
+_solvers = {}
+_etapas = {}
+
+
+def ativar():
+    global ativo
+    ativo = True
+
+
+def desativar():
+    global ativo
+    ativo = False
+
+
+def zerar():
+    _solvers.clear()
+    _etapas.clear()
+
+
+def registrar(solver, pontos=1, iteracoes=0, bissecoes=0, nao_convergidos=0, residuo=0.0, fallbacks=0):
+    """
+    Acumula as estatísticas de uma chamada de solver.
+
+    Parâmetros:
+    solver: nome do solver
+    pontos: número de pontos resolvidos na chamada
+    iteracoes: iterações executadas
+    bissecoes: passos de bisseção usados como salvaguarda (somados nos pontos)
+    nao_convergidos: pontos que atingiram o limite de iterações
+    residuo: maior resíduo final da chamada
+    fallbacks: pontos resolvidos por um método alternativo
+    """
+    if not ativo:
+        return
+    s = _solvers.get(solver)
+    if s is None:
+        s = _solvers[solver] = {'chamadas': 0, 'pontos': 0, 'iteracoes': 0, 'iteracoes_max': 0,
+                                'bissecoes': 0, 'fallbacks': 0, 'nao_convergidos': 0, 'residuo_max': 0.0}
+    s['chamadas'] += 1
+    s['pontos'] += int(pontos)
+    s['iteracoes'] += int(iteracoes)
+    s['iteracoes_max'] = max(s['iteracoes_max'], int(iteracoes))
+    s['bissecoes'] += int(bissecoes)
+    s['fallbacks'] += int(fallbacks)
+    s['nao_convergidos'] += int(nao_convergidos)
+    s['residuo_max'] = max(s['residuo_max'], float(residuo))
+
+
+class _Cronometro:
+    __slots__ = ('nome', 'inicio')
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duracao = time.perf_counter() - self.inicio
+        e = _etapas.get(self.nome)
+        if e is None:
+            e = _etapas[self.nome] = {'chamadas': 0, 'total': 0.0, 'maximo': 0.0}
+        e['chamadas'] += 1
+        e['total'] += duracao
+        e['maximo'] = max(e['maximo'], duracao)
+        return False
+
+
+class _Vazio:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_VAZIO = _Vazio()
+
+
+def etapa(nome):
+    """
+    Gerenciador de contexto que cronometra uma etapa do cálculo:
+
+        with etapa('atmosfera'):
+            ...
+    """
+    if not ativo:
+        return _VAZIO
+    return _Cronometro(nome)
+
+
+def resumo():
+    """
+    Cópia das estatísticas acumuladas: {'solvers': {...}, 'etapas': {...}}.
+    """
+    return {
+        'solvers': {nome: dict(s) for nome, s in _solvers.items()},
+        'etapas': {nome: dict(e) for nome, e in _etapas.items()},
+    }
+
+
+def tabela_resumo():
+    """
+    Resumo em texto, uma linha por solver e por etapa.
+    """
+    linhas = []
+    if _solvers:
+        linhas.append(f'{"solver":28s} {"chamadas":>9s} {"pontos":>10s} {"iter/cham.":>10s} {"iter máx":>8s} '
+                      f'{"bisseções":>10s} {"fallbacks":>9s} {"não conv.":>9s} {"resíduo máx":>12s}')
+        for nome, s in _solvers.items():
+            linhas.append(f'{nome:28s} {s["chamadas"]:9d} {s["pontos"]:10d} '
+                          f'{s["iteracoes"] / s["chamadas"]:10.2f} {s["iteracoes_max"]:8d} '
+                          f'{s["bissecoes"]:10d} {s["fallbacks"]:9d} {s["nao_convergidos"]:9d} '
+                          f'{s["residuo_max"]:12.3e}')
+    if _etapas:
+        if linhas:
+            linhas.append('')
+        total = sum(e['total'] for e in _etapas.values())
+        linhas.append(f'{"etapa":28s} {"chamadas":>9s} {"total (s)":>10s} {"máx (s)":>10s} {"%":>6s}')
+        for nome, e in sorted(_etapas.items(), key=lambda item: -item[1]['total']):
+            linhas.append(f'{nome:28s} {e["chamadas"]:9d} {e["total"]:10.4f} {e["maximo"]:10.4f} '
+                          f'{100 * e["total"] / total if total else 0:6.1f}')
+    return '\n'.join(linhas)
+
+
+def salvar_json(arquivo):
+    with open(arquivo, 'w') as f:
+        json.dump(resumo(), f, indent=2)
@@ -0,0 +1,175 @@
+import os
+import numpy as np
+from src.projeto import ProjetoTubeira
+
+"""
+Exportação da superfície de revolução da tubeira em malha de triângulos
+(STL binário ou OBJ), para CAD e geradores de malha de CFD.
+
+O perfil (x, raio) é girado em torno do eixo x em n_angular passos. Sem
+espessura, a malha é só a parede interna (superfície aberta); com
+espessura, o perfil interno é deslocado ao longo da normal para formar a
+parede externa e as bordas de entrada e saída são fechadas, resultando num
+sólido fechado com normais apontando para fora do material.
+
+Os triângulos são gerados e gravados em blocos de faixas angulares, então
+a memória usada depende de tamanho_bloco e não do tamanho da malha.
+"""
+
+
+def perfil_parede(contorno, n_axial=None, espessura=0.0):
+    """
+    Perfil (x, raio) da parede a ser girado.
+
+    Parâmetros:
+    contorno: ProjetoTubeira (tubeira_sino) ou array (n, 2) de pontos (x, y)
+    n_axial: número de pontos ao longo do perfil, distribuídos uniformemente
+             no comprimento de arco (None mantém os pontos do contorno)
+    espessura: espessura da parede, na unidade do contorno (0 para só a parede interna)
+
+    Retorna (pontos, fechado): pontos (n, 2) e se o perfil é um laço fechado.
+    """
+    if isinstance(contorno, ProjetoTubeira):
+        pontos = contorno.perfil().astype(float)
+    else:
+        pontos = np.asarray(contorno, dtype=float)
+
+    if n_axial is not None:
+        s = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(pontos, axis=0).T))])
+        s_novo = np.linspace(0.0, s[-1], n_axial)
+        pontos = np.column_stack([np.interp(s_novo, s, pontos[:, 0]), np.interp(s_novo, s, pontos[:, 1])])
+
+    if espessura <= 0:
+        return pontos, False
+
+    # Parede externa: deslocamento ao longo da normal do perfil (para longe do eixo)
+    dx, dy = np.gradient(pontos[:, 0]), np.gradient(pontos[:, 1])
+    norma = np.hypot(dx, dy)
+    externo = pontos + espessura * np.column_stack([-dy, dx]) / norma[:, None]
+    if np.any(np.diff(externo[:, 0]) <= 0):
+        raise ValueError("Espessura maior que o raio de curvatura da parede na garganta!")
+
+    # Laço: parede interna da entrada para a saída, externa de volta
+    return np.concatenate([pontos, externo[::-1]]), True
+
+
+def n_triangulos(perfil, fechado, n_angular):
+    n_segmentos = len(perfil) if fechado else len(perfil) - 1
+    return 2 * n_segmentos * n_angular
+
+
+def triangulos(perfil, fechado, n_angular=128, escala=1.0, tamanho_bloco=100000):
+    """
+    Gera os triângulos da superfície de revolução em blocos.
+
+    Parâmetros:
+    perfil, fechado: resultado de perfil_parede
+    n_angular: número de passos angulares na volta completa
+    escala: fator aplicado às coordenadas (por exemplo 1000 para m -> mm)
+    tamanho_bloco: número aproximado de triângulos por bloco
+
+    Cada bloco é um array (n, 3, 3) com os vértices de n triângulos, em
+    coordenadas (x axial, y, z).
+    """
+    x, r = perfil[:, 0] * escala, perfil[:, 1] * escala
+    a = np.arange(len(perfil) if fechado else len(perfil) - 1)
+    b = (a + 1) % len(perfil)
+
+    faixas_bloco = max(1, tamanho_bloco // (2 * len(a)))
+    for j0 in range(0, n_angular, faixas_bloco):
+        j = np.arange(j0, min(j0 + faixas_bloco, n_angular) + 1)
+        # O último anel da volta é o primeiro (mesmos vértices, sem fresta na costura)
+        theta = 2 * np.pi * (j % n_angular) / n_angular
+
+        aneis = np.empty((len(j), len(perfil), 3))
+        aneis[..., 0] = x
+        aneis[..., 1] = np.cos(theta)[:, None] * r
+        aneis[..., 2] = np.sin(theta)[:, None] * r
+
+        v00, v10 = aneis[:-1, a], aneis[:-1, b]
+        v01, v11 = aneis[1:, a], aneis[1:, b]
+        bloco = np.stack([np.stack([v00, v10, v11], axis=2), np.stack([v00, v11, v01], axis=2)], axis=2)
+        yield bloco.reshape(-1, 3, 3)
+
+
+DTYPE_STL = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('atributo', '<u2')])
+
+
+def escrever_stl(contorno, nome_arquivo, n_angular=128, n_axial=None, espessura=0.0, escala=1.0,
+                 tamanho_bloco=100000):
+    """
+    Grava a superfície de revolução em STL binário.
+
+    Parâmetros: ver perfil_parede e triangulos.
+    Retorna o número de triângulos gravados.
+    """
+    perfil, fechado = perfil_parede(contorno, n_axial, espessura)
+    total = n_triangulos(perfil, fechado, n_angular)
+
+    with open(nome_arquivo, 'wb') as f:
+        f.write(b'Tubeira X1 - superficie de revolucao'.ljust(80, b' '))
+        f.write(np.uint32(total).tobytes())
+        for tri in triangulos(perfil, fechado, n_angular, escala, tamanho_bloco):
+            normal = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+            norma = np.linalg.norm(normal, axis=1, keepdims=True)
+            registros = np.zeros(len(tri), DTYPE_STL)
+            registros['normal'] = np.divide(normal, norma, out=np.zeros_like(normal), where=norma > 0)
+            registros['vertices'] = tri
+            f.write(registros.tobytes())
+    return total
+
+
+def _escrever_linhas(f, formato, valores):
+    # Formata o bloco inteiro numa única operação (np.savetxt formata linha a linha)
+    f.write((formato * len(valores)) % tuple(valores.ravel().tolist()))
+
+
+def escrever_obj(contorno, nome_arquivo, n_angular=128, n_axial=None, espessura=0.0, escala=1.0,
+                 tamanho_bloco=100000):
+    """
+    Grava a superfície de revolução em OBJ (vértices compartilhados entre
+    triângulos vizinhos).
+
+    Parâmetros: ver perfil_parede e triangulos.
+    Retorna o número de triângulos gravados.
+    """
+    perfil, fechado = perfil_parede(contorno, n_axial, espessura)
+    n = len(perfil)
+    x, r = perfil[:, 0] * escala, perfil[:, 1] * escala
+    a = np.arange(n if fechado else n - 1)
+    b = (a + 1) % n
+    faixas_bloco = max(1, tamanho_bloco // (2 * len(a)))
+
+    with open(nome_arquivo, 'w') as f:
+        f.write('# Tubeira X1 - superficie de revolucao\n')
+
+        # Vértices: um anel de n pontos por passo angular
+        for j0 in range(0, n_angular, faixas_bloco):
+            theta = 2 * np.pi * np.arange(j0, min(j0 + faixas_bloco, n_angular)) / n_angular
+            aneis = np.empty((len(theta), n, 3))
+            aneis[..., 0] = x
+            aneis[..., 1] = np.cos(theta)[:, None] * r
+            aneis[..., 2] = np.sin(theta)[:, None] * r
+            _escrever_linhas(f, 'v %.9g %.9g %.9g\n', aneis.reshape(-1, 3))
+
+        # Faces (índices a partir de 1), com o último anel ligado ao primeiro
+        for j0 in range(0, n_angular, faixas_bloco):
+            j = np.arange(j0, min(j0 + faixas_bloco, n_angular))[:, None]
+            anel, proximo = j * n + 1, (j + 1) % n_angular * n + 1
+            i00, i10, i11, i01 = anel + a, anel + b, proximo + b, proximo + a
+            faces = np.stack([np.stack([i00, i10, i11], axis=2), np.stack([i00, i11, i01], axis=2)], axis=2)
+            _escrever_linhas(f, 'f %d %d %d\n', faces.reshape(-1, 3))
+
+    return n_triangulos(perfil, fechado, n_angular)
+
+
+def exportar_malha(contorno, nome_arquivo, **kwargs):
+    """
+    Grava a malha em STL ou OBJ conforme a extensão do arquivo.
+    """
+    extensao = os.path.splitext(nome_arquivo)[1].lower()
+    if extensao == '.stl':
+        return escrever_stl(contorno, nome_arquivo, **kwargs)
+    if extensao == '.obj':
+        return escrever_obj(contorno, nome_arquivo, **kwargs)
+    raise ValueError(f"Formato de malha não suportado: {extensao}")
@@ -0,0 +1,230 @@
+import os
+import numpy as np
+from src.atmosfera import us_standard_atmosphere
+from src.funcoes_auxiliares import mach_razao_area, empuxo, vazao_massica
+
+"""
+Propagação de incertezas por Monte Carlo no empuxo e no impulso específico.
+
+As entradas k, R, T1, P1, At e mdot são sorteadas de distribuições dadas e
+cada amostra passa pelo mesmo caminho de main.py: razão de pressões na saída
+(relação área-Mach, resolvida em lote para todos os k do bloco), empuxo em
+cada altitude e Isp = F / (mdot g0). Como em main.py, mdot é uma entrada
+(padrão: a vazão do X1); com mdot = 'garganta' usa-se a vazão da garganta
+bloqueada de cada amostra (a única grandeza que depende de R e T1).
+
+As amostras são processadas em blocos de tamanho_bloco, em paralelo entre
+processos, e nenhum bloco é guardado: de cada um ficam só a média e a soma
+dos quadrados dos desvios (combinadas entre blocos pela fórmula de Chan), o
+mínimo, o máximo e um histograma por altitude. Os limites do
+histograma vêm de um bloco piloto; valores fora deles caem em classes de
+transbordamento. Os percentis são lidos do histograma acumulado, com erro
+da ordem da largura de uma classe (amplitude do piloto / n_classes).
+"""
+
+g0 = 9.80665
+ENTRADAS = ('k', 'R', 'T1', 'P1', 'At', 'mdot')
+# Vazão mássica do X1 em main.py [kg/s], usada quando mdot não é informado
+MDOT_PADRAO = 1200.0
+
+
+def amostrar(rng, distribuicao, n):
+    """
+    Sorteia n valores de uma distribuição.
+
+    Parâmetros:
+    rng: np.random.Generator
+    distribuicao: número (valor fixo) ou tupla com o nome e os parâmetros:
+                  ('normal', media, desvio), ('uniforme', minimo, maximo),
+                  ('triangular', minimo, moda, maximo) ou
+                  ('lognormal', media_log, desvio_log)
+    n: número de amostras
+    """
+    if np.isscalar(distribuicao):
+        return np.full(n, float(distribuicao))
+    nome, *parametros = distribuicao
+    if nome == 'normal':
+        return rng.normal(*parametros, size=n)
+    if nome == 'uniforme':
+        return rng.uniform(*parametros, size=n)
+    if nome == 'triangular':
+        return rng.triangular(*parametros, size=n)
+    if nome == 'lognormal':
+        return rng.lognormal(*parametros, size=n)
+    raise ValueError(f"Distribuição desconhecida: {nome}")
+
+
+def _avaliar(rng, distribuicoes, n, epsilon_unicos, indice_epsilon, P_ambiente):
+    # Empuxo e Isp (n, n_altitudes) de n amostras
+    k, R, T1, P1, At = (amostrar(rng, distribuicoes[nome], n)[:, None] for nome in ENTRADAS[:-1])
+    if distribuicoes['mdot'] == 'garganta':
+        mdot = vazao_massica(P1, At, k, R, T1)
+    else:
+        mdot = amostrar(rng, distribuicoes['mdot'], n)[:, None]
+
+    # Uma solução da relação área-Mach por (amostra, epsilon distinto)
+    _, razao_P = mach_razao_area(epsilon_unicos, k)
+
+    # O empuxo é linear na pressão ambiente: empuxo no vácuo por (amostra,
+    # epsilon) e o termo -P_amb * epsilon * At por altitude
+    F_vacuo = empuxo(P1, At, k, P1 * razao_P, 0.0, epsilon_unicos)
+    F = F_vacuo[:, indice_epsilon] - At * (P_ambiente * epsilon_unicos[indice_epsilon])
+    Isp = F / (mdot * g0)
+    return F, Isp
+
+
+def _histograma(valores, limites, n_classes):
+    # Contagens por altitude: classe 0 abaixo do limite inferior, n_classes + 1 acima
+    inferior, superior = limites
+    posicao = valores - inferior
+    posicao *= n_classes / (superior - inferior)
+    posicao += 1
+    # fmin leva NaN para o transbordamento superior
+    np.fmin(posicao, n_classes + 1, out=posicao)
+    np.fmax(posicao, 0, out=posicao)
+    classe = posicao.astype(np.intp)
+    n_altitudes = valores.shape[1]
+    classe += np.arange(n_altitudes) * (n_classes + 2)
+    return np.bincount(classe.ravel(), minlength=n_altitudes * (n_classes + 2)).reshape(n_altitudes, n_classes + 2)
+
+
+def _resumo_bloco(valores, limites, n_classes):
+    media = np.mean(valores, axis=0)
+    return {
+        'n': len(valores),
+        'contagens': _histograma(valores, limites, n_classes),
+        'media': media,
+        'm2': np.sum((valores - media) ** 2, axis=0),
+        'minimo': np.min(valores, axis=0),
+        'maximo': np.max(valores, axis=0),
+    }
+
+
+def _somar(a, b):
+    # Combinação de médias e somas de quadrados dos desvios de dois grupos (Chan et al.)
+    n = a['n'] + b['n']
+    delta = b['media'] - a['media']
+    return {
+        'n': n,
+        'contagens': a['contagens'] + b['contagens'],
+        'media': a['media'] + delta * b['n'] / n,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['n'] * b['n'] / n,
+        'minimo': np.minimum(a['minimo'], b['minimo']),
+        'maximo': np.maximum(a['maximo'], b['maximo']),
+    }
+
+
+def _avaliar_bloco(argumentos):
+    # Executado nos processos de trabalho: sorteia, avalia e resume um bloco
+    semente, n, distribuicoes, epsilon_unicos, indice_epsilon, P_ambiente, limites, n_classes = argumentos
+    rng = np.random.default_rng(semente)
+    F, Isp = _avaliar(rng, distribuicoes, n, epsilon_unicos, indice_epsilon, P_ambiente)
+    return _resumo_bloco(F, limites['F'], n_classes), _resumo_bloco(Isp, limites['Isp'], n_classes)
+
+
+def _percentis(acumulado, limites, n_classes, percentis, n_amostras):
+    # Interpolação linear dentro da classe que contém cada percentil
+    inferior, superior = limites
+    largura = (superior - inferior) / n_classes
+    acumuladas = np.cumsum(acumulado['contagens'], axis=1)
+    resultado = np.empty((len(percentis), len(inferior)))
+    linhas = np.arange(len(inferior))
+    for i, p in enumerate(percentis):
+        alvo = p / 100 * n_amostras
+        classe = np.argmax(acumuladas >= alvo, axis=1)
+        antes = np.where(classe > 0, acumuladas[linhas, classe - 1], 0)
+        no_intervalo = acumulado['contagens'][linhas, classe]
+        fracao = np.divide(alvo - antes, no_intervalo, out=np.zeros(len(linhas)), where=no_intervalo > 0)
+        valor = inferior + (classe - 1 + fracao) * largura
+        # Transbordamentos: o extremo observado
+        valor = np.where(classe == 0, acumulado['minimo'], valor)
+        valor = np.where(classe == n_classes + 1, acumulado['maximo'], valor)
+        resultado[i] = np.clip(valor, acumulado['minimo'], acumulado['maximo'])
+    return resultado
+
+
+def propagar(h, epsilon, distribuicoes, n_amostras=10**6, percentis=(5, 50, 95), tamanho_bloco=20000,
+             n_classes=2048, processos=None, semente=0):
+    """
+    Faixas de percentis do empuxo e do Isp por altitude.
+
+    Parâmetros:
+    h: altitudes [m]
+    epsilon: razão de expansão (escalar ou uma por altitude, por exemplo a
+             do estágio ativo em cada altitude)
+    distribuicoes: dicionário com k, R, T1, P1, At e, opcionalmente, mdot
+                   (ver amostrar; mdot ausente vale MDOT_PADRAO e 'garganta'
+                   usa a vazão da garganta bloqueada)
+    n_amostras: número total de amostras
+    percentis: percentis calculados [%]
+    tamanho_bloco: amostras por bloco (a memória usada é proporcional a
+                   tamanho_bloco * len(h))
+    n_classes: classes do histograma de cada altitude
+    processos: número de processos (1 para executar no processo atual;
+               None usa todos os núcleos)
+    semente: semente do gerador (os blocos usam sementes derivadas dela, então
+             o resultado não depende do número de processos)
+
+    Retorna um dicionário com h, percentis, n_amostras e, para F e Isp,
+    arrays (len(percentis), len(h)) com os percentis e arrays (len(h),) com
+    média e desvio padrão (chaves F_media, F_desvio, Isp_media, Isp_desvio).
+    """
+    distribuicoes = {'mdot': MDOT_PADRAO, **distribuicoes}
+    faltando = set(ENTRADAS) - set(distribuicoes)
+    if faltando:
+        raise ValueError(f"Distribuições ausentes: {sorted(faltando)}")
+    distribuicoes = {nome: distribuicoes[nome] for nome in ENTRADAS}
+
+    h = np.atleast_1d(np.asarray(h, dtype=float))
+    epsilon = np.broadcast_to(np.asarray(epsilon, dtype=float), h.shape)
+    epsilon_unicos, indice_epsilon = np.unique(epsilon, return_inverse=True)
+    P_ambiente = us_standard_atmosphere(h)["P"]
+
+    tamanhos = [min(tamanho_bloco, n_amostras - inicio) for inicio in range(0, n_amostras, tamanho_bloco)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+
+    # Bloco piloto (o primeiro): fixa os limites dos histogramas
+    rng = np.random.default_rng(sementes[0])
+    F, Isp = _avaliar(rng, distribuicoes, tamanhos[0], epsilon_unicos, indice_epsilon, P_ambiente)
+    limites = {}
+    for nome, valores in (('F', F), ('Isp', Isp)):
+        minimo, maximo = np.nanmin(valores, axis=0), np.nanmax(valores, axis=0)
+        margem = np.maximum(0.25 * (maximo - minimo), 1e-9 * np.maximum(np.abs(maximo), 1.0))
+        limites[nome] = (minimo - margem, maximo + margem)
+    acumulado_F = _resumo_bloco(F, limites['F'], n_classes)
+    acumulado_Isp = _resumo_bloco(Isp, limites['Isp'], n_classes)
+    del F, Isp
+
+    pendentes = [(s, n, distribuicoes, epsilon_unicos, indice_epsilon, P_ambiente, limites, n_classes)
+                 for s, n in zip(sementes[1:], tamanhos[1:])]
+    if processos == 1 or not pendentes:
+        for bloco_F, bloco_Isp in map(_avaliar_bloco, pendentes):
+            acumulado_F = _somar(acumulado_F, bloco_F)
+            acumulado_Isp = _somar(acumulado_Isp, bloco_Isp)
+    else:
+        # Importado só quando há processos
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        processos = processos or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            # No máximo 2 blocos por processo em andamento, para limitar a memória
+            fila = iter(pendentes)
+            em_andamento = set()
+            while True:
+                for argumentos in fila:
+                    em_andamento.add(executor.submit(_avaliar_bloco, argumentos))
+                    if len(em_andamento) >= 2 * processos:
+                        break
+                if not em_andamento:
+                    break
+                prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    bloco_F, bloco_Isp = futuro.result()
+                    acumulado_F = _somar(acumulado_F, bloco_F)
+                    acumulado_Isp = _somar(acumulado_Isp, bloco_Isp)
+
+    resultado = {'h': h, 'percentis': np.asarray(percentis, dtype=float), 'n_amostras': n_amostras}
+    for nome, acumulado in (('F', acumulado_F), ('Isp', acumulado_Isp)):
+        resultado[nome] = _percentis(acumulado, limites[nome], n_classes, percentis, n_amostras)
+        resultado[f'{nome}_media'] = acumulado['media']
+        resultado[f'{nome}_desvio'] = np.sqrt(acumulado['m2'] / max(n_amostras - 1, 1))
+    return resultado
@@ -0,0 +1,200 @@
+import numpy as np
+from src.atmosfera import us_standard_atmosphere
+from src.funcoes_auxiliares import empuxo
+from src.tabela_mach import mach_tabelado
+
+"""
+Otimização das razões de expansão e das altitudes de troca de estágio.
+
+Cada estágio i usa uma tubeira de razão epsilon[i] entre as altitudes
+h_troca[i-1] e h_troca[i]. O objetivo é o empuxo (ou impulso específico)
+integrado ao longo do perfil de altitudes, opcionalmente ponderado.
+
+A busca é feita em duas etapas, sempre com lotes vetorizados:
+1. programação dinâmica em uma malha grossa de epsilon e de altitudes, que
+   encontra a melhor divisão em estágios e a melhor tubeira de cada um;
+2. refinamento alternado: epsilon de cada estágio em lotes de candidatos
+   cada vez mais próximos do ótimo, e cada altitude de troca no ponto que
+   maximiza o ganho acumulado entre os estágios vizinhos.
+
+As razões de pressão vêm das tabelas de src.tabela_mach, então repetir a
+otimização com outras condições de câmara não resolve a relação área-Mach
+de novo.
+"""
+
+g = 9.80665
+
+
+def curvas_empuxo(epsilon, P1, At, k, P_ambiente):
+    """
+    Empuxo de cada tubeira em cada altitude, formato (n_epsilon, n_altitudes).
+    """
+    epsilon = np.atleast_1d(np.asarray(epsilon, dtype=float))
+    _, razao_P = mach_tabelado(epsilon, k)
+    P2 = P1 * razao_P
+    return empuxo(P1, At, k, P2[:, None], P_ambiente[None, :], epsilon[:, None])
+
+
+def _pesos_trapezio(h):
+    # Peso de cada nó na regra do trapézio
+    dh = np.diff(h)
+    w = np.zeros_like(h)
+    w[:-1] += dh / 2
+    w[1:] += dh / 2
+    return w
+
+
+def _divisao_otima(valores, n_estagios):
+    """
+    Programação dinâmica: divide os nós em n_estagios intervalos contíguos
+    maximizando a soma do melhor candidato de cada intervalo.
+
+    valores: contribuição de cada candidato em cada nó (n_candidatos, n_nos)
+    Retorna (limites, candidatos), com limites[i] o primeiro nó do estágio i+1.
+    """
+    n_nos = valores.shape[1]
+    acumulado = np.concatenate([np.zeros((valores.shape[0], 1)), np.cumsum(valores, axis=1)], axis=1)
+
+    # Valor do melhor candidato em cada intervalo [a, b)
+    V = np.full((n_nos + 1, n_nos + 1), -np.inf)
+    melhor = np.zeros((n_nos + 1, n_nos + 1), dtype=np.intp)
+    for a in range(n_nos):
+        trecho = acumulado[:, a + 1:] - acumulado[:, a:a + 1]
+        melhor[a, a + 1:] = np.argmax(trecho, axis=0)
+        V[a, a + 1:] = np.take_along_axis(trecho, melhor[a:a + 1, a + 1:], axis=0)[0]
+
+    total = V[0].copy()
+    origem = []
+    for _ in range(1, n_estagios):
+        candidato = total[:, None] + V
+        origem.append(np.argmax(candidato, axis=0))
+        total = np.max(candidato, axis=0)
+
+    # Reconstrução dos limites a partir do último nó
+    limites = [n_nos]
+    for o in reversed(origem):
+        limites.append(o[limites[-1]])
+    limites.append(0)
+    limites = limites[::-1]
+    candidatos = [melhor[a, b] for a, b in zip(limites[:-1], limites[1:])]
+    return limites[1:-1], candidatos
+
+
+def otimizar_estagios(n_estagios, P1, At, k, h=None, mdot=None, objetivo='empuxo', peso=None,
+                      epsilon_min=2.0, epsilon_max=500.0, n_epsilon=128, passo_grosso=5,
+                      iteracoes=6, n_candidatos=64):
+    """
+    Escolhe as razões de expansão e as altitudes de troca que maximizam o
+    desempenho integrado ao longo do perfil.
+
+    Parâmetros:
+    n_estagios: número de tubeiras (estágios)
+    P1: pressão na câmara [Pa]
+    At: área da garganta [m^2]
+    k: razão de calores específicos
+    h: perfil de altitudes [m] (padrão: 0 a 120 km a cada 100 m)
+    mdot: vazão mássica [kg/s], necessária para objetivo='isp'
+    objetivo: 'empuxo' (integral de F) ou 'isp' (integral de Isp)
+    peso: peso opcional de cada altitude (por exemplo, tempo de voo)
+    epsilon_min, epsilon_max, n_epsilon: malha grossa de razões de expansão
+    passo_grosso: a programação dinâmica usa um nó de altitude a cada passo_grosso
+    iteracoes: ciclos de refinamento
+    n_candidatos: candidatos de epsilon avaliados por estágio em cada ciclo
+
+    Retorna um dicionário com epsilon, h_troca, o valor do objetivo, e as
+    curvas F e Isp (se mdot for dado) da solução ao longo de h.
+    """
+    if objetivo not in ('empuxo', 'isp'):
+        raise ValueError("objetivo deve ser 'empuxo' ou 'isp'!")
+    if objetivo == 'isp' and mdot is None:
+        raise ValueError("objetivo='isp' requer mdot!")
+
+    if h is None:
+        h = np.linspace(0, 120e3, 1201)
+    h = np.asarray(h, dtype=float)
+    P_ambiente = us_standard_atmosphere(h)["P"]
+
+    w = _pesos_trapezio(h)
+    if peso is not None:
+        w = w * np.asarray(peso, dtype=float)
+    escala = 1 / (mdot * g) if objetivo == 'isp' else 1.0
+
+    # 1. Programação dinâmica na malha grossa
+    eps_grosso = np.geomspace(epsilon_min, epsilon_max, n_epsilon)
+    contrib = curvas_empuxo(eps_grosso, P1, At, k, P_ambiente) * w
+    # Agrupa os nós de altitude de passo_grosso em passo_grosso
+    grupos = np.arange(0, h.size, passo_grosso)
+    limites, candidatos = _divisao_otima(np.add.reduceat(contrib, grupos, axis=1), n_estagios)
+
+    epsilon = eps_grosso[candidatos]
+    limites = np.concatenate([[0], grupos[limites], [h.size]])
+
+    # 2. Refinamento alternado
+    largura = np.log(epsilon_max / epsilon_min) / n_epsilon * 4
+    for _ in range(iteracoes):
+        # Candidatos de epsilon de todos os estágios em um único lote
+        fatores = np.exp(np.linspace(-largura, largura, n_candidatos))
+        candidatos = np.clip(epsilon[:, None] * fatores[None, :], epsilon_min, epsilon_max)
+        F_cand = curvas_empuxo(candidatos.ravel(), P1, At, k, P_ambiente)
+        F_cand = F_cand.reshape(n_estagios, n_candidatos, h.size) * w
+
+        acumulado = np.concatenate([np.zeros(F_cand.shape[:2] + (1,)), np.cumsum(F_cand, axis=2)], axis=2)
+        inicio, fim = limites[:-1], limites[1:]
+        estagios = np.arange(n_estagios)
+        J = acumulado[estagios, :, fim] - acumulado[estagios, :, inicio]
+        epsilon = candidatos[estagios, np.argmax(J, axis=1)]
+
+        # Altitudes de troca: maximiza o ganho de manter o estágio i em vez de i+1
+        F_otimo = curvas_empuxo(epsilon, P1, At, k, P_ambiente) * w
+        for i in range(n_estagios - 1):
+            a, b = limites[i], limites[i + 2]
+            ganho = np.concatenate([[0], np.cumsum(F_otimo[i, a:b] - F_otimo[i + 1, a:b])])
+            limites[i + 1] = a + np.argmax(ganho)
+
+        largura /= 4
+
+    # Curvas finais da solução
+    F_estagios = curvas_empuxo(epsilon, P1, At, k, P_ambiente)
+    estagio = np.searchsorted(limites[1:-1], np.arange(h.size), side='right')
+    F = F_estagios[estagio, np.arange(h.size)]
+
+    h_troca = h[limites[1:-1]]
+    resultado = {
+        'epsilon': epsilon,
+        'h_troca': h_troca,
+        'objetivo': np.sum(F * w) * escala,
+        'h': h,
+        'estagio': estagio,
+        'F': F,
+    }
+    if mdot is not None:
+        resultado['Isp'] = F / (mdot * g)
+    return resultado
+
+
+def avaliar_estagios(epsilon, h_troca, P1, At, k, h, mdot=None, objetivo='empuxo', peso=None):
+    """
+    Valor do objetivo para vários conjuntos de estágios de uma vez.
+
+    Parâmetros:
+    epsilon: razões de expansão, formato (n_conjuntos, n_estagios)
+    h_troca: altitudes de troca, formato (n_conjuntos, n_estagios - 1)
+    demais: ver otimizar_estagios
+
+    Retorna um array (n_conjuntos,) com o valor do objetivo.
+    """
+    epsilon = np.atleast_2d(np.asarray(epsilon, dtype=float))
+    h_troca = np.asarray(h_troca, dtype=float).reshape(epsilon.shape[0], -1)
+    h = np.asarray(h, dtype=float)
+    P_ambiente = us_standard_atmosphere(h)["P"]
+
+    w = _pesos_trapezio(h)
+    if peso is not None:
+        w = w * np.asarray(peso, dtype=float)
+    escala = 1 / (mdot * g) if objetivo == 'isp' else 1.0
+
+    F = curvas_empuxo(epsilon.ravel(), P1, At, k, P_ambiente).reshape(epsilon.shape + (h.size,))
+    # Estágio ativo em cada altitude para cada conjunto
+    estagio = np.sum(h[None, None, :] >= h_troca[:, :, None], axis=1)
+    F_ativo = np.take_along_axis(F, estagio[:, None, :], axis=1)[:, 0, :]
+    return np.sum(F_ativo * w, axis=1) * escala
@@ -0,0 +1,176 @@
+import numpy as np
+from src.instrumentacao import etapa
+
+"""
+Grafo de dependências para cálculos incrementais.
+
+Cada nó tem um nome, uma função e a lista das entradas de que depende
+(parâmetros ou outros nós); a função recebe os valores das entradas na
+ordem declarada. Parâmetros e nós têm um número de versão, e cada nó guarda
+as versões das entradas com que foi calculado: ao pedir um valor, só os nós
+com alguma entrada em versão diferente são recalculados.
+
+A versão de um nó só muda se o novo valor for diferente do anterior. Assim,
+uma alteração que não muda um resultado intermediário (por exemplo Hd, que
+não afeta as altitudes do estágio 1) não se propaga além dele.
+
+    grafo = Grafo()
+    grafo.atualizar({'a': 1, 'b': 2})
+    grafo.no('soma', lambda a, b: a + b, ['a', 'b'])
+    grafo.valor('soma')          # calcula
+    grafo.atualizar({'a': 1})    # mesmo valor: nada invalidado
+    grafo.valor('soma')          # reaproveita
+"""
+
+
+def _iguais(a, b):
+    # Comparação de valores de nós (arrays, tuplas, listas e dicionários aninhados)
+    if a is b:
+        return True
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        if not (isinstance(a, np.ndarray) and isinstance(b, np.ndarray)):
+            return False
+        if a.shape != b.shape or a.dtype != b.dtype:
+            return False
+        return np.array_equal(a, b, equal_nan=np.issubdtype(a.dtype, np.inexact))
+    if isinstance(a, (tuple, list)):
+        return type(a) is type(b) and len(a) == len(b) and all(_iguais(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return (isinstance(b, dict) and a.keys() == b.keys()
+                and all(_iguais(a[chave], b[chave]) for chave in a))
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+def _chamar(tarefa):
+    # Executa a função de um nó, cronometrada na etapa do nó (se houver).
+    # Único caminho de execução: usado por valor() e, em série ou nos
+    # processos de trabalho, por valores()
+    nome_etapa, funcao, argumentos = tarefa
+    if nome_etapa is None:
+        return funcao(*argumentos)
+    with etapa(nome_etapa):
+        return funcao(*argumentos)
+
+
+class _No:
+    __slots__ = ('funcao', 'entradas', 'etapa', 'valor', 'versoes_entradas')
+
+    def __init__(self, funcao, entradas, etapa):
+        self.funcao = funcao
+        self.entradas = tuple(entradas)
+        self.etapa = etapa
+        self.valor = None
+        self.versoes_entradas = None        # None: nunca calculado
+
+
+class Grafo:
+    """
+    Grafo de parâmetros e nós calculados sob demanda.
+
+    calculos conta quantas vezes cada nó foi executado e recalculados lista,
+    em ordem, os nós executados desde a última chamada de atualizar().
+    """
+
+    def __init__(self):
+        self._parametros = {}
+        self._nos = {}
+        self._versoes = {}
+        self.calculos = {}
+        self.recalculados = []
+
+    def atualizar(self, parametros):
+        """
+        Define ou altera parâmetros. Retorna os nomes dos que mudaram de valor
+        (os nós que dependem deles serão recalculados quando pedidos).
+        """
+        alterados = []
+        for nome, valor in parametros.items():
+            if nome in self._nos:
+                raise ValueError(f"'{nome}' é um nó do grafo, não um parâmetro")
+            if nome in self._parametros and _iguais(self._parametros[nome], valor):
+                continue
+            self._parametros[nome] = valor
+            self._versoes[nome] = self._versoes.get(nome, 0) + 1
+            alterados.append(nome)
+        self.recalculados = []
+        return alterados
+
+    def no(self, nome, funcao, entradas=(), etapa=None):
+        """
+        Registra o nó nome = funcao(*entradas).
+
+        Parâmetros:
+        nome: nome do nó
+        funcao: função chamada com os valores das entradas
+        entradas: nomes dos parâmetros e nós de que o nó depende
+        etapa: nome da etapa cronometrada em src.instrumentacao (None: sem cronometragem,
+               para nós triviais como os que só juntam outros nós)
+        """
+        if nome in self._parametros:
+            raise ValueError(f"'{nome}' já é um parâmetro do grafo")
+        self._nos[nome] = _No(funcao, entradas, etapa)
+        self._versoes[nome] = 0
+
+    def __contains__(self, nome):
+        return nome in self._parametros or nome in self._nos
+
+    def versao(self, nome):
+        """Versão atual de um parâmetro ou nó (após atualizá-lo)."""
+        self._atualizar_no(nome)
+        return self._versoes[nome]
+
+    def valor(self, nome):
+        """Valor de um parâmetro ou nó, recalculando só o que estiver desatualizado."""
+        return self._atualizar_no(nome)
+
+    def valores(self, nomes, mapa=map):
+        """
+        Valores de vários nós. Os desatualizados são calculados com
+        mapa(funcao, tarefas), por exemplo o map de um ProcessPoolExecutor
+        (as funções desses nós devem então poder ser serializadas).
+        """
+        nomes = list(nomes)
+        pendentes = [nome for nome in nomes if self._pendente(nome)]
+        if pendentes:
+            tarefas = [self._tarefa(nome) for nome in pendentes]
+            for nome, valor in zip(pendentes, mapa(_chamar, tarefas)):
+                self._guardar(nome, valor)
+        return [self._atualizar_no(nome) for nome in nomes]
+
+    def pendentes(self, nomes):
+        """Nós de nomes que seriam recalculados (as entradas são atualizadas antes)."""
+        return [nome for nome in nomes if self._pendente(nome)]
+
+    def _pendente(self, nome):
+        no = self._nos.get(nome)
+        if no is None:
+            if nome not in self._parametros:
+                raise KeyError(f"'{nome}' não é parâmetro nem nó do grafo")
+            return False
+        versoes = tuple(self.versao(entrada) for entrada in no.entradas)
+        return versoes != no.versoes_entradas
+
+    def _atualizar_no(self, nome):
+        if nome in self._parametros:
+            return self._parametros[nome]
+        if self._pendente(nome):
+            self._guardar(nome, _chamar(self._tarefa(nome)))
+        return self._nos[nome].valor
+
+    def _tarefa(self, nome):
+        # (etapa, função, valores das entradas) de um nó, para _chamar
+        no = self._nos[nome]
+        return no.etapa, no.funcao, [self._atualizar_no(entrada) for entrada in no.entradas]
+
+    def _guardar(self, nome, valor):
+        no = self._nos[nome]
+        novo = no.versoes_entradas is None or not _iguais(no.valor, valor)
+        no.versoes_entradas = tuple(self._versoes[entrada] for entrada in no.entradas)
+        no.valor = valor
+        if novo:
+            self._versoes[nome] += 1
+        self.calculos[nome] = self.calculos.get(nome, 0) + 1
+        self.recalculados.append(nome)
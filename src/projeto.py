@@ -0,0 +1,134 @@
+import numpy as np
+
+"""
+Contêiner compacto de um projeto de tubeira.
+
+Os pontos (x, y) da metade superior do contorno ficam num único array
+contíguo (n_pontos, 2); as seções (entrada da garganta, saída da garganta e
+sino) são trechos dele, delimitados por deslocamentos. As metades inferiores
+(-y) não são guardadas: são calculadas quando pedidas.
+
+Projetos de uma varredura (tubeira_sino_lote) podem ser vistas de um mesmo
+array (n_projetos, n_pontos, 2), compartilhando também a tupla de
+deslocamentos: cada projeto custa os bytes dos seus pontos (4 ou 8 por
+coordenada) e algumas centenas de bytes do objeto.
+"""
+
+ENTRADA_GARGANTA, SAIDA_GARGANTA, SINO = range(3)
+
+
+class ProjetoTubeira:
+    """
+    Contorno e metadados de uma tubeira.
+
+    Atributos:
+    pontos: array (n_pontos, 2) com os pontos (x, y) das seções, em sequência
+    secoes: deslocamentos (0, fim da entrada, fim da saída da garganta, n_pontos)
+    Ln: comprimento da tubeira
+    theta_n, theta_e: ângulos da parede no início e no fim do sino [rad]
+    epsilon: razão de expansão (Ae/At)
+    Rt: raio da garganta (mesma unidade dos pontos)
+    """
+    __slots__ = ('pontos', 'secoes', 'Ln', 'theta_n', 'theta_e', 'epsilon', 'Rt')
+
+    def __init__(self, pontos, secoes, Ln, theta_n, theta_e, epsilon, Rt):
+        self.pontos = pontos
+        self.secoes = secoes
+        self.Ln = float(Ln)
+        self.theta_n = float(theta_n)
+        self.theta_e = float(theta_e)
+        self.epsilon = float(epsilon)
+        self.Rt = float(Rt)
+
+    @classmethod
+    def de_secoes(cls, secoes, angulos, epsilon, Rt, dtype=np.float64):
+        """
+        Projeto a partir das seções [(x, y), ...] (entrada da garganta, saída
+        da garganta e sino) e dos ângulos (Ln, theta_n, theta_e), copiados para
+        um array contíguo do tipo dtype (np.float64 ou np.float32).
+        """
+        tamanhos = [len(x) for x, _ in secoes]
+        pontos = np.empty((sum(tamanhos), 2), dtype=dtype)
+        inicio = 0
+        for (x, y), n in zip(secoes, tamanhos):
+            pontos[inicio:inicio + n, 0] = x
+            pontos[inicio:inicio + n, 1] = y
+            inicio += n
+        return cls(pontos, (0, *np.cumsum(tamanhos).tolist()), *angulos, epsilon, Rt)
+
+    @classmethod
+    def do_lote(cls, angulos, contornos, epsilon, Rt, dtype=None):
+        """
+        Projetos de tubeira_sino_lote: angulos (n_projetos, 3), contornos
+        (n_projetos, 3 * intervalo, 2) e epsilon e Rt escalares ou um por
+        projeto. Os projetos são vistas de contornos (ou de uma cópia do tipo
+        dtype) e compartilham os deslocamentos das seções.
+        """
+        if dtype is not None:
+            contornos = np.ascontiguousarray(contornos, dtype=dtype)
+        n_projetos, n_pontos, _ = contornos.shape
+        epsilon, Rt = (np.broadcast_to(np.asarray(v, dtype=float), (n_projetos,)).tolist() for v in (epsilon, Rt))
+        n = n_pontos // 3
+        secoes = (0, n, 2 * n, n_pontos)
+        return [cls(contornos[i], secoes, *angulos[i].tolist(), epsilon[i], Rt[i]) for i in range(n_projetos)]
+
+    def __eq__(self, outro):
+        if not isinstance(outro, ProjetoTubeira):
+            return NotImplemented
+        return (self.metadados == outro.metadados and self.secoes == outro.secoes
+                and self.pontos.dtype == outro.pontos.dtype and np.array_equal(self.pontos, outro.pontos))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f'ProjetoTubeira(epsilon={self.epsilon:g}, Rt={self.Rt:g}, Ln={self.Ln:g}, '
+                f'n_pontos={len(self.pontos)}, dtype={self.pontos.dtype})')
+
+    @property
+    def metadados(self):
+        return self.Ln, self.theta_n, self.theta_e, self.epsilon, self.Rt
+
+    @property
+    def angulos(self):
+        """(Ln, theta_n, theta_e), como retornado por angulos_paredes."""
+        return self.Ln, self.theta_n, self.theta_e
+
+    @property
+    def x(self):
+        return self.pontos[:, 0]
+
+    @property
+    def y(self):
+        return self.pontos[:, 1]
+
+    @property
+    def nbytes(self):
+        return self.pontos.nbytes
+
+    def secao(self, i, inferior=False):
+        """
+        (x, y) da seção i (ENTRADA_GARGANTA, SAIDA_GARGANTA ou SINO), vistas de
+        pontos; com inferior=True, y é a metade espelhada (-y, calculada).
+        """
+        trecho = self.pontos[self.secoes[i]:self.secoes[i + 1]]
+        return trecho[:, 0], (-trecho[:, 1] if inferior else trecho[:, 1])
+
+    def perfil(self):
+        """
+        Pontos (n, 2) do contorno superior sem as duplicatas nas junções das
+        seções (o último ponto de cada seção é o primeiro da seguinte).
+        """
+        juncoes = [fim - 1 for inicio, fim in zip(self.secoes[:-2], self.secoes[1:-1]) if fim > inicio]
+        return np.delete(self.pontos, juncoes, axis=0)
+
+    def astype(self, dtype):
+        """Cópia com os pontos no tipo dtype (por exemplo np.float32)."""
+        return ProjetoTubeira(self.pontos.astype(dtype), self.secoes, *self.metadados)
+
+    @property
+    def contorno(self):
+        """
+        Tupla (xe, ye, nye, xe2, ye2, nye2, xsino, ysino, nysino) do formato
+        anterior de tubeira_sino (as metades inferiores são calculadas).
+        """
+        return tuple(v for i in range(3) for v in (*self.secao(i), -self.secao(i)[1]))
@@ -0,0 +1,143 @@
+import numpy as np
+from src.atmosfera import us_standard_atmosphere
+from src.funcoes_auxiliares import mach_razao_area, razao_area_mach, empuxo
+
+"""
+Separação do escoamento na tubeira fora do ponto de projeto.
+
+Com a tubeira muito sobre-expandida, a camada limite não suporta o aumento
+de pressão até a ambiente e o escoamento descola da parede antes da saída.
+A pressão na parede no ponto de separação, P_sep, vem de um critério
+empírico:
+- Summerfield: P_sep = coeficiente * P_amb (coeficiente entre 0.25 e 0.4);
+- Schmucker: P_sep / P_amb = (1.88 M_sep - 1)^(-0.64), com M_sep o Mach
+  na parede no ponto de separação.
+
+A posição da separação é a razão de áreas em que a pressão isentrópica na
+parede iguala P_sep. O empuxo corrigido considera a tubeira truncada nesse
+ponto (a jusante, a parede fica à pressão ambiente e não contribui).
+
+Todas as funções aceitam arrays que se combinam por broadcast, então uma
+grade de projetos x altitudes é avaliada de uma vez.
+"""
+
+SUBEXPANDIDA = 0        # P2 >= P_amb: expansão continua fora da tubeira
+SOBREEXPANDIDA = 1      # P2 < P_amb, escoamento colado até a saída (choques oblíquos no bocal)
+SEPARADA = 2            # separação dentro da tubeira
+
+CRITERIOS = ('schmucker', 'summerfield')
+
+
+def _razao_pressao(M, k):
+    # P/P1 isentrópica
+    return (1 + (k - 1) / 2 * M * M) ** (-k / (k - 1))
+
+
+def _mach_pressao(razao, k):
+    # Mach em que P/P1 = razao (inversa de _razao_pressao)
+    return np.sqrt(2 / (k - 1) * (razao ** (-(k - 1) / k) - 1))
+
+
+def _mach_schmucker(ln_P1_Pamb, k, M_e, tol=1e-12, max_iter=60):
+    """
+    Mach de separação pelo critério de Schmucker: raiz em (1, M_e) de
+    g(M) = ln(P/P1) + ln(P1/P_amb) + 0.64 ln(1.88 M - 1), que é positiva na
+    garganta e negativa na saída para os pontos separados. Newton com
+    salvaguarda de bisseção, em lote.
+    """
+    a = np.ones_like(M_e)
+    b = M_e.copy()
+    M = 0.5 * (a + b)
+    for _ in range(max_iter):
+        termo = 1 + (k - 1) / 2 * M * M
+        g = -k / (k - 1) * np.log(termo) + ln_P1_Pamb + 0.64 * np.log(1.88 * M - 1)
+        dg = -k * M / termo + 0.64 * 1.88 / (1.88 * M - 1)
+
+        positivo = g > 0
+        a = np.where(positivo, M, a)
+        b = np.where(positivo, b, M)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            M_novo = M - g / dg
+        M_novo = np.where((M_novo > a) & (M_novo < b), M_novo, 0.5 * (a + b))
+        passo = np.abs(M_novo - M)
+        M = M_novo
+        if np.all(passo <= tol * M):
+            break
+    return M
+
+
+def analisar_separacao(P1, At, k, epsilon, P_ambiente, criterio='schmucker', coeficiente=0.4):
+    """
+    Regime do escoamento, ponto de separação e empuxo corrigido.
+
+    Parâmetros:
+    P1: pressão na câmara [Pa]
+    At: área da garganta [m^2]
+    k: razão de calores específicos
+    epsilon: razão de expansão da tubeira
+    P_ambiente: pressão ambiente [Pa]
+    criterio: 'schmucker' ou 'summerfield'
+    coeficiente: P_sep / P_amb no critério de Summerfield
+
+    Os argumentos são combinados por broadcast (por exemplo epsilon[:, None]
+    e P_ambiente[None, :] para uma grade projetos x altitudes). Retorna um
+    dicionário de arrays com esse formato: P2 (pressão de saída ideal),
+    P_sep (pressão de separação na parede), epsilon_sep (razão de áreas no
+    ponto de separação, igual a epsilon sem separação), separado, regime
+    (SUBEXPANDIDA, SOBREEXPANDIDA ou SEPARADA), F_ideal e F (corrigido).
+    """
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Critério de separação desconhecido: {criterio}")
+
+    # Solução da relação área-Mach só no formato de (epsilon, k), sem as altitudes
+    M_e, razao_e = mach_razao_area(epsilon, k)
+    P1, At, k, epsilon, P_ambiente, M_e, razao_e = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (P1, At, k, epsilon, P_ambiente, M_e, razao_e)))
+    P2 = P1 * razao_e
+
+    # Pressão de separação na saída; há separação se P2 estiver abaixo dela
+    with np.errstate(divide='ignore'):
+        if criterio == 'summerfield':
+            P_sep_saida = coeficiente * P_ambiente
+        else:
+            P_sep_saida = P_ambiente * (1.88 * M_e - 1) ** (-0.64)
+    separado = P2 < P_sep_saida
+
+    M_sep = M_e.copy()
+    if np.any(separado):
+        P1_s, P_amb_s, k_s = P1[separado], P_ambiente[separado], k[separado]
+        if criterio == 'summerfield':
+            M_sep[separado] = _mach_pressao(coeficiente * P_amb_s / P1_s, k_s)
+        else:
+            M_sep[separado] = _mach_schmucker(np.log(P1_s / P_amb_s), k_s, M_e[separado])
+
+    P_sep = P1 * _razao_pressao(M_sep, k)
+    epsilon_sep = np.where(separado, razao_area_mach(M_sep, k), epsilon)
+
+    regime = np.where(separado, SEPARADA, np.where(P2 >= P_ambiente, SUBEXPANDIDA, SOBREEXPANDIDA))
+    F_ideal = empuxo(P1, At, k, P2, P_ambiente, epsilon)
+    # Tubeira truncada no ponto de separação
+    F = np.where(separado, empuxo(P1, At, k, P_sep, P_ambiente, epsilon_sep), F_ideal)
+
+    return {
+        'P2': P2,
+        'P_sep': np.where(separado, P_sep, P_sep_saida),
+        'epsilon_sep': epsilon_sep,
+        'separado': separado,
+        'regime': regime,
+        'F_ideal': F_ideal,
+        'F': F,
+    }
+
+
+def grade_separacao(epsilons, h, P1, At, k, criterio='schmucker', coeficiente=0.4):
+    """
+    analisar_separacao para todos os projetos (epsilons) em todas as
+    altitudes h [m]: arrays (len(epsilons), len(h)). Acima do topo do modelo
+    atmosférico considera-se vácuo.
+    """
+    h = np.atleast_1d(np.asarray(h, dtype=float))
+    P_ambiente = us_standard_atmosphere(h)["P"]
+    epsilons = np.atleast_1d(np.asarray(epsilons, dtype=float))
+    return analisar_separacao(P1, At, k, epsilons[:, None], P_ambiente[None, :], criterio, coeficiente)
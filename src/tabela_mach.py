@@ -0,0 +1,158 @@
+import os
+from functools import lru_cache
+import numpy as np
+from src import instrumentacao
+from src.funcoes_auxiliares import mach_razao_area
+
+"""
+Tabelas pré-calculadas da relação área-Mach, uma por valor de k.
+
+A tabela é uma malha uniforme de x = ln(epsilon - 1), isto é, epsilon em
+espaçamento logarítmico a partir da garganta. No ramo supersônico guarda-se
+y = ln(M - 1) e no subsônico y = ln(M / (1 - M)). Nessas variáveis a curva é
+suave nos dois extremos (|M - 1| ~ sqrt(epsilon - 1) perto da garganta e
+M ~ epsilon^((k-1)/2) ou M ~ 1/epsilon para epsilon grande), então a
+interpolação linear é monótona e o erro cai rapidamente com a malha.
+"""
+
+# Diretório do cache em disco (um .npz por k e ramo)
+DIRETORIO_CACHE = os.environ.get(
+    'X1_CACHE_TABELAS',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'tabelas_mach')
+)
+
+VERSAO_TABELA = 1
+EPSILON_MIN = 1 + 1e-6
+EPSILON_MAX = 1e5
+# Acima deste número de valores distintos de k numa chamada, mach_tabelado
+# resolve tudo pelo método iterativo em vez de montar uma tabela por k
+MAX_K_TABELADOS = 8
+# Maior malha construída (o erro cai com o quadrado do espaçamento; tol = 1e-7
+# pede 8193 pontos)
+MAX_PONTOS_TABELA = 2 ** 20 + 1
+
+
+def _nome_arquivo(k, supersonico, tol):
+    ramo = 'sup' if supersonico else 'sub'
+    return os.path.join(DIRETORIO_CACHE, f'mach_k{k:.6f}_{ramo}_tol{tol:.0e}_v{VERSAO_TABELA}.npz')
+
+
+def _para_tabela(M, supersonico):
+    if supersonico:
+        return np.log(M - 1)
+    return np.log(M / (1 - M))
+
+
+def _de_tabela(y, supersonico):
+    if supersonico:
+        return 1 + np.exp(y)
+    return 1 / (1 + np.exp(-y))
+
+
+def _construir_tabela(k, supersonico, tol):
+    """
+    Constrói a tabela dobrando o número de pontos até que o erro relativo
+    em Mach nos pontos médios da malha fique abaixo de tol (no máximo
+    MAX_PONTOS_TABELA pontos).
+    """
+    x_min = np.log(EPSILON_MIN - 1)
+    x_max = np.log(EPSILON_MAX - 1)
+
+    n = 513
+    while True:
+        x = np.linspace(x_min, x_max, n)
+        M, _ = mach_razao_area(1 + np.exp(x), k, supersonico)
+        y = _para_tabela(M, supersonico)
+
+        # Verificação do erro nos pontos médios
+        x_meio = 0.5 * (x[1:] + x[:-1])
+        M_meio, _ = mach_razao_area(1 + np.exp(x_meio), k, supersonico)
+        M_interp = _de_tabela(0.5 * (y[1:] + y[:-1]), supersonico)
+        erro = np.max(np.abs(M_interp - M_meio) / M_meio)
+
+        if erro <= tol:
+            return x, y, erro
+        n = 2 * n - 1
+        if n > MAX_PONTOS_TABELA:
+            raise ValueError(f"Tolerância {tol} não atingida com {MAX_PONTOS_TABELA} pontos na tabela (k = {k})!")
+
+
+@lru_cache(maxsize=32)
+def tabela_mach(k, supersonico=True, tol=1e-7):
+    """
+    Retorna a tabela (x, y) para um k, carregando do disco quando existir.
+
+    Parâmetros:
+    k: razão de calores específicos
+    supersonico: ramo da solução
+    tol: erro relativo máximo em Mach da interpolação
+    """
+    k = float(k)
+    if not (np.isfinite(k) and k > 1):
+        raise ValueError(f"Razão de calores específicos inválida para a tabela: {k}!")
+    arquivo = _nome_arquivo(k, supersonico, tol)
+
+    if os.path.exists(arquivo):
+        with np.load(arquivo) as dados:
+            x, y = dados['x'], dados['y']
+    else:
+        x, y, erro = _construir_tabela(k, supersonico, tol)
+
+        # Grava de forma atômica para não deixar arquivos parciais entre processos;
+        # sem permissão de escrita a tabela fica só na memória
+        temporario = f'{arquivo}.{os.getpid()}.tmp.npz'
+        try:
+            os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+            np.savez(temporario, x=x, y=y, k=k, erro=erro)
+            os.replace(temporario, arquivo)
+        except OSError:
+            pass
+
+    # As tabelas são compartilhadas pelo LRU, então ficam somente leitura
+    x.setflags(write=False)
+    y.setflags(write=False)
+    return x, y
+
+
+def mach_tabelado(epsilon, k, supersonico=True, tol=1e-7):
+    """
+    Equivalente tabelado de mach_razao_area: retorna (Mach, P2/P1).
+
+    Valores de epsilon fora do intervalo da tabela são resolvidos
+    diretamente pelo método iterativo, assim como todos os pontos quando há
+    mais de MAX_K_TABELADOS valores distintos de k (k contínuo não gera uma
+    tabela em disco por valor). k deve ser finito e maior que 1
+    (ValueError, como em tabela_mach).
+    """
+    epsilon, k = np.broadcast_arrays(np.asarray(epsilon, dtype=float),
+                                     np.asarray(k, dtype=float))
+
+    valores_k = np.unique(k)
+    if not np.all(np.isfinite(valores_k) & (valores_k > 1)):
+        raise ValueError("A razão de calores específicos deve ser finita e maior que 1!")
+    if len(valores_k) > MAX_K_TABELADOS:
+        instrumentacao.registrar('mach_tabelado', np.size(epsilon), fallbacks=np.size(epsilon))
+        return mach_razao_area(epsilon, k, supersonico)
+
+    M = np.empty(epsilon.shape)
+    for k_valor in valores_k:
+        if k.ndim == 0:
+            selecao = ...
+        else:
+            selecao = k == k_valor
+        # 1-d também para epsilon escalar, para a substituição dos pontos fora da tabela
+        eps = np.atleast_1d(epsilon[selecao])
+
+        x, y = tabela_mach(float(k_valor), supersonico, tol)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            M_k = _de_tabela(np.interp(np.log(eps - 1), x, y), supersonico)
+
+        fora = ~((eps >= EPSILON_MIN) & (eps <= EPSILON_MAX))
+        if np.any(fora):
+            M_k[fora] = mach_razao_area(eps[fora], k_valor, supersonico)[0]
+        M[selecao] = M_k.reshape(M[selecao].shape)
+        # Pontos fora da tabela contam como fallback para o solver
+        instrumentacao.registrar('mach_tabelado', np.size(eps), fallbacks=np.count_nonzero(fora))
+
+    P_ratio = (1 + (k - 1) / 2 * M ** 2) ** (-k / (k - 1))
+    return M, P_ratio
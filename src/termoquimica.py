@@ -0,0 +1,329 @@
+import os
+from functools import lru_cache
+import numpy as np
+from src import instrumentacao
+
+"""
+Propriedades termodinâmicas dos gases de exaustão com equilíbrio químico
+(sistema H-O: propelente LOX/LH2).
+
+A composição de equilíbrio dos produtos (H2, O2, H2O, OH, H, O) é obtida por
+minimização da energia de Gibbs (método dos potenciais dos elementos), com
+as propriedades das espécies pelos polinômios NASA de 7 coeficientes
+(GRI-Mech 3.0). Numa malha uniforme de (ln T, ln P) guardam-se:
+- R = Ru / M da mistura em equilíbrio;
+- gamma = (d ln P / d ln rho) à entropia constante, o expoente isentrópico
+  de equilíbrio, calculado pelas derivadas da entropia e da massa molar na
+  malha.
+
+A tabela é gerada uma vez por razão de mistura e guardada em disco (.npz);
+as consultas são interpolações bilineares vetorizadas.
+
+Com gamma e R ao longo da expansão (equilíbrio deslocado), P/rho = R T
+satisfaz d ln(RT) / d ln P = (gamma - 1) / gamma e a entalpia cai
+dh = RT d ln P. A trajetória T(P) é obtida por iterações de ponto fixo
+sobre todos os pontos de pressão de uma vez (e para várias câmaras).
+"""
+
+# Diretório do cache em disco (um .npz por razão de mistura e malha)
+DIRETORIO_CACHE = os.environ.get(
+    'X1_CACHE_TERMOQUIMICA',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'termoquimica')
+)
+
+VERSAO_TABELA = 1
+Ru = 8.314462618            # Constante universal dos gases [J/mol*K]
+P_REFERENCIA = 1e5          # Pressão do estado padrão [Pa]
+
+# Razão de mistura O/F (massa) padrão: R da câmara do X1 (~518 J/kg*K) a 3300 K e 30 MPa
+RAZAO_MISTURA_PADRAO = 7.1
+
+T_MIN, T_MAX = 250.0, 4500.0
+P_MIN, P_MAX = 1e-2, 1e8
+
+ESPECIES = ('H2', 'O2', 'H2O', 'OH', 'H', 'O')
+MASSA_MOLAR = np.array([2.01588, 31.9988, 18.01528, 17.00734, 1.00794, 15.9994]) / 1000    # [kg/mol]
+# Átomos de H e de O em cada espécie
+ATOMOS_H = np.array([2.0, 0.0, 2.0, 1.0, 1.0, 0.0])
+ATOMOS_O = np.array([0.0, 2.0, 1.0, 1.0, 0.0, 1.0])
+
+# Coeficientes NASA (a1..a7) abaixo e acima de 1000 K
+_NASA_BAIXA = np.array([
+    [2.34433112E+00, 7.98052075E-03, -1.94781510E-05, 2.01572094E-08, -7.37611761E-12, -9.17935173E+02, 6.83010238E-01],
+    [3.78245636E+00, -2.99673416E-03, 9.84730201E-06, -9.68129509E-09, 3.24372837E-12, -1.06394356E+03, 3.65767573E+00],
+    [4.19864056E+00, -2.03643410E-03, 6.52040211E-06, -5.48797062E-09, 1.77197817E-12, -3.02937267E+04, -8.49032208E-01],
+    [3.99201543E+00, -2.40131752E-03, 4.61793841E-06, -3.88113333E-09, 1.36411470E-12, 3.61508056E+03, -1.03925458E-01],
+    [2.50000000E+00, 7.05332819E-13, -1.99591964E-15, 2.30081632E-18, -9.27732332E-22, 2.54736599E+04, -4.46682853E-01],
+    [3.16826710E+00, -3.27931884E-03, 6.64306396E-06, -6.12806624E-09, 2.11265971E-12, 2.91222592E+04, 2.05193346E+00],
+])
+_NASA_ALTA = np.array([
+    [3.33727920E+00, -4.94024731E-05, 4.99456778E-07, -1.79566394E-10, 2.00255376E-14, -9.50158922E+02, -3.20502331E+00],
+    [3.28253784E+00, 1.48308754E-03, -7.57966669E-07, 2.09470555E-10, -2.16717794E-14, -1.08845772E+03, 5.45323129E+00],
+    [3.03399249E+00, 2.17691804E-03, -1.64072518E-07, -9.70419870E-11, 1.68200992E-14, -3.00042971E+04, 4.96677010E+00],
+    [3.09288767E+00, 5.48429716E-04, 1.26505228E-07, -8.79461556E-11, 1.17412376E-14, 3.85865700E+03, 4.47669610E+00],
+    [2.50000001E+00, -2.30842973E-11, 1.61561948E-14, -4.73515235E-18, 4.98197357E-22, 2.54736599E+04, -4.46682914E-01],
+    [2.56942078E+00, -8.59741137E-05, 4.19484589E-08, -1.00177799E-11, 1.22833691E-15, 2.92175791E+04, 4.78433864E+00],
+])
+
+
+def _gibbs_entropia(T):
+    # g°/RT e s°/R de cada espécie: arrays (..., n_especies)
+    T = np.asarray(T, dtype=float)[..., None]
+    a = np.where((T < 1000.0)[..., None], _NASA_BAIXA, _NASA_ALTA)
+    a1, a2, a3, a4, a5, a6, a7 = np.moveaxis(a, -1, 0)
+    h = a1 + a2 * T / 2 + a3 * T**2 / 3 + a4 * T**3 / 4 + a5 * T**4 / 5 + a6 / T
+    s = a1 * np.log(T) + a2 * T + a3 * T**2 / 2 + a4 * T**3 / 3 + a5 * T**4 / 4 + a7
+    return h - s, s
+
+
+def _razao_elementos(razao_mistura):
+    # Átomos de H por átomo de O para LOX/LH2 com razão O/F (massa)
+    return (1 / 1.00794) / (razao_mistura / 15.9994)
+
+
+def equilibrio(T, P, razao_mistura=RAZAO_MISTURA_PADRAO, tol=1e-12, max_iter=100):
+    """
+    Frações molares de equilíbrio (..., n_especies) em T [K] e P [Pa].
+
+    Resolve, em lote para todos os pontos, ln x_j = -g°_j/RT - ln(P/P°)
+    + lambda_H a_Hj + lambda_O a_Oj com soma(x) = 1 e a razão H/O dos
+    reagentes, por Newton nos potenciais lambda (passos limitados).
+    """
+    T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+    forma = T.shape
+    g, _ = _gibbs_entropia(T.ravel())
+    c = -g - np.log(P.ravel() / P_REFERENCIA)[:, None]
+    rho = _razao_elementos(razao_mistura)
+
+    # Chute inicial pelos produtos principais (H2O e o reagente em excesso)
+    if rho >= 2:
+        n_H2O, n_excesso, j_excesso = 1.0, (rho - 2) / 2, 0
+    else:
+        n_H2O, n_excesso, j_excesso = rho / 2, (1 - rho / 2) / 2, 1
+    x_H2O = max(n_H2O / (n_H2O + n_excesso), 1e-3)
+    x_excesso = max(n_excesso / (n_H2O + n_excesso), 1e-3)
+    if j_excesso == 0:
+        lambda_H = (np.log(x_excesso) - c[:, 0]) / 2
+        lambda_O = np.log(x_H2O) - c[:, 2] - 2 * lambda_H
+    else:
+        lambda_O = (np.log(x_excesso) - c[:, 1]) / 2
+        lambda_H = (np.log(x_H2O) - c[:, 2] - lambda_O) / 2
+
+    for iteracao in range(1, max_iter + 1):
+        x = np.exp(np.minimum(c + lambda_H[:, None] * ATOMOS_H + lambda_O[:, None] * ATOMOS_O, 50.0))
+        S = x.sum(axis=1)
+        A_H, A_O = x @ ATOMOS_H, x @ ATOMOS_O
+        B_HH, B_HO, B_OO = x @ (ATOMOS_H * ATOMOS_H), x @ (ATOMOS_H * ATOMOS_O), x @ (ATOMOS_O * ATOMOS_O)
+
+        # F1 = ln S, F2 = (A_H - rho A_O) / (A_H + rho A_O) e o jacobiano em (lambda_H, lambda_O)
+        F1 = np.log(S)
+        N, D = A_H - rho * A_O, A_H + rho * A_O
+        F2 = N / D
+        J11, J12 = A_H / S, A_O / S
+        dN_H, dN_O = B_HH - rho * B_HO, B_HO - rho * B_OO
+        dD_H, dD_O = B_HH + rho * B_HO, B_HO + rho * B_OO
+        J21 = (dN_H * D - N * dD_H) / D**2
+        J22 = (dN_O * D - N * dD_O) / D**2
+
+        det = J11 * J22 - J12 * J21
+        d_H = (F1 * J22 - F2 * J12) / det
+        d_O = (F2 * J11 - F1 * J21) / det
+        passo = np.maximum(np.abs(d_H), np.abs(d_O))
+        fator = np.minimum(1.0, 2.0 / np.maximum(passo, 1e-300))
+        lambda_H -= fator * d_H
+        lambda_O -= fator * d_O
+        if np.all(passo <= tol):
+            break
+
+    instrumentacao.registrar('equilibrio', T.size, iteracao, 0, np.count_nonzero(~(passo <= tol)),
+                             np.max(passo, initial=0.0))
+    x = np.exp(c + lambda_H[:, None] * ATOMOS_H + lambda_O[:, None] * ATOMOS_O)
+    x /= x.sum(axis=1, keepdims=True)
+    return x.reshape(forma + (len(ESPECIES),))
+
+
+def _construir_tabela(razao_mistura, n_T, n_P):
+    ln_T = np.linspace(np.log(T_MIN), np.log(T_MAX), n_T)
+    ln_P = np.linspace(np.log(P_MIN), np.log(P_MAX), n_P)
+    T, P = np.meshgrid(np.exp(ln_T), np.exp(ln_P), indexing='ij')
+
+    x = equilibrio(T, P, razao_mistura)
+    _, s0 = _gibbs_entropia(T)
+    M = x @ MASSA_MOLAR
+    # Entropia da mistura por unidade de massa [J/kg*K]
+    with np.errstate(divide='ignore'):
+        ln_x = np.where(x > 0, np.log(x), 0.0)
+    s = Ru * np.sum(x * (s0 - ln_x - np.log(P / P_REFERENCIA)[..., None]), axis=-1) / M
+
+    # Isentrópica: d ln T / d ln P = -s_P / s_T; rho = P M / (Ru T)
+    s_T, s_P = np.gradient(s, ln_T, ln_P)
+    lnM_T, lnM_P = np.gradient(np.log(M), ln_T, ln_P)
+    dlnT = -s_P / s_T
+    gamma = 1 / (1 + lnM_P + lnM_T * dlnT - dlnT)
+    return ln_T, ln_P, gamma, Ru / M
+
+
+def _nome_arquivo(razao_mistura, n_T, n_P):
+    return os.path.join(DIRETORIO_CACHE, f'h2o2_of{razao_mistura:.4f}_{n_T}x{n_P}_v{VERSAO_TABELA}.npz')
+
+
+@lru_cache(maxsize=16)
+def tabela_termoquimica(razao_mistura=RAZAO_MISTURA_PADRAO, n_T=241, n_P=201):
+    """
+    Tabela (ln_T, ln_P, gamma, R) para uma razão de mistura O/F, carregada do
+    disco quando existir. gamma e R têm formato (n_T, n_P).
+    """
+    razao_mistura = float(razao_mistura)
+    arquivo = _nome_arquivo(razao_mistura, n_T, n_P)
+
+    if os.path.exists(arquivo):
+        with np.load(arquivo) as dados:
+            tabela = dados['ln_T'], dados['ln_P'], dados['gamma'], dados['R']
+    else:
+        tabela = _construir_tabela(razao_mistura, n_T, n_P)
+
+        # Grava de forma atômica para não deixar arquivos parciais entre processos
+        os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+        temporario = f'{arquivo}.{os.getpid()}.tmp.npz'
+        np.savez(temporario, ln_T=tabela[0], ln_P=tabela[1], gamma=tabela[2], R=tabela[3],
+                 razao_mistura=razao_mistura)
+        os.replace(temporario, arquivo)
+
+    # As tabelas são compartilhadas pelo LRU, então ficam somente leitura
+    for v in tabela:
+        v.setflags(write=False)
+    return tabela
+
+
+def gamma_R(T, P, razao_mistura=RAZAO_MISTURA_PADRAO):
+    """
+    gamma e R [J/kg*K] de equilíbrio em T [K] e P [Pa] (arrays com
+    broadcast), por interpolação bilinear em (ln T, ln P). Pontos fora da
+    malha usam a borda.
+    """
+    ln_T, ln_P, gamma, R = tabela_termoquimica(razao_mistura)
+    return _interpolar(ln_T, ln_P, (gamma, R), np.log(T), np.log(P))
+
+
+def _interpolar(ln_T, ln_P, tabelas, u, v):
+    # Interpolação bilinear numa malha uniforme (índices calculados, sem busca)
+    u, v = np.broadcast_arrays(u, v)
+    fu = np.clip((u - ln_T[0]) / (ln_T[1] - ln_T[0]), 0, len(ln_T) - 1 - 1e-9)
+    fv = np.clip((v - ln_P[0]) / (ln_P[1] - ln_P[0]), 0, len(ln_P) - 1 - 1e-9)
+    i, j = fu.astype(np.intp), fv.astype(np.intp)
+    du, dv = fu - i, fv - j
+    resultado = []
+    for t in tabelas:
+        baixo = t[i, j] + dv * (t[i, j + 1] - t[i, j])
+        cima = t[i + 1, j] + dv * (t[i + 1, j + 1] - t[i + 1, j])
+        resultado.append(baixo + du * (cima - baixo))
+    return resultado
+
+
+def expansao_equilibrio(P1, T1, razao_mistura=RAZAO_MISTURA_PADRAO, razao_minima=1e-8, n_pontos=2000,
+                        tol=1e-10, max_iter=50):
+    """
+    Expansão isentrópica em equilíbrio deslocado desde a câmara (P1, T1).
+
+    Parâmetros:
+    P1: pressão na câmara [Pa] (escalar ou array de câmaras)
+    T1: temperatura na câmara [K] (broadcast com P1)
+    razao_mistura: razão O/F (massa) do propelente
+    razao_minima: menor P/P1 da trajetória
+    n_pontos: pontos da trajetória (espaçados em ln P)
+
+    Retorna um dicionário com arrays (n_camaras, n_pontos): ln_r (ln P/P1,
+    igual para todas), P, T, u (velocidade) e G (fluxo de massa rho u), e
+    por câmara G_t (fluxo de massa na garganta), i_t (índice do ponto logo
+    após a garganta) e ln_epsilon (ln A/At, válido a partir de i_t).
+    """
+    P1, T1 = (np.atleast_1d(v).ravel() for v in np.broadcast_arrays(np.asarray(P1, dtype=float),
+                                                                     np.asarray(T1, dtype=float)))
+    ln_T_tab, ln_P_tab, gamma_tab, R_tab = tabela_termoquimica(razao_mistura)
+
+    ln_r = np.linspace(0.0, np.log(razao_minima), n_pontos)
+    ln_P = np.log(P1)[:, None] + ln_r[None, :]
+    d_ln_r = np.diff(ln_r)
+
+    # Chute inicial: gamma e R congelados nos valores da câmara
+    gamma1, R1 = _interpolar(ln_T_tab, ln_P_tab, (gamma_tab, R_tab), np.log(T1), np.log(P1))
+    ln_RT1 = np.log(R1 * T1)[:, None]
+    ln_T = np.log(T1)[:, None] + (gamma1 - 1)[:, None] / gamma1[:, None] * ln_r[None, :]
+
+    # Ponto fixo em toda a trajetória: gamma e R na T(P) atual -> nova T(P)
+    for iteracao in range(1, max_iter + 1):
+        gamma, R = _interpolar(ln_T_tab, ln_P_tab, (gamma_tab, R_tab), ln_T, ln_P)
+        expoente = (gamma - 1) / gamma
+        ln_RT = ln_RT1 + np.concatenate([np.zeros((len(P1), 1)),
+                                         np.cumsum(0.5 * (expoente[:, 1:] + expoente[:, :-1]) * d_ln_r, axis=1)],
+                                        axis=1)
+        ln_T_novo = ln_RT - np.log(R)
+        variacao = np.max(np.abs(ln_T_novo - ln_T))
+        ln_T = ln_T_novo
+        if variacao <= tol:
+            break
+    instrumentacao.registrar('expansao_equilibrio', ln_P.size, iteracao, 0, int(variacao > tol), variacao)
+
+    # Queda de entalpia: em cada trecho, RT varia exponencialmente com ln P
+    RT = np.exp(ln_RT)
+    inclinacao = np.diff(ln_RT, axis=1) / d_ln_r
+    queda = -np.diff(RT, axis=1) / inclinacao
+    u = np.sqrt(2 * np.concatenate([np.zeros((len(P1), 1)), np.cumsum(queda, axis=1)], axis=1))
+    P = np.exp(ln_P)
+    G = P / RT * u
+
+    # Garganta: máximo de G, refinado por uma parábola em ln G nos três pontos vizinhos
+    linhas = np.arange(len(P1))
+    i = np.clip(np.argmax(G, axis=1), 1, n_pontos - 2)
+    g0, g1, g2 = (np.log(G[linhas, i + d]) for d in (-1, 0, 1))
+    curvatura = g0 - 2 * g1 + g2
+    G_t = np.exp(g1 - (g2 - g0) ** 2 / (8 * curvatura))
+    with np.errstate(divide='ignore'):
+        ln_epsilon = np.log(G_t)[:, None] - np.log(G)
+
+    return {
+        'ln_r': ln_r, 'P': P, 'T': np.exp(ln_T), 'u': u, 'G': G,
+        'G_t': G_t, 'i_t': i + 1, 'ln_epsilon': ln_epsilon,
+    }
+
+
+@lru_cache(maxsize=64)
+def _expansao_camara(P1, T1, razao_mistura):
+    # Trajetória de uma câmara, reaproveitada entre chamadas com outros epsilons
+    return expansao_equilibrio(P1, T1, razao_mistura)
+
+
+def _saida(P1, T1, epsilon, razao_mistura):
+    # P2, u2 e G_t para os epsilons de uma câmara (interpolação em ln epsilon)
+    e = _expansao_camara(float(P1), float(T1), float(razao_mistura))
+    i_t = e['i_t'][0]
+    ln_eps = e['ln_epsilon'][0, i_t:]
+    ln_alvo = np.log(epsilon)
+    ln_r2 = np.interp(ln_alvo, ln_eps, e['ln_r'][i_t:])
+    u2 = np.interp(ln_alvo, ln_eps, e['u'][0, i_t:])
+    return P1 * np.exp(ln_r2), u2, e['G_t'][0]
+
+
+def pressao_saida_equilibrio(P1, T1, epsilon, razao_mistura=RAZAO_MISTURA_PADRAO):
+    """
+    Pressão de saída [Pa] para razões de expansão epsilon (escalar ou
+    array), com equilíbrio químico deslocado na expansão.
+    """
+    P2, _, _ = _saida(P1, T1, np.asarray(epsilon, dtype=float), razao_mistura)
+    return float(P2) if np.ndim(P2) == 0 else P2
+
+
+def empuxo_equilibrio(P1, T1, At, epsilon, P_ambient, razao_mistura=RAZAO_MISTURA_PADRAO):
+    """
+    Empuxo [N] com equilíbrio químico deslocado: mdot u2 + (P2 - P_amb) A2,
+    com mdot = G_t At da garganta. epsilon e P_ambient combinam-se por
+    broadcast (por exemplo epsilons[:, None] e P_amb[None, :]).
+    """
+    epsilon = np.asarray(epsilon, dtype=float)
+    P2, u2, G_t = _saida(P1, T1, epsilon, razao_mistura)
+    return G_t * At * u2 + (P2 - P_ambient) * epsilon * At
+
+
+def vazao_massica_equilibrio(P1, T1, At, razao_mistura=RAZAO_MISTURA_PADRAO):
+    """Vazão mássica [kg/s] pela garganta bloqueada, com equilíbrio deslocado."""
+    return float(_expansao_camara(float(P1), float(T1), float(razao_mistura))['G_t'][0]) * At
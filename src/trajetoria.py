@@ -0,0 +1,195 @@
+import numpy as np
+from src.atmosfera import us_standard_atmosphere, H_TOPO
+from src.funcoes_auxiliares import mach_razao_area, empuxo
+
+"""
+Simulação da subida no tempo (vertical ou com curva gravitacional).
+
+O estado de cada trajetória é (h, v, gamma, x, m): altitude, velocidade,
+ângulo da trajetória com a horizontal, distância percorrida sobre o solo e
+massa. A integração é feita por Runge-Kutta de 4ª ordem com passo fixo,
+para várias trajetórias ao mesmo tempo (arrays de formato (n_trajetorias,)).
+
+O empuxo vem de empuxo() com a tubeira do estágio ativo, escolhido pela
+altitude (h_troca), e a pressão ambiente e a densidade vêm do modelo
+atmosférico. O arrasto é 0.5 * rho * v^2 * Cd * A_ref e a massa diminui à
+taxa mdot até a massa seca.
+
+simular() é um gerador: os estados são entregues em blocos de
+tamanho_bloco passos, então simulações de milhões de passos usam memória
+limitada.
+"""
+
+g0 = 9.80665
+R_TERRA = 6371e3
+V_MINIMA = 1.0      # velocidade mínima no termo g/v da curva gravitacional [m/s]
+
+
+def _ambiente(h):
+    # Pressão e densidade; acima do topo do modelo considera-se vácuo
+    atm = us_standard_atmosphere(np.clip(h, 0.0, np.nextafter(H_TOPO, 0)), tabelado=True)
+    acima = h >= H_TOPO
+    P = np.where(acima, 0.0, atm["P"])
+    rho = np.where(acima, 0.0, atm["rho"])
+    return P, rho
+
+
+def _avancar(estado, derivada, passo):
+    return tuple(e + passo * d for e, d in zip(estado, derivada))
+
+
+def simular(m0, m_seca, epsilon, P1, At, k, mdot, h_troca=(), Cd=0.3, A_ref=10.0, h_manobra=1000.0,
+            angulo_manobra=0.0, dt=0.1, t_max=600.0, tamanho_bloco=10000):
+    """
+    Integra a subida de uma ou mais trajetórias e entrega os estados em blocos.
+
+    Parâmetros:
+    m0: massa inicial [kg]
+    m_seca: massa ao fim da queima [kg]
+    epsilon: razões de expansão de cada estágio, formato (n_estagios,) ou
+             (n_trajetorias, n_estagios)
+    P1: pressão na câmara [Pa]
+    At: área da garganta [m^2]
+    k: razão de calores específicos
+    mdot: vazão mássica [kg/s]
+    h_troca: altitudes de troca de estágio [m], formato (n_estagios - 1,) ou
+             (n_trajetorias, n_estagios - 1)
+    Cd: coeficiente de arrasto
+    A_ref: área de referência do arrasto [m^2]
+    h_manobra: altitude da manobra inicial [m]; até ela a subida é vertical
+    angulo_manobra: inclinação aplicada na manobra [graus]; 0 mantém a subida
+                    vertical, valores positivos iniciam a curva gravitacional
+    dt: passo de tempo [s]
+    t_max: tempo máximo [s]
+    tamanho_bloco: passos por bloco entregue
+
+    m0, m_seca, Cd, A_ref, h_manobra e angulo_manobra podem ser arrays (uma
+    trajetória por elemento). Cada bloco é um dicionário com arrays de
+    formato (n_passos, n_trajetorias): t, h, v, gamma, x, m, F e estagio.
+    Trajetórias que voltam ao solo ficam congeladas no último estado, com
+    F = 0 e sem consumo de propelente.
+    """
+    epsilon = np.atleast_1d(np.asarray(epsilon, dtype=float))
+    h_troca = np.asarray(h_troca, dtype=float)
+    m0, m_seca, Cd, A_ref, h_manobra, angulo_manobra = (
+        np.atleast_1d(np.asarray(a, dtype=float)) for a in (m0, m_seca, Cd, A_ref, h_manobra, angulo_manobra))
+
+    n = np.broadcast_shapes(m0.shape, m_seca.shape, Cd.shape, A_ref.shape, h_manobra.shape,
+                            angulo_manobra.shape, epsilon.shape[:-1] or (1,), h_troca.shape[:-1] or (1,))[0]
+    n_estagios = epsilon.shape[-1]
+    epsilon = np.broadcast_to(epsilon, (n, n_estagios))
+    h_troca = np.broadcast_to(h_troca, (n, n_estagios - 1))
+    m_seca, Cd_A, h_manobra = (np.broadcast_to(a, (n,)) for a in (m_seca, Cd * A_ref, h_manobra))
+    gamma_manobra = np.broadcast_to(np.radians(90.0 - angulo_manobra), (n,))
+    vertical = np.broadcast_to(angulo_manobra == 0, (n,))
+
+    # Pressão de saída de cada estágio (uma solução da relação área-Mach por tubeira)
+    _, razao_P = mach_razao_area(epsilon, k)
+    P2 = P1 * razao_P
+    linhas = np.arange(n)
+
+    def derivadas(estado, manobrado, ativo):
+        h, v, gamma, _, m = estado
+        P_amb, rho = _ambiente(h)
+        estagio = np.sum(h[:, None] >= h_troca, axis=1)
+        # Trajetórias congeladas no solo não queimam nem entregam empuxo
+        queimando = ativo & (m > m_seca)
+        F = np.where(queimando, empuxo(P1, At, k, P2[linhas, estagio], P_amb, epsilon[linhas, estagio]), 0.0)
+        D = 0.5 * rho * v * np.abs(v) * Cd_A
+        r = R_TERRA + h
+        g = g0 * (R_TERRA / r) ** 2
+
+        sen, cos = np.sin(gamma), np.cos(gamma)
+        dv = (F - D) / m - g * sen
+        v_turn = np.maximum(v, V_MINIMA)
+        dgamma = np.where(manobrado, -(g / v_turn - v_turn / r) * cos, 0.0)
+        dh = v * sen
+        dx = v * cos * R_TERRA / r
+        dm = np.where(queimando, -mdot, 0.0)
+        return (dh, dv, dgamma, dx, dm), F, estagio
+
+    # Estado inicial: repouso, subida vertical
+    h = np.zeros(n)
+    v = np.zeros(n)
+    gamma = np.full(n, np.pi / 2)
+    x = np.zeros(n)
+    m = np.broadcast_to(m0, (n,)).astype(float)
+    manobrado = np.zeros(n, dtype=bool)
+    ativo = np.ones(n, dtype=bool)
+
+    nomes = ('t', 'h', 'v', 'gamma', 'x', 'm', 'F', 'estagio')
+
+    def novo_bloco():
+        bloco = {nome: np.empty((tamanho_bloco, n)) for nome in nomes}
+        bloco['estagio'] = np.empty((tamanho_bloco, n), dtype=np.int8)
+        return bloco
+
+    bloco = novo_bloco()
+    i = 0
+    n_passos = int(np.ceil(t_max / dt))
+    for passo in range(n_passos + 1):
+        t = passo * dt
+
+        # Manobra inicial: ao passar de h_manobra, inclina a trajetória
+        manobrar = ~manobrado & ~vertical & (h >= h_manobra)
+        if np.any(manobrar):
+            gamma = np.where(manobrar, gamma_manobra, gamma)
+            manobrado = manobrado | manobrar
+
+        estado = (h, v, gamma, x, m)
+        k1, F, estagio = derivadas(estado, manobrado, ativo)
+
+        for nome, valor in zip(nomes, (t, h, v, gamma, x, m, F, estagio)):
+            bloco[nome][i] = valor
+        i += 1
+        if i == tamanho_bloco:
+            yield bloco
+            bloco = novo_bloco()
+            i = 0
+
+        if passo == n_passos or not np.any(ativo):
+            break
+
+        # Runge-Kutta de 4ª ordem
+        k2, _, _ = derivadas(_avancar(estado, k1, 0.5 * dt), manobrado, ativo)
+        k3, _, _ = derivadas(_avancar(estado, k2, 0.5 * dt), manobrado, ativo)
+        k4, _, _ = derivadas(_avancar(estado, k3, dt), manobrado, ativo)
+        novo = [e + dt / 6 * (d1 + 2 * d2 + 2 * d3 + d4) for e, d1, d2, d3, d4 in zip(estado, k1, k2, k3, k4)]
+        novo[4] = np.maximum(novo[4], m_seca)
+
+        # Trajetórias que voltaram ao solo não são mais atualizadas
+        h, v, gamma, x, m = (np.where(ativo, nv, e) for nv, e in zip(novo, estado))
+        ativo = ativo & (h >= 0)
+
+    if i:
+        yield {nome: valores[:i] for nome, valores in bloco.items()}
+
+
+def resumo_trajetorias(blocos):
+    """
+    Consome os blocos de simular() guardando só o necessário para um resumo
+    por trajetória: altitude e velocidade máximas, estado final e impulso
+    total entregue.
+    """
+    resumo = None
+    t_anterior = F_anterior = None
+    for bloco in blocos:
+        t, F = bloco['t'][:, 0], bloco['F']
+        if resumo is None:
+            n = F.shape[1]
+            resumo = {'h_max': np.full(n, -np.inf), 'v_max': np.full(n, -np.inf), 'impulso': np.zeros(n)}
+        else:
+            # Emenda com a última amostra do bloco anterior
+            t = np.concatenate([[t_anterior], t])
+            F = np.concatenate([F_anterior[None], F])
+
+        resumo['h_max'] = np.maximum(resumo['h_max'], bloco['h'].max(axis=0))
+        resumo['v_max'] = np.maximum(resumo['v_max'], bloco['v'].max(axis=0))
+        # Cada amostra de F vale até a amostra seguinte (como no passo de integração)
+        resumo['impulso'] += np.sum(F[:-1] * np.diff(t)[:, None], axis=0)
+        t_anterior, F_anterior = t[-1], F[-1]
+
+        for nome in ('t', 'h', 'v', 'gamma', 'x', 'm'):
+            resumo[f'{nome}_final'] = bloco[nome][-1]
+
+    return resumo
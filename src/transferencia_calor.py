@@ -0,0 +1,155 @@
+import numpy as np
+from src.funcoes_auxiliares import mach_razao_area
+
+"""
+Estado do escoamento e fluxo de calor convectivo (Bartz) ao longo do contorno.
+
+Cada ponto do contorno é uma estação com razão de áreas local
+epsilon = (y / Rt)^2. O Mach local vem da relação área-Mach no ramo
+subsônico antes da garganta (o ponto de menor raio) e no supersônico depois
+dela; com ele, P e T isentrópicos e o coeficiente de Bartz:
+
+    h_g = 0.026 / Dt^0.2 * (mu^0.2 cp / Pr^0.6) * (P1 / c*)^0.8
+          * (Dt / Rc)^0.1 * (At / A)^0.9 * sigma
+
+com as propriedades na câmara, sigma a correção de camada limite pela
+temperatura da parede e q = h_g (T_aw - T_parede), T_aw a temperatura de
+recuperação (fator Pr^(1/3), escoamento turbulento). A viscosidade e o
+número de Prandtl seguem as aproximações do próprio Bartz:
+mu = 1.184e-7 M^0.5 T^0.6 [Pa*s] (M em g/mol) e Pr = 4k / (9k - 5).
+
+Todas as estações de todos os projetos são resolvidas juntas: os arrays de
+contorno têm formato (n_projetos, n_estacoes) e os parâmetros do motor são
+escalares ou um valor por projeto.
+"""
+
+Ru = 8.314462618
+
+
+def _por_projeto(valor, n_projetos):
+    # Escalar ou um valor por projeto -> coluna (n_projetos, 1)
+    return np.broadcast_to(np.asarray(valor, dtype=float), (n_projetos,))[:, None]
+
+
+def mach_estacoes(y, Rt, k, tabelado=True):
+    """
+    Razão de áreas e Mach em cada estação.
+
+    Parâmetros:
+    y: raios das estações (n_projetos, n_estacoes) ou (n_estacoes,), na
+       unidade de Rt, na ordem do escoamento
+    Rt: raio da garganta (escalar ou um por projeto)
+    k: razão de calores específicos (escalar ou um por projeto)
+    tabelado: inverte a relação área-Mach pelas tabelas de src.tabela_mach
+              (False: Newton em lote, mais lento com milhares de estações)
+
+    Retorna (epsilon, M) com o formato de y (em 2D). As estações até o menor
+    raio de cada projeto usam o ramo subsônico; as seguintes, o supersônico.
+    """
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    n_projetos, n_estacoes = y.shape
+    epsilon = np.maximum((y / _por_projeto(Rt, n_projetos)) ** 2, 1.0)
+    k = np.broadcast_to(_por_projeto(k, n_projetos), y.shape)
+
+    garganta = np.argmin(y, axis=1)
+    supersonico = np.arange(n_estacoes)[None, :] > garganta[:, None]
+
+    if tabelado:
+        from src.tabela_mach import mach_tabelado as resolver
+    else:
+        resolver = mach_razao_area
+    M = np.empty_like(epsilon)
+    for ramo in (False, True):
+        selecao = supersonico == ramo
+        if np.any(selecao):
+            M[selecao], _ = resolver(epsilon[selecao], k[selecao], ramo)
+    return epsilon, M
+
+
+def perfil_bartz(y, Rt, k, P1, T1, R, T_parede=800.0, raio_curvatura=None, escala=1e-3, tabelado=True):
+    """
+    Estado local e fluxo de calor de Bartz em todas as estações.
+
+    Parâmetros:
+    y, Rt, k: ver mach_estacoes
+    P1: pressão na câmara [Pa]
+    T1: temperatura na câmara [K]
+    R: constante do gás [J/kg*K]
+    T_parede: temperatura da parede do lado do gás [K] (escalar, por
+              projeto ou por estação)
+    raio_curvatura: raio de curvatura da garganta, na unidade de Rt (None:
+                    média dos arcos de tubeira_sino, (1.5 + 0.382) / 2 * Rt)
+    escala: metros por unidade do contorno (1e-3 para contornos em mm, como
+            em main.py)
+
+    Os parâmetros do motor são escalares ou um valor por projeto. Retorna um
+    dicionário de arrays (n_projetos, n_estacoes): epsilon, M, P [Pa],
+    T [K], T_aw [K], h_g [W/m^2*K] e q [W/m^2].
+    """
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    n_projetos = y.shape[0]
+    epsilon, M = mach_estacoes(y, Rt, k, tabelado)
+
+    k, P1, T1, R, Rt = (_por_projeto(v, n_projetos) for v in (k, P1, T1, R, Rt))
+    if raio_curvatura is None:
+        Rc = 0.941 * Rt
+    else:
+        Rc = _por_projeto(raio_curvatura, n_projetos)
+
+    fator = 1 + (k - 1) / 2 * M * M
+    P = P1 * fator ** (-k / (k - 1))
+    T = T1 / fator
+
+    # Propriedades na câmara (aproximações de Bartz)
+    cp = k * R / (k - 1)
+    Pr = 4 * k / (9 * k - 5)
+    mu = 1.184e-7 * np.sqrt(Ru / R * 1000) * T1 ** 0.6
+    c_estrela = np.sqrt(k * R * T1) / (k * np.sqrt((2 / (k + 1)) ** ((k + 1) / (k - 1))))
+    Dt = 2 * Rt * escala
+
+    T_aw = T1 * (1 + Pr ** (1 / 3) * (k - 1) / 2 * M * M) / fator
+    sigma = 1 / ((0.5 * T_parede / T1 * fator + 0.5) ** 0.68 * fator ** 0.12)
+    h_g = (0.026 / Dt ** 0.2 * mu ** 0.2 * cp / Pr ** 0.6 * (P1 / c_estrela) ** 0.8
+           * (Dt / (Rc * escala)) ** 0.1 * epsilon ** -0.9 * sigma)
+    return {
+        'epsilon': epsilon,
+        'M': M,
+        'P': P,
+        'T': T,
+        'T_aw': T_aw,
+        'h_g': h_g,
+        'q': h_g * (T_aw - T_parede),
+    }
+
+
+def perfil_projetos(projetos, k, P1, T1, R, **kwargs):
+    """
+    perfil_bartz para uma lista de ProjetoTubeira (por exemplo de
+    ProjetoTubeira.do_lote). Projetos com o mesmo número de pontos são
+    resolvidos juntos; cada resultado inclui também a posição axial x e o
+    raio y das estações.
+
+    Retorna uma lista de dicionários, um por projeto, na ordem da lista.
+    Os parâmetros do motor são escalares ou um valor por projeto.
+    """
+    projetos = list(projetos)
+    parametros = [np.broadcast_to(np.asarray(v, dtype=float), (len(projetos),)) for v in (k, P1, T1, R)]
+    grupos = {}
+    for i, projeto in enumerate(projetos):
+        grupos.setdefault(len(projeto.pontos), []).append(i)
+
+    resultado = [None] * len(projetos)
+    for indices in grupos.values():
+        pontos = np.stack([projetos[i].pontos for i in indices]).astype(float, copy=False)
+        Rt = [projetos[i].Rt for i in indices]
+        perfil = perfil_bartz(pontos[..., 1], Rt, *(v[indices] for v in parametros), **kwargs)
+        perfil['x'] = pontos[..., 0]
+        perfil['y'] = pontos[..., 1]
+        for j, i in enumerate(indices):
+            resultado[i] = {nome: valor[j] for nome, valor in perfil.items()}
+    return resultado
+
+
+def perfil_projeto(projeto, k, P1, T1, R, **kwargs):
+    """perfil_projetos para um único ProjetoTubeira (arrays (n_estacoes,))."""
+    return perfil_projetos([projeto], k, P1, T1, R, **kwargs)[0]
@@ -1,64 +1,110 @@
-import matplotlib.pyplot as plt
-from bisect import bisect_left
+import math
+from bisect import bisect_right
 import numpy as np
-import pandas as pd
+from src.cache import em_cache
+from src.projeto import ProjetoTubeira, ENTRADA_GARGANTA, SAIDA_GARGANTA, SINO
 
 """
 Baseado nas notas técnicas: "The thrust optimised parabolic nozzle"
 http://www.aspirespace.org.uk/downloads/Thrust%20optimised%20parabolic%20nozzle.pdf
 """
 
-def tubeira_sino(k, arazao, Rt, l_camara):
+@em_cache('tubeira_sino')
+def tubeira_sino(k, arazao, Rt, l_camara, tolerancia=None):
     """
     Calcula o contorno de uma tubeira em formato de sino.
     Parâmetros:
     k: razão de calores específicos
     arazao: razão de área (Ae/At)
     Rt: raio da garganta
-    l_camara: percentual do comprimento da tubeira (60, 80, 90)
+    l_camara: percentual do comprimento da tubeira (de 60 a 90)
+    tolerancia: desvio máximo entre o contorno e as cordas que ligam pontos
+                consecutivos, na unidade de Rt (por exemplo 1e-4 para 0.1 mm
+                com Rt em metros). None usa 100 pontos por seção.
+
+    Retorna um ProjetoTubeira (src.projeto). Sem tolerância, os pontos são o
+    resultado de tubeira_sino_lote para um projeto; com tolerância, cada
+    seção recebe o menor número de pontos que respeita o desvio. Os
+    parâmetros são escalares; para vários projetos use tubeira_sino_lote.
     """
+    if any(np.ndim(valor) != 0 for valor in (k, arazao, Rt, l_camara)):
+        raise ValueError("tubeira_sino calcula um único projeto: para arrays use tubeira_sino_lote!")
+    if tolerancia is not None:
+        return tubeira_sino_adaptativa(arazao, Rt, l_camara, tolerancia)
+
+    angulos, contornos = tubeira_sino_lote(k, arazao, Rt, l_camara)
+    return ProjetoTubeira.do_lote(angulos, contornos, arazao, Rt)[0]
+
+
+def tubeira_sino_lote(k, arazao, Rt, l_camara, intervalo=100):
+    """
+    Calcula os contornos de uma família de tubeiras em formato de sino.
+    Parâmetros:
+    k: razão de calores específicos
+    arazao: razão(ões) de área (Ae/At)
+    Rt: raio(s) da garganta
+    l_camara: percentual(is) do comprimento da tubeira (de 60 a 90)
+    intervalo: número de pontos em cada seção
+
+    arazao, Rt e l_camara podem ser escalares ou arrays (com broadcast).
+    Retorna (angulos, contornos), em que angulos tem formato (n_projetos, 3)
+    com (Ln, theta_n, theta_e) e contornos tem formato
+    (n_projetos, 3 * intervalo, 2) com os pontos (x, y) da metade superior:
+    entrada da garganta, saída da garganta e sino, nessa ordem.
+    """
+    arazao, Rt, l_camara = np.broadcast_arrays(np.asarray(arazao, dtype=float),
+                                               np.asarray(Rt, dtype=float),
+                                               np.asarray(l_camara, dtype=float))
+    arazao = arazao.ravel()
+    Rt = Rt.ravel()
+    l_camara = l_camara.ravel()
+
     entrant_angulo = -135  # Ângulo de entrada, tipicamente -135°
     ea_radiano = np.radians(entrant_angulo)
 
     # Percentual de comprimento da tubeira
-    if l_camara == 60:
-        Lnp = 0.6
-    elif l_camara == 80:
-        Lnp = 0.8
-    elif l_camara == 90:
-        Lnp = 0.9
-    else:
-        Lnp = 0.8
+    Lnp = l_camara / 100
 
     # Encontrar os ângulos das paredes
-    angulos = angulos_paredes(arazao, Rt, l_camara)
-    comprimento_tubeira = angulos[0]
-    theta_n = angulos[1]
-    theta_e = angulos[2]
+    angulos = np.column_stack(angulos_paredes(arazao, Rt, l_camara))
+    theta_n = angulos[:, 1:2]
+    theta_e = angulos[:, 2:3]
 
-    intervalo = 100
+    Rt = Rt[:, None]
+    arazao = arazao[:, None]
+    Lnp = Lnp[:, None]
+
+    contornos = np.empty((angulos.shape[0], 3 * intervalo, 2))
+    entrada = contornos[:, :intervalo]
+    saida = contornos[:, intervalo:2*intervalo]
+    sino = contornos[:, 2*intervalo:]
 
     # Seção de entrada da garganta (throat entrant section)
-    ea_comeco = ea_radiano
-    ea_fim = -np.pi/2
-    lista_angulos = np.linspace(ea_comeco, ea_fim, intervalo)
-    xe = []
-    ye = []
-    for i in lista_angulos:
-        xe.append(1.5 * Rt * np.cos(i))
-        ye.append(1.5 * Rt * np.sin(i) + 2.5 * Rt)
+    lista_angulos = np.linspace(ea_radiano, -np.pi/2, intervalo)
+    entrada[..., 0] = 1.5 * Rt * np.cos(lista_angulos)
+    entrada[..., 1] = 1.5 * Rt * np.sin(lista_angulos) + 2.5 * Rt
 
     # Seção de saída da garganta (throat exit section)
-    ea_comeco = -np.pi/2
-    ea_fim = theta_n - np.pi/2
-    lista_angulos = np.linspace(ea_comeco, ea_fim, intervalo)
-    xe2 = []
-    ye2 = []
-    for i in lista_angulos:
-        xe2.append(0.382 * Rt * np.cos(i))
-        ye2.append(0.382 * Rt * np.sin(i) + 1.382 * Rt)
+    lista_angulos = np.linspace(-np.pi/2, theta_n[:, 0] - np.pi/2, intervalo, axis=1)
+    saida[..., 0] = 0.382 * Rt * np.cos(lista_angulos)
+    saida[..., 1] = 0.382 * Rt * np.sin(lista_angulos) + 1.382 * Rt
 
     # Seção do sino (bell section) - Curva quadrática de Bézier
+    Nx, Ny, Qx, Qy, Ex, Ey = pontos_bezier(Rt, arazao, Lnp, theta_n, theta_e)
+
+    # Curva quadrática de Bézier
+    t = np.linspace(0, 1, intervalo)
+    sino[..., 0] = ((1-t)**2) * Nx + 2*(1-t)*t * Qx + (t**2) * Ex
+    sino[..., 1] = ((1-t)**2) * Ny + 2*(1-t)*t * Qy + (t**2) * Ey
+
+    return angulos, contornos
+
+
+def pontos_bezier(Rt, arazao, Lnp, theta_n, theta_e):
+    """
+    Pontos de controle (N, Q, E) da curva quadrática de Bézier do sino.
+    Aceita escalares ou arrays (com broadcast).
+    """
     # Ponto N
     Nx = 0.382 * Rt * np.cos(theta_n - np.pi/2)
     Ny = 0.382 * Rt * np.sin(theta_n - np.pi/2) + 1.382 * Rt
@@ -79,137 +125,227 @@ def tubeira_sino(k, arazao, Rt, l_camara):
     Qx = (C2 - C1) / (m1 - m2)
     Qy = (m1 * C2 - m2 * C1) / (m1 - m2)
 
-    # Curva quadrática de Bézier
-    lista_parametros = np.linspace(0, 1, intervalo)
-    xsino = []
-    ysino = []
-    for t in lista_parametros:
-        xsino.append(((1-t)**2) * Nx + 2*(1-t)*t * Qx + (t**2) * Ex)
-        ysino.append(((1-t)**2) * Ny + 2*(1-t)*t * Qy + (t**2) * Ey)
+    return Nx, Ny, Qx, Qy, Ex, Ey
 
-    # Criar valores negativos para a outra metade da tubeira
-    nye = [-y for y in ye]
-    nye2 = [-y for y in ye2]
-    nysino = [-y for y in ysino]
 
-    return angulos, (xe, ye, nye, xe2, ye2, nye2, xsino, ysino, nysino)
+def tubeira_sino_adaptativa(arazao, Rt, l_camara, tolerancia):
+    """
+    Contorno de uma tubeira em formato de sino com pontos distribuídos pelo
+    desvio de corda: em cada seção, o menor número de pontos tal que nenhuma
+    corda entre pontos consecutivos se afasta da curva mais que a tolerância.
 
+    Parâmetros:
+    arazao: razão de área (Ae/At)
+    Rt: raio da garganta
+    l_camara: percentual do comprimento da tubeira (de 60 a 90)
+    tolerancia: desvio máximo, na unidade de Rt (> 0)
 
-def angulos_paredes(ar, Rt, l_camara=80):
+    Retorna um ProjetoTubeira, como tubeira_sino; as seções têm tamanhos diferentes.
+    """
+    if not tolerancia > 0:
+        raise ValueError("A tolerância do contorno deve ser positiva!")
+    angulos = angulos_paredes(arazao, Rt, l_camara)
+    theta_n, theta_e = angulos[1], angulos[2]
+    Lnp = l_camara / 100
+
+    # Arcos da garganta: passo angular uniforme (a flecha só depende do raio)
+    lista_angulos = _angulos_arco(1.5 * Rt, np.radians(-135), -np.pi/2, tolerancia)
+    xe = 1.5 * Rt * np.cos(lista_angulos)
+    ye = 1.5 * Rt * np.sin(lista_angulos) + 2.5 * Rt
+
+    lista_angulos = _angulos_arco(0.382 * Rt, -np.pi/2, theta_n - np.pi/2, tolerancia)
+    xe2 = 0.382 * Rt * np.cos(lista_angulos)
+    ye2 = 0.382 * Rt * np.sin(lista_angulos) + 1.382 * Rt
+
+    # Sino: passos em t escolhidos pela flecha de cada trecho da Bézier
+    Nx, Ny, Qx, Qy, Ex, Ey = pontos_bezier(Rt, arazao, Lnp, theta_n, theta_e)
+    t = _parametros_bezier((Nx, Ny), (Qx, Qy), (Ex, Ey), tolerancia)
+    xsino = ((1-t)**2) * Nx + 2*(1-t)*t * Qx + (t**2) * Ex
+    ysino = ((1-t)**2) * Ny + 2*(1-t)*t * Qy + (t**2) * Ey
+
+    return ProjetoTubeira.de_secoes([(xe, ye), (xe2, ye2), (xsino, ysino)], angulos, arazao, Rt)
+
+
+def _angulos_arco(raio, inicio, fim, tolerancia):
+    # Menor número de cordas com flecha raio * (1 - cos(delta / 2)) <= tolerancia
+    if tolerancia >= raio:
+        n = 1
+    else:
+        delta = 2 * np.arccos(1 - tolerancia / raio)
+        n = max(1, int(np.ceil(abs(fim - inicio) / delta)))
+    return np.linspace(inicio, fim, n + 1)
+
+
+def _parametros_bezier(P0, P1, P2, tolerancia, max_pontos=100000):
+    # Marcha gulosa em t: cada trecho [t0, t0 + h] de uma Bézier quadrática é
+    # outra Bézier quadrática, cuja flecha em relação à corda é
+    # h^2 * K / (4 * |B'(t0) + h * A|), com A = P0 - 2 P1 + P2 e
+    # K = |A x B'(t)| (constante ao longo da curva). O maior h que respeita a
+    # tolerância em cada passo dá o menor número de pontos. max_pontos limita
+    # a marcha (tolerâncias pequenas demais em relação à curva).
+    P0, P1, P2 = (np.asarray(P, dtype=float) for P in (P0, P1, P2))
+    A = P0 - 2 * P1 + P2
+    D0, D1 = 2 * (P1 - P0), 2 * (P2 - P1)
+    K = abs(A[0] * D0[1] - A[1] * D0[0])
+    if K == 0:
+        return np.array([0.0, 1.0])
+
+    def flecha(v, h):
+        return h * h * K / (4 * np.hypot(v[0] + h * A[0], v[1] + h * A[1]))
+
+    t = [0.0]
+    while t[-1] < 1:
+        v = (1 - t[-1]) * D0 + t[-1] * D1
+        # Ponto fixo de h = sqrt(4 * tolerancia * |v + h A| / K)
+        h = np.sqrt(4 * tolerancia * np.hypot(*v) / K)
+        for _ in range(20):
+            h_novo = np.sqrt(4 * tolerancia * np.hypot(v[0] + h * A[0], v[1] + h * A[1]) / K)
+            convergiu = abs(h_novo - h) <= 1e-12 * h
+            h = h_novo
+            if convergiu:
+                break
+        while flecha(v, h) > tolerancia:
+            h *= 0.999
+        t.append(min(t[-1] + h, 1.0))
+        if len(t) > max_pontos:
+            raise ValueError(f"Tolerância {tolerancia} exige mais de {max_pontos} pontos no sino!")
+    return np.array(t)
+
+
+# Dados empíricos dos ângulos das paredes [graus], uma linha por percentual
+# de comprimento (60, 80 e 90%) e uma coluna por razão de área
+ARAZAO_TABELA = np.array([4, 5, 10, 20, 30, 40, 50, 100], dtype=float)
+FRACOES_TABELA = np.array([0.6, 0.8, 0.9])
+THETA_N_TABELA = np.radians([[26.5, 28.0, 32.0, 35.0, 36.2, 37.1, 35.0, 40.0],
+                             [21.5, 23.0, 26.3, 28.8, 30.0, 31.0, 31.5, 33.5],
+                             [20.0, 21.0, 24.0, 27.0, 28.5, 29.5, 30.2, 32.0]])
+THETA_E_TABELA = np.radians([[20.5, 20.5, 16.0, 14.5, 14.0, 13.5, 13.0, 11.2],
+                             [14.0, 13.0, 11.0, 9.0, 8.5, 8.0, 7.5, 7.0],
+                             [11.5, 10.5, 8.0, 7.0, 6.5, 6.0, 6.0, 6.0]])
+# Maior razão de área aceita com extrapolação: até aqui os ângulos
+# extrapolados ficam entre ~5 e ~57 graus (theta_e > 0 e theta_n < 90)
+EPSILON_MAXIMO = 1000.0
+
+
+def _preparar_interpolante(tabela):
+    # Inclinações de cada intervalo (linear em epsilon) e do último intervalo
+    # em ln(epsilon), usada na extrapolação acima do fim da tabela
+    inclinacoes = np.diff(tabela, axis=1) / np.diff(ARAZAO_TABELA)
+    inclinacao_log = (tabela[:, -1] - tabela[:, -2]) / np.log(ARAZAO_TABELA[-1] / ARAZAO_TABELA[-2])
+    return tabela[:, :-1], inclinacoes, inclinacao_log
+
+
+_INTERPOLANTE_N = _preparar_interpolante(THETA_N_TABELA)
+_INTERPOLANTE_E = _preparar_interpolante(THETA_E_TABELA)
+
+# Cópias em listas para o caminho escalar (indexar listas é mais rápido que arrays)
+_AR_LISTA = ARAZAO_TABELA.tolist()
+_FRACOES_LISTA = FRACOES_TABELA.tolist()
+_INTERPOLANTE_N_LISTA = tuple(a.tolist() for a in _INTERPOLANTE_N)
+_INTERPOLANTE_E_LISTA = tuple(a.tolist() for a in _INTERPOLANTE_E)
+_TAN_15 = math.tan(math.radians(15))
+
+
+def _interpolar_angulo(interpolante, i, d_ar, excesso_log, j, peso):
+    # Interpolação linear em epsilon nas duas linhas de percentual vizinhas e
+    # linear no percentual entre elas
+    base, inclinacoes, inclinacao_log = interpolante
+    v0 = base[j, i] + inclinacoes[j, i] * d_ar + inclinacao_log[j] * excesso_log
+    v1 = base[j + 1, i] + inclinacoes[j + 1, i] * d_ar + inclinacao_log[j + 1] * excesso_log
+    return v0 + peso * (v1 - v0)
+
+
+@em_cache('angulos_paredes')
+def angulos_paredes(ar, Rt, l_camara=80, extrapolar=True):
     """
     Encontra os ângulos das paredes (theta_n, theta_e) para uma dada razão de área
 
     Parâmetros:
     ar: razão de área
     Rt: raio da garganta
-    l_camara: percentual do comprimento (60, 80, 90)
+    l_camara: percentual do comprimento (de 60 a 90, valores intermediários
+              são interpolados)
+    extrapolar: acima de epsilon = 100 (fim da tabela) continua o último
+                intervalo linearmente em ln(epsilon), até EPSILON_MAXIMO
+                (1000); False mantém os ângulos de epsilon = 100 para
+                qualquer epsilon. Abaixo de epsilon = 4 valem os ângulos de
+                epsilon = 4.
+
+    Os parâmetros podem ser arrays (com broadcast); retorna (Ln, theta_n,
+    theta_e), escalares para entradas escalares.
     """
-    # Dados empíricos dos ângulos das paredes
-    arazao = [4, 5, 10, 20, 30, 40, 50, 100]
-    theta_n_60 = [26.5, 28.0, 32.0, 35.0, 36.2, 37.1, 35.0, 40.0]
-    theta_n_80 = [21.5, 23.0, 26.3, 28.8, 30.0, 31.0, 31.5, 33.5]
-    theta_n_90 = [20.0, 21.0, 24.0, 27.0, 28.5, 29.5, 30.2, 32.0]
-    theta_e_60 = [20.5, 20.5, 16.0, 14.5, 14.0, 13.5, 13.0, 11.2]
-    theta_e_80 = [14.0, 13.0, 11.0, 9.0, 8.5, 8.0, 7.5, 7.0]
-    theta_e_90 = [11.5, 10.5, 8.0, 7.0, 6.5, 6.0, 6.0, 6.0]
+    if np.ndim(ar) == 0 and np.ndim(Rt) == 0 and np.ndim(l_camara) == 0:
+        return _angulos_escalar(float(ar), float(Rt), float(l_camara) / 100, extrapolar)
+
+    ar = np.asarray(ar, dtype=float)
+    fracao = np.asarray(l_camara, dtype=float) / 100
+    if np.any((fracao < FRACOES_TABELA[0]) | (fracao > FRACOES_TABELA[-1])):
+        raise ValueError("Percentual de comprimento fora da tabela (60 a 90%)!")
+    if extrapolar and np.any(ar > EPSILON_MAXIMO):
+        raise ValueError(f"Razão de área acima de {EPSILON_MAXIMO:g}, fora da faixa de extrapolação!")
 
     # Comprimento da tubeira
-    f1 = ((np.sqrt(ar) - 1) * Rt) / np.tan(np.radians(15))
-
-    if l_camara == 60:
-        theta_n = theta_n_60
-        theta_e = theta_e_60
-        Ln = 0.6 * f1
-    elif l_camara == 80:
-        theta_n = theta_n_80
-        theta_e = theta_e_80
-        Ln = 0.8 * f1
-    elif l_camara == 90:
-        theta_n = theta_n_90
-        theta_e = theta_e_90
-        Ln = 0.9 * f1
-    else:
-        theta_n = theta_n_80
-        theta_e = theta_e_80
-        Ln = 0.8 * f1
-
-    # Encontrar o índice mais próximo na lista de razões de área
-    x_index, x_val = encontrar_mais_proximo(arazao, ar)
-
-    # Se o valor no índice for próximo ao input, retorna diretamente
-    if round(arazao[x_index], 1) == round(ar, 1):
-        return Ln, np.radians(theta_n[x_index]), np.radians(theta_e[x_index])
-
-    # Interpolação linear para valores intermediários
-    if x_index > 2:
-        ar_meio = arazao[x_index-2:x_index+2]
-        theta_n_meio = theta_n[x_index-2:x_index+2]
-        theta_e_meio = theta_e[x_index-2:x_index+2]
-        tn_valor = interpolar(ar_meio, theta_n_meio, ar)
-        te_valor = interpolar(ar_meio, theta_e_meio, ar)
-    elif (len(arazao) - x_index) <= 1:
-        ar_meio = arazao[x_index-2:len(arazao)]
-        theta_n_meio = theta_n[x_index-2:len(theta_n)]
-        theta_e_meio = theta_e[x_index-2:len(theta_e)]
-        tn_valor = interpolar(ar_meio, theta_n_meio, ar)
-        te_valor = interpolar(ar_meio, theta_e_meio, ar)
+    Ln = fracao * ((np.sqrt(ar) - 1) * Rt) / np.tan(np.radians(15))
+
+    # Intervalo da tabela em epsilon e posição dentro dele
+    ar_tabela = np.clip(ar, ARAZAO_TABELA[0], ARAZAO_TABELA[-1])
+    i = np.clip(np.searchsorted(ARAZAO_TABELA, ar_tabela, side='right') - 1, 0, len(ARAZAO_TABELA) - 2)
+    d_ar = ar_tabela - ARAZAO_TABELA[i]
+    if extrapolar:
+        excesso_log = np.log(np.maximum(ar, ARAZAO_TABELA[-1]) / ARAZAO_TABELA[-1])
     else:
-        ar_meio = arazao[0:x_index+2]
-        theta_n_meio = theta_n[0:x_index+2]
-        theta_e_meio = theta_e[0:x_index+2]
-        tn_valor = interpolar(ar_meio, theta_n_meio, ar)
-        te_valor = interpolar(ar_meio, theta_e_meio, ar)
+        excesso_log = 0.0
 
-    return Ln, np.radians(tn_valor), np.radians(te_valor)
+    # Intervalo da tabela no percentual de comprimento
+    j = np.clip(np.searchsorted(FRACOES_TABELA, fracao, side='right') - 1, 0, len(FRACOES_TABELA) - 2)
+    peso = (fracao - FRACOES_TABELA[j]) / (FRACOES_TABELA[j + 1] - FRACOES_TABELA[j])
 
+    theta_n = _interpolar_angulo(_INTERPOLANTE_N, i, d_ar, excesso_log, j, peso)
+    theta_e = _interpolar_angulo(_INTERPOLANTE_E, i, d_ar, excesso_log, j, peso)
 
-def interpolar(x_lista, y_lista, x):
-    """
-    Interpolação linear simples
-    """
-    if any(y - x <= 0 for x, y in zip(x_lista, x_lista[1:])):
-        raise ValueError("x_lista deve estar em ordem estritamente crescente!")
+    return np.broadcast_arrays(Ln, theta_n, theta_e)
 
-    intervalos = zip(x_lista, x_lista[1:], y_lista, y_lista[1:])
-    inclinacoes = [(y2 - y1) / (x2 - x1) for x1, x2, y1, y2 in intervalos]
 
-    if x <= x_lista[0]:
-        return y_lista[0]
-    elif x >= x_lista[-1]:
-        return y_lista[-1]
-    else:
-        i = bisect_left(x_lista, x) - 1
-        return y_lista[i] + inclinacoes[i] * (x - x_lista[i])
+def _angulos_escalar(ar, Rt, fracao, extrapolar):
+    # Mesmo cálculo de angulos_paredes para um único projeto, sem arrays
+    if not _FRACOES_LISTA[0] <= fracao <= _FRACOES_LISTA[-1]:
+        raise ValueError("Percentual de comprimento fora da tabela (60 a 90%)!")
+    if extrapolar and ar > EPSILON_MAXIMO:
+        raise ValueError(f"Razão de área acima de {EPSILON_MAXIMO:g}, fora da faixa de extrapolação!")
 
+    Ln = fracao * ((math.sqrt(ar) - 1) * Rt) / _TAN_15
 
-def encontrar_mais_proximo(array, valor):
-    """
-    Encontra o índice mais próximo na lista para o valor dado
-    """
-    array = np.asarray(array)
-    idx = (np.abs(array - valor)).argmin()
-    return idx, array[idx]
+    ar_tabela = min(max(ar, _AR_LISTA[0]), _AR_LISTA[-1])
+    i = min(bisect_right(_AR_LISTA, ar_tabela) - 1, len(_AR_LISTA) - 2)
+    d_ar = ar_tabela - _AR_LISTA[i]
+    excesso_log = math.log(ar / _AR_LISTA[-1]) if extrapolar and ar > _AR_LISTA[-1] else 0.0
+
+    j = min(bisect_right(_FRACOES_LISTA, fracao) - 1, len(_FRACOES_LISTA) - 2)
+    peso = (fracao - _FRACOES_LISTA[j]) / (_FRACOES_LISTA[j + 1] - _FRACOES_LISTA[j])
 
+    angulos = []
+    for base, inclinacoes, inclinacao_log in (_INTERPOLANTE_N_LISTA, _INTERPOLANTE_E_LISTA):
+        v0 = base[j][i] + inclinacoes[j][i] * d_ar + inclinacao_log[j] * excesso_log
+        v1 = base[j + 1][i] + inclinacoes[j + 1][i] * d_ar + inclinacao_log[j + 1] * excesso_log
+        angulos.append(v0 + peso * (v1 - v0))
 
-def plotar_tubeira(ax, titulo, Rt, angulos, contorno, arazao):
+    return Ln, angulos[0], angulos[1]
+
+
+def plotar_tubeira(ax, titulo, projeto):
     """
-    Plota o contorno da tubeira
+    Plota o contorno da tubeira (ProjetoTubeira)
     """
-    # Ângulos das paredes
-    comprimento_tubeira = angulos[0]
-    theta_n = angulos[1]
-    theta_e = angulos[2]
-
-    # Valores do contorno
-    xe = contorno[0]
-    ye = contorno[1]
-    nye = contorno[2]
-    xe2 = contorno[3]
-    ye2 = contorno[4]
-    nye2 = contorno[5]
-    xsino = contorno[6]
-    ysino = contorno[7]
-    nysino = contorno[8]
+    Rt = projeto.Rt
+    comprimento_tubeira = projeto.Ln
+
+    # Valores do contorno (metades superior e inferior)
+    xe, ye = projeto.secao(ENTRADA_GARGANTA)
+    nye = -ye
+    xe2, ye2 = projeto.secao(SAIDA_GARGANTA)
+    nye2 = -ye2
+    xsino, ysino = projeto.secao(SINO)
+    nysino = -ysino
 
     # Configurar aspecto igual
     ax.set_aspect('equal')
@@ -230,10 +366,10 @@ def plotar_tubeira(ax, titulo, Rt, angulos, contorno, arazao):
     # Raio da garganta
     ax.annotate('', xy=(0, Rt), xytext=(0, 0),
                 arrowprops=dict(arrowstyle='<->', color='black', lw=1))
-    ax.text(0.1, Rt/2, f'Rt = {Rt}', fontsize=9)
+    ax.text(0.1, Rt/2, f'Rt = {Rt:.1f}', fontsize=9)
 
     # Raio de saída
-    Re = np.sqrt(arazao) * Rt
+    Re = np.sqrt(projeto.epsilon) * Rt
     ax.annotate('', xy=(xsino[-1], Re), xytext=(xsino[-1], 0),
                 arrowprops=dict(arrowstyle='<->', color='black', lw=1))
     ax.text(xsino[-1] + 0.1, Re/2, f'Re = {Re:.1f}', fontsize=9)
@@ -260,38 +396,42 @@ def plotar_tubeira(ax, titulo, Rt, angulos, contorno, arazao):
     ax.set_ylabel('Raio')
 
 
-def gerar_tabela_pontos(contorno, nome_arquivo=None):
-    # Gera uma tabela com pontos (x, y) para o CAD da tubeira.
-    xe, ye, nye, xe2, ye2, nye2, xsino, ysino, nysino = contorno
+COLUNAS_CSV = ("x (posição axial)", "y (raio)")
 
-    # Junta todos os pontos do contorno superior, removendo o último ponto
-    # das seções xe e xe2 para evitar a duplicata com o ponto inicial da seção seguinte.
-    x_total = np.concatenate([xe[:-1], xe2[:-1], xsino])
-    y_total = np.concatenate([ye[:-1], ye2[:-1], ysino])
 
-    # Cria DataFrame
-    df = pd.DataFrame({
-        "x (posição axial)": x_total,
-        "y (raio)": y_total
-    })
+def gerar_tabela_pontos(projeto, nome_arquivo=None, dataframe=True):
+    # Gera uma tabela com pontos (x, y) para o CAD da tubeira (ProjetoTubeira).
+    # Com dataframe=False retorna um array (n, 2) e não usa o pandas.
+
+    # Pontos do contorno superior, sem as duplicatas nas junções das seções
+    perfil = projeto.perfil()
+    x_total, y_total = perfil[:, 0], perfil[:, 1]
 
     # Salvar em CSV se solicitado
     if nome_arquivo:
-        df.to_csv(nome_arquivo, index=False)
+        escrever_csv_pontos(x_total, y_total, nome_arquivo)
+
+    if not dataframe:
+        return perfil
+
+    import pandas as pd
+    return pd.DataFrame({
+        COLUNAS_CSV[0]: x_total,
+        COLUNAS_CSV[1]: y_total
+    })
 
-    return df
 
-def plotar_3d(ax, contorno):
-    xe = contorno[0]
-    ye = contorno[1]
-    xe2 = contorno[3]
-    ye2 = contorno[4]
-    xsino = contorno[6]
-    ysino = contorno[7]
+def escrever_csv_pontos(x, y, nome_arquivo):
+    # CSV no mesmo formato do pandas (cabeçalho e floats com repr), sem depender dele
+    with open(nome_arquivo, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(COLUNAS_CSV) + '\n')
+        f.writelines(f'{xi!r},{yi!r}\n' for xi, yi in zip(np.asarray(x, dtype=float).tolist(),
+                                                          np.asarray(y, dtype=float).tolist()))
 
+def plotar_3d(ax, projeto):
     # Combinar todas as coordenadas sem duplicatas
-    x = np.concatenate([xe[:-1], xe2[:-1], xsino])
-    y = np.concatenate([ye[:-1], ye2[:-1], ysino])
+    perfil = projeto.perfil()
+    x, y = perfil[:, 0], perfil[:, 1]
 
     # Criar superfície de revolução
     theta = np.linspace(0, 2*np.pi, 50)
@@ -309,15 +449,20 @@ def plotar_3d(ax, contorno):
     ax.set_title('Vista 3D da tubeira')
 
 
-def plotar_completo(titulo, r_garganta, angulos, contorno, arazao):
+def plotar_completo(titulo, projeto, mostrar=True):
+    # matplotlib só é importado aqui: o cálculo do contorno depende apenas do NumPy
+    import matplotlib.pyplot as plt
+
     fig = plt.figure(figsize=(15, 7))
 
     # Plot 2D
     ax1 = fig.add_subplot(121)
-    plotar_tubeira(ax1, titulo, r_garganta, angulos, contorno, arazao)
+    plotar_tubeira(ax1, titulo, projeto)
 
     # Plot 3D
     ax2 = fig.add_subplot(122, projection='3d')
-    plotar_3d(ax2, contorno)
+    plotar_3d(ax2, projeto)
 
-    plt.show()
\ No newline at end of file
+    if mostrar:
+        plt.show()
+    return fig
@@ -0,0 +1,238 @@
+import os
+import json
+import numpy as np
+from src.atmosfera import us_standard_atmosphere
+from src.funcoes_auxiliares import mach_razao_area, empuxo, vazao_massica
+from src.tubeira_sino import tubeira_sino_lote
+from src.transferencia_calor import perfil_bartz
+
+"""
+Varredura do espaço de projeto (epsilon, comprimento, k, P1).
+
+Cada combinação passa pelo mesmo caminho de main.py: ângulos das paredes e
+contorno (tubeira_sino), pressão de saída (razão de pressões), empuxo ao
+longo do perfil de altitudes e impulso específico, além de indicadores de
+comprimento e de massa da tubeira. Com T_parede, o fluxo de calor de Bartz
+é calculado em todas as estações do contorno (src.transferencia_calor) e
+resumido em colunas para o dimensionamento do resfriamento.
+
+As combinações são divididas em blocos avaliados em um pool de processos.
+Cada bloco é gravado no diretório da varredura como um .npz com uma coluna
+por grandeza (bloco_00000.npz, bloco_00001.npz, ...). A gravação é atômica,
+então só blocos completos existem em disco e uma varredura interrompida
+pode ser retomada chamando varredura() de novo com o mesmo diretório.
+"""
+
+g = 9.80665
+ARQUIVO_PARAMETROS = 'parametros.npz'
+ARQUIVO_INFO = 'varredura.json'
+# np.trapezoid só existe a partir do NumPy 2.0 (antes, np.trapz)
+_trapezio = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def combinacoes(epsilon, l_camara, k, P1):
+    """
+    Produto cartesiano dos valores de cada parâmetro, como arrays 1D.
+    """
+    grade = np.meshgrid(np.atleast_1d(np.asarray(epsilon, dtype=float)),
+                        np.atleast_1d(np.asarray(l_camara, dtype=float)),
+                        np.atleast_1d(np.asarray(k, dtype=float)),
+                        np.atleast_1d(np.asarray(P1, dtype=float)),
+                        indexing='ij')
+    return tuple(c.ravel() for c in grade)
+
+
+def avaliar_projetos(epsilon, l_camara, k, P1, h, P_ambiente, At=0.126, T1=3300, R=518, mdot=None,
+                     intervalo=100, T_parede=None):
+    """
+    Avalia um conjunto de projetos de forma vetorizada.
+
+    Parâmetros:
+    epsilon, l_camara, k, P1: arrays 1D com os parâmetros de cada projeto
+    h: altitudes do perfil [m]
+    P_ambiente: pressão atmosférica em cada altitude [Pa]
+    At: área da garganta [m^2]
+    T1, R: temperatura da câmara [K] e constante do gás [J/kg*K]
+    mdot: vazão mássica [kg/s]; se None, calculada com a garganta bloqueada
+    intervalo: pontos por seção do contorno
+    T_parede: temperatura da parede do lado do gás [K]; se informada, inclui
+              q_max [W/m^2], x_q_max [m] (posição do pico a partir do início
+              do contorno) e carga_termica [W] (q integrado na parede)
+
+    Retorna um dicionário de colunas.
+    """
+    Rt_mm = np.sqrt(At / np.pi) * 1000
+
+    # Pressão de saída
+    _, razao_P = mach_razao_area(epsilon, k)
+    P2 = P1 * razao_P
+
+    # Empuxo e impulso específico ao longo do perfil (projetos x altitudes)
+    F = empuxo(P1[:, None], At, k[:, None], P2[:, None], P_ambiente[None, :], epsilon[:, None])
+    if mdot is None:
+        vazao = vazao_massica(P1, At, k, R, T1)
+    else:
+        vazao = np.full_like(P1, mdot)
+    Isp = F / (vazao[:, None] * g)
+
+    # Contorno, comprimento e área molhada da parede (indicador de massa)
+    angulos, contornos = tubeira_sino_lote(k, epsilon, Rt_mm, l_camara, intervalo)
+    x = contornos[..., 0] / 1000
+    y = contornos[..., 1] / 1000
+    ds = np.hypot(np.diff(x, axis=1), np.diff(y, axis=1))
+    area_parede = np.sum(2 * np.pi * 0.5 * (y[:, 1:] + y[:, :-1]) * ds, axis=1)
+
+    colunas = {
+        'epsilon': epsilon,
+        'l_camara': l_camara,
+        'k': k,
+        'P1': P1,
+        'P2': P2,
+        'mdot': vazao,
+        'Ln': angulos[:, 0] / 1000,
+        'theta_n': angulos[:, 1],
+        'theta_e': angulos[:, 2],
+        'comprimento_total': x[:, -1] - x[:, 0],
+        'area_parede': area_parede,
+        'F': F,
+        'F_medio': _media_perfil(F, h),
+        'Isp_medio': _media_perfil(Isp, h),
+    }
+
+    if T_parede is not None:
+        # Fluxo de calor em todas as estações de todos os projetos de uma vez
+        q = perfil_bartz(contornos[..., 1], Rt_mm, k, P1, T1, R, T_parede)['q']
+        pico = np.argmax(q, axis=1)
+        q_parede = 2 * np.pi * y * q
+        colunas.update({
+            'q_max': q[np.arange(q.shape[0]), pico],
+            'x_q_max': x[np.arange(x.shape[0]), pico] - x[:, 0],
+            'carga_termica': np.sum(0.5 * (q_parede[:, 1:] + q_parede[:, :-1]) * ds, axis=1),
+        })
+    return colunas
+
+
+def _media_perfil(valores, h):
+    # Média ao longo do perfil de altitudes (regra do trapézio)
+    if h.size == 1:
+        return valores[:, 0]
+    return _trapezio(valores, h, axis=1) / (h[-1] - h[0])
+
+
+def _nome_bloco(diretorio, indice):
+    return os.path.join(diretorio, f'bloco_{indice:05d}.npz')
+
+
+def _avaliar_bloco(argumentos):
+    diretorio, indice, parametros, h, P_ambiente, opcoes = argumentos
+    colunas = avaliar_projetos(*parametros, h, P_ambiente, **opcoes)
+
+    # Grava em arquivo temporário e renomeia: o bloco só aparece quando completo
+    arquivo = _nome_bloco(diretorio, indice)
+    temporario = f'{arquivo}.{os.getpid()}.tmp.npz'
+    np.savez(temporario, **colunas)
+    os.replace(temporario, arquivo)
+    return indice
+
+
+def _preparar_diretorio(diretorio, parametros, h, opcoes, tamanho_bloco):
+    """
+    Cria o diretório da varredura ou confere se ele corresponde aos mesmos
+    parâmetros, para que blocos de varreduras diferentes não se misturem.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    arquivo_parametros = os.path.join(diretorio, ARQUIVO_PARAMETROS)
+    arquivo_info = os.path.join(diretorio, ARQUIVO_INFO)
+    info = {'tamanho_bloco': tamanho_bloco, 'opcoes': opcoes}
+
+    if os.path.exists(arquivo_parametros):
+        with open(arquivo_info) as f:
+            info_existente = json.load(f)
+        with np.load(arquivo_parametros) as dados:
+            iguais = (info_existente == info
+                      and np.array_equal(dados['h'], h)
+                      and all(np.array_equal(dados[nome], valor)
+                              for nome, valor in zip(('epsilon', 'l_camara', 'k', 'P1'), parametros)))
+        if not iguais:
+            raise ValueError(f"O diretório {diretorio} contém uma varredura com outros parâmetros!")
+        return
+
+    with open(arquivo_info, 'w') as f:
+        json.dump(info, f, indent=2)
+    temporario = f'{arquivo_parametros}.tmp.npz'
+    np.savez(temporario, epsilon=parametros[0], l_camara=parametros[1], k=parametros[2],
+             P1=parametros[3], h=h)
+    os.replace(temporario, arquivo_parametros)
+
+
+def varredura(diretorio, epsilon, l_camara, k, P1, h=None, At=0.126, T1=3300, R=518, mdot=None,
+              intervalo=100, tamanho_bloco=1024, processos=None, T_parede=None):
+    """
+    Avalia todas as combinações de (epsilon, l_camara, k, P1) e grava os
+    resultados em blocos no diretório informado.
+
+    Parâmetros:
+    diretorio: diretório da varredura (criado se não existir)
+    epsilon, l_camara, k, P1: valores de cada parâmetro (escalar ou array)
+    h: perfil de altitudes [m] (padrão: 0 a 120 km, 200 pontos)
+    At, T1, R, mdot, intervalo, T_parede: ver avaliar_projetos
+    tamanho_bloco: combinações por bloco
+    processos: número de processos (None usa todos os núcleos; 1 avalia
+               no próprio processo)
+
+    Blocos já gravados são pulados. Retorna os resultados de
+    carregar_varredura(diretorio).
+    """
+    if h is None:
+        h = np.linspace(0, 120e3, 200)
+    h = np.atleast_1d(np.asarray(h, dtype=float))
+    P_ambiente = us_standard_atmosphere(h)["P"]
+
+    parametros = combinacoes(epsilon, l_camara, k, P1)
+    opcoes = {'At': At, 'T1': T1, 'R': R, 'mdot': mdot, 'intervalo': intervalo}
+    if T_parede is not None:
+        # Só entra nas opções quando usado: varreduras anteriores continuam retomáveis
+        opcoes['T_parede'] = T_parede
+    _preparar_diretorio(diretorio, parametros, h, opcoes, tamanho_bloco)
+
+    n_total = parametros[0].size
+    pendentes = []
+    for indice, inicio in enumerate(range(0, n_total, tamanho_bloco)):
+        if os.path.exists(_nome_bloco(diretorio, indice)):
+            continue
+        fatia = tuple(p[inicio:inicio + tamanho_bloco] for p in parametros)
+        pendentes.append((diretorio, indice, fatia, h, P_ambiente, opcoes))
+
+    if processos == 1:
+        for argumentos in pendentes:
+            _avaliar_bloco(argumentos)
+    elif pendentes:
+        # Importado só quando há processos: os workers carregam este módulo
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            for _ in executor.map(_avaliar_bloco, pendentes):
+                pass
+
+    return carregar_varredura(diretorio)
+
+
+def carregar_varredura(diretorio, colunas=None):
+    """
+    Lê os blocos completos de uma varredura e concatena as colunas.
+
+    Parâmetros:
+    diretorio: diretório da varredura
+    colunas: nomes das colunas a carregar (None carrega todas)
+    """
+    blocos = sorted(f for f in os.listdir(diretorio) if f.startswith('bloco_') and f.endswith('.npz')
+                    and '.tmp' not in f)
+    resultado = {}
+    for nome in blocos:
+        with np.load(os.path.join(diretorio, nome)) as dados:
+            for coluna in (colunas or dados.files):
+                resultado.setdefault(coluna, []).append(dados[coluna])
+
+    resultado = {coluna: np.concatenate(partes) for coluna, partes in resultado.items()}
+    with np.load(os.path.join(diretorio, ARQUIVO_PARAMETROS)) as dados:
+        resultado['h'] = dados['h']
+    return resultado
@@ -0,0 +1,44 @@
+import numpy as np
+from src.funcoes_auxiliares import mach_razao_area
+
+"""
+Relação área-Mach comparada com raízes de referência (brentq, xtol 1e-15).
+"""
+
+EPSILONS = np.array([1.0001, 1.5, 4.0, 30.0, 150.0, 1000.0])
+# k -> (Mach supersônico, Mach subsônico) para cada epsilon de EPSILONS
+REFERENCIA = {
+    1.22: ([1.010561223356, 1.779975078842, 2.649607070977, 4.141502218404, 5.378881216622, 7.020736970994],
+           [9.894904412230e-01, 4.373880662077e-01, 1.495015293859e-01, 1.969233357533e-02,
+            3.937653062980e-03, 5.906429911070e-04]),
+    1.4: ([1.010987562140, 1.854123526737, 2.940179169313, 5.230996667187, 7.593461351399, 11.40408498356],
+          [9.890791020518e-01, 4.302617321181e-01, 1.465482139519e-01, 1.929443251749e-02,
+           3.858059146600e-03, 5.787038199878e-04]),
+}
+
+
+def test_mach_razao_area_referencia():
+    for k, (supersonico, subsonico) in REFERENCIA.items():
+        for ramo, esperado in ((True, supersonico), (False, subsonico)):
+            M, _ = mach_razao_area(EPSILONS, k, ramo)
+            assert np.allclose(M, esperado, rtol=1e-9, atol=0)
+            # Caminho escalar
+            for epsilon, M_esperado in zip(EPSILONS, esperado):
+                assert np.isclose(mach_razao_area(epsilon, k, ramo)[0], M_esperado, rtol=1e-9, atol=0)
+
+
+def test_mach_razao_area_k_por_elemento():
+    k = np.array([1.22, 1.4])
+    M, P_ratio = mach_razao_area(np.array([30.0, 30.0]), k)
+    assert np.allclose(M, [REFERENCIA[1.22][0][3], REFERENCIA[1.4][0][3]], rtol=1e-9, atol=0)
+    assert np.allclose(P_ratio, (1 + (k - 1) / 2 * M ** 2) ** (-k / (k - 1)))
+
+
+def test_mach_razao_area_invalidos():
+    for ramo in (True, False):
+        M, P_ratio = mach_razao_area(np.array([0.5, -1.0, np.nan, 1.0]), 1.22, ramo)
+        assert np.all(np.isnan(M[:3])) and np.all(np.isnan(P_ratio[:3]))
+        assert M[3] == 1.0
+        for epsilon in (0.5, np.nan):
+            assert np.isnan(mach_razao_area(epsilon, 1.22, ramo)[0])
+        assert mach_razao_area(1.0, 1.22, ramo)[0] == 1.0
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from src import tabela_mach
+from src.funcoes_auxiliares import mach_razao_area, epsilon_k_razaoP2P1
+
+"""
+Inversão tabelada da relação área-Mach comparada com o método iterativo.
+"""
+
+
+@pytest.fixture(autouse=True)
+def cache_temporario(tmp_path, monkeypatch):
+    # Tabelas em um diretório temporário, sem reaproveitar as do LRU
+    monkeypatch.setattr(tabela_mach, 'DIRETORIO_CACHE', str(tmp_path))
+    tabela_mach.tabela_mach.cache_clear()
+    yield
+    tabela_mach.tabela_mach.cache_clear()
+
+
+def test_mach_tabelado_escalar_fora_da_tabela():
+    for ramo in (True, False):
+        for epsilon in (1.0, 0.5, 2 * tabela_mach.EPSILON_MAX, 30.0):
+            M, P_ratio = tabela_mach.mach_tabelado(epsilon, 1.22, ramo)
+            M_ref, P_ref = mach_razao_area(epsilon, 1.22, ramo)
+            assert np.shape(M) == () and np.shape(P_ratio) == ()
+            assert np.allclose(M, M_ref, rtol=1e-6, equal_nan=True)
+            assert np.allclose(P_ratio, P_ref, rtol=1e-6, equal_nan=True)
+    assert epsilon_k_razaoP2P1(1.0, 1.22, tabelado=True) == mach_razao_area(1.0, 1.22)[1]
+
+
+def test_mach_tabelado_array_fora_da_tabela():
+    epsilon = np.array([[1.0, 2 * tabela_mach.EPSILON_MAX], [30.0, 0.5]])
+    M, _ = tabela_mach.mach_tabelado(epsilon, 1.22)
+    assert M.shape == (2, 2)
+    assert np.allclose(M, mach_razao_area(epsilon, 1.22)[0], rtol=1e-6, equal_nan=True)
+
+
+def test_mach_tabelado_k_invalido():
+    for k in (np.nan, 1.0, 0.8, np.inf, np.array([1.22, np.nan])):
+        with pytest.raises(ValueError):
+            tabela_mach.mach_tabelado(30.0, k)
+    with pytest.raises(ValueError):
+        tabela_mach.tabela_mach(np.nan)
+
+
+def test_tabela_tolerancia_inatingivel(monkeypatch):
+    monkeypatch.setattr(tabela_mach, 'MAX_PONTOS_TABELA', 2000)
+    with pytest.raises(ValueError):
+        tabela_mach.tabela_mach(1.22, True, 1e-12)
+
+
+def test_tabela_sem_permissao_de_escrita(tmp_path, monkeypatch):
+    # Diretório de cache que não pode ser criado (um arquivo no caminho)
+    bloqueio = tmp_path / 'arquivo'
+    bloqueio.write_text('')
+    monkeypatch.setattr(tabela_mach, 'DIRETORIO_CACHE', str(bloqueio / 'tabelas'))
+    M, _ = tabela_mach.mach_tabelado(30.0, 1.22)
+    assert np.isclose(M, mach_razao_area(30.0, 1.22)[0], rtol=1e-6)
@@ -0,0 +1,29 @@
+import numpy as np
+from src.transferencia_calor import perfil_bartz
+
+"""
+Coeficiente de Bartz na garganta comparado com um valor calculado à mão.
+"""
+
+
+def test_bartz_garganta():
+    # k = 1.22, R = 518 J/kg*K, T1 = 3300 K, P1 = 30 MPa, Dt = 0.4 m,
+    # Rc = 0.941 * 0.2 m, T_parede = 800 K, na garganta (M = 1, At/A = 1):
+    #   cp = 2872.545 J/kg*K, Pr = 0.816054, mu = 6.126498e-5 Pa*s,
+    #   c* = 2004.089 m/s, sigma = 1.345509
+    #   h_g = 0.026 / 0.4^0.2 * mu^0.2 * cp / Pr^0.6 * (P1 / c*)^0.8
+    #         * (0.4 / 0.1882)^0.1 * sigma = 46241.68 W/m^2*K
+    y = np.array([300.0, 250.0, 200.0, 250.0, 300.0])
+    perfil = perfil_bartz(y, 200.0, 1.22, 30e6, 3300.0, 518.0, T_parede=800.0)
+
+    assert perfil['M'][0, 2] == 1.0
+    assert np.isclose(perfil['h_g'][0, 2], 46241.68, rtol=1e-6)
+
+
+def test_bartz_raio_curvatura():
+    # O termo de curvatura é (Dt / Rc)^0.1: dobrar Rc divide h_g por 2^0.1
+    y = np.array([300.0, 200.0, 300.0])
+    base = perfil_bartz(y, 200.0, 1.22, 30e6, 3300.0, 518.0, raio_curvatura=200.0)
+    dobro = perfil_bartz(y, 200.0, 1.22, 30e6, 3300.0, 518.0, raio_curvatura=400.0)
+
+    assert np.allclose(base['h_g'] / dobro['h_g'], 2 ** 0.1)